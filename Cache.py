@@ -0,0 +1,203 @@
+import os
+import re
+import time
+import zlib
+import sqlite3
+import hashlib
+import threading
+
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+
+class CacheMiss(LookupError):
+    '''
+    Raised when a response is not in the cache and the cache is in offline mode.
+    '''
+
+
+class ResponseCache():
+
+    def __init__(self, path: str = 'cache/responses.sqlite', ttl: float = None, max_bytes: int = None,
+                 offline: bool = False):
+        '''
+        Builds a `ResponseCache` object. Responses are stored compressed in a `SQLite` file, and are addressed
+        by the normalized `URL` together with the Wayback timestamp. Reruns of the scrapers can then be served
+        from the disk instead of the network.
+
+        Parameters
+        ---
+        path : str, default = 'cache/responses.sqlite'
+            Location of the database. Missing folders are created;
+
+        ttl : float, default = None
+            Seconds after which a stored response is considered expired. If `None`, responses never expire;
+
+        max_bytes : int, default = None
+            Maximum size of the compressed responses. When exceeded, the least recently used ones are evicted.
+            If `None`, the cache can grow without limits;
+
+        offline : bool, default = False
+            If `True`, nothing is ever downloaded: a missing response raises `CacheMiss`.
+        '''
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok = True)
+
+        self.__ttl__       = ttl
+        self.__max_bytes__ = max_bytes
+        self.__offline__   = offline
+        self.__lock__      = threading.Lock()
+
+        # The same connection is shared by the threads of the fetchers, the lock serializes the access.
+        self.__db__ = sqlite3.connect(path, check_same_thread = False)
+        self.__db__.execute('''CREATE TABLE IF NOT EXISTS responses (
+                                   key         TEXT PRIMARY KEY,
+                                   url         TEXT,
+                                   timestamp   TEXT,
+                                   content     BLOB,
+                                   size        INTEGER,
+                                   created     REAL,
+                                   last_access REAL)''')
+        self.__db__.execute('CREATE INDEX IF NOT EXISTS lru ON responses (last_access)')
+        self.__db__.commit()
+
+
+    def is_offline(self) -> bool:
+
+        return self.__offline__
+
+
+    def close(self) -> None:
+
+        self.__db__.close()
+
+
+    def normalize(self, url: str) -> str:
+        '''
+        Returns a canonical version of `url`: lower case scheme and host, no fragment, no default port
+        and sorted query parameters.
+        '''
+
+        parts = urlsplit(url.strip())
+        host  = parts.netloc.lower()
+        host  = re.sub(r':(80|443)$', '', host)
+        query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values = True)))
+
+        return urlunsplit((parts.scheme.lower(), host, parts.path or '/', query, ''))
+
+
+    def key(self, url: str, timestamp: str = '') -> tuple:
+        '''
+        Returns the address of a response, together with the normalized `URL` and the timestamp used.
+        If `timestamp` is not given, it is taken from the `URL` when it points to a Wayback snapshot.
+        '''
+
+        url = self.normalize(url)
+
+        if not timestamp:
+            match     = re.search(r'/web/(\d{4,14})[^/]*/', url)
+            timestamp = match.group(1) if match else ''
+
+        key = hashlib.sha256(f"{url}|{timestamp}".encode()).hexdigest()
+
+        return key, url, timestamp
+
+
+    def get(self, url: str, timestamp: str = '') -> bytes:
+        '''
+        Returns the stored response, or `None` if it is missing or expired.
+        '''
+
+        key, _, _ = self.key(url, timestamp)
+        now       = time.time()
+
+        with self.__lock__:
+
+            row = self.__db__.execute('SELECT content, created FROM responses WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                return None
+
+            if self.__ttl__ is not None and now - row[1] > self.__ttl__:
+                self.__db__.execute('DELETE FROM responses WHERE key = ?', (key,))
+                self.__db__.commit()
+                return None
+
+            self.__db__.execute('UPDATE responses SET last_access = ? WHERE key = ?', (now, key))
+            self.__db__.commit()
+
+        return zlib.decompress(row[0])
+
+
+    def put(self, url: str, content: bytes, timestamp: str = '') -> None:
+        '''
+        Stores a response, replacing the previous one with the same address.
+        '''
+
+        key, url, timestamp = self.key(url, timestamp)
+        content = zlib.compress(content.encode() if isinstance(content, str) else content)
+        now     = time.time()
+
+        with self.__lock__:
+
+            self.__db__.execute('INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)',
+                                (key, url, timestamp, content, len(content), now, now))
+            self.__db__.commit()
+
+        self.evict()
+
+
+    def fetch(self, url: str, download, timestamp: str = '') -> bytes:
+        '''
+        Returns the stored response if available, otherwise calls `download()`, stores and returns its result.
+
+        Parameters
+        ---
+        url : str
+            The `URL` of the response;
+
+        download : callable
+            Function without arguments that retrieves the response from the network;
+
+        timestamp : str, default = ''
+            Wayback timestamp of the response, if not already within the `URL`.
+        '''
+
+        content = self.get(url, timestamp)
+
+        if content is None:
+
+            if self.__offline__:
+                raise CacheMiss(url)
+
+            content = download()
+            self.put(url, content, timestamp)
+
+        return content
+
+
+    def evict(self) -> None:
+        '''
+        Drops the expired responses and, if the cache is too large, the least recently used ones.
+        '''
+
+        with self.__lock__:
+
+            if self.__ttl__ is not None:
+                self.__db__.execute('DELETE FROM responses WHERE created < ?', (time.time() - self.__ttl__,))
+
+            if self.__max_bytes__ is not None:
+
+                total = self.__db__.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+                rows  = self.__db__.execute('SELECT key, size FROM responses ORDER BY last_access') if total > self.__max_bytes__ else []
+
+                evicted = []
+                for key, size in rows:
+
+                    if total <= self.__max_bytes__:
+                        break
+                    evicted.append((key,))
+                    total -= size
+
+                self.__db__.executemany('DELETE FROM responses WHERE key = ?', evicted)
+
+            self.__db__.commit()
@@ -0,0 +1,379 @@
+import asyncio
+import json
+import re
+import threading
+import time
+import numpy as np
+import requests
+
+from requests.adapters import HTTPAdapter
+from urllib.parse import urlparse
+from datetime import date
+
+import concurrent.futures
+
+from Cache import ResponseCache
+
+
+class RateLimiter():
+
+    def __init__(self, rate: float = 5.0):
+        '''
+        Builds a `RateLimiter` object. It spaces the requests sent to the same host so that no more than
+        `rate` requests per second are issued. The same object can be shared by several fetchers, threads
+        or event loops.
+
+        Parameters
+        ---
+        rate : float, default = 5.0
+            Maximum number of requests per second for each host. If `0`, no limit is applied.
+        '''
+
+        self.__interval__  = 1 / rate if rate > 0 else 0.0
+        self.__next_slot__ = {}      # Key = host : Value = first free time slot
+        self.__lock__      = threading.Lock()
+
+
+    def reserve(self, host: str) -> float:
+        '''
+        Books the next free time slot for `host` and returns how many seconds the caller has to wait
+        before sending its request.
+
+        Parameters
+        ---
+        host : str
+            The host the request is directed to.
+
+        Output
+        ---
+        The waiting time in seconds.
+        '''
+
+        with self.__lock__:
+            now  = time.monotonic()
+            slot = max(now, self.__next_slot__.get(host, now))
+            self.__next_slot__[host] = slot + self.__interval__
+
+        return slot - now
+
+
+    async def acquire(self, host: str) -> None:
+        '''
+        Waits, without blocking the event loop, until a request to `host` is allowed.
+        '''
+
+        await asyncio.sleep(self.reserve(host))
+
+
+    def wait(self, host: str) -> None:
+        '''
+        Blocking version of `acquire`, to be used from plain threads.
+        '''
+
+        time.sleep(self.reserve(host))
+
+
+class AsyncFetcher():
+
+    def __init__(self, base_url: str = 'https://web.archive.org', concurrency: int = 8, rate: float = 5.0,
+                 timeout: float = 30.0, retries: int = 3, rate_limiter: RateLimiter = None,
+                 cache: ResponseCache = None):
+        '''
+        Builds an `AsyncFetcher` object. It retrieves the snapshot calendar of the Wayback Machine through
+        its `JSON` endpoint, without rendering any page. Requests are issued concurrently over a pool of
+        persistent `HTTP` connections.
+
+        Parameters
+        ---
+        base_url : str, default = 'https://web.archive.org'
+            Root of the archive. It can point to a local server serving recorded calendar pages.
+
+        concurrency : int, default = 8
+            Maximum number of requests in flight at the same time. It is also the size of the connection pool.
+
+        rate : float, default = 5.0
+            Maximum number of requests per second for each host. Ignored if `rate_limiter` is passed.
+
+        timeout : float, default = 30.0
+            Seconds before a single request is considered failed.
+
+        retries : int, default = 3
+            How many times a failed request is sent again before giving up on the `URL`.
+
+        rate_limiter : RateLimiter, default = None
+            An already built limiter, useful to share the same budget among several fetchers.
+
+        cache : ResponseCache, default = None
+            If passed, responses are looked up there first and stored after being downloaded.
+        '''
+
+        self.__base_url__    = base_url.rstrip('/')
+        self.__concurrency__ = concurrency
+        self.__timeout__     = timeout
+        self.__retries__     = retries
+        self.__limiter__     = rate_limiter if rate_limiter is not None else RateLimiter(rate)
+        self.__cache__       = cache
+        self.__failed__      = []
+
+        # A single session keeps the connections alive between requests.
+        self.__session__ = requests.Session()
+        adapter = HTTPAdapter(pool_connections = 1, pool_maxsize = concurrency)
+        self.__session__.mount('http://', adapter)
+        self.__session__.mount('https://', adapter)
+        self.__executor__ = concurrent.futures.ThreadPoolExecutor(max_workers = concurrency)
+
+
+    def close(self) -> None:
+        '''
+        Releases the connection pool and the threads.
+        '''
+
+        self.__executor__.shutdown(wait = True)
+        self.__session__.close()
+
+
+    def get_failed(self) -> list:
+        '''
+        Returns the `URL`'s that could not be retrieved during the last call.
+        '''
+
+        return self.__failed__
+
+
+    def fetch_calendar(self, url: list, years: list = ['2013', '2014', '2015']) -> dict:
+        '''
+        Retrieves, for each `URL` and year, the dates for which a snapshot is available. Blocking wrapper
+        around `fetch_calendar_async`; inside a running event loop (e.g. Jupyter) await the latter instead.
+
+        Parameters
+        ---
+        url : list
+            List of `URL`'s, each in a `str` format.
+
+        years : list, default = ['2013', '2014', '2015']
+            List of the years over which the fetcher will look.
+
+        Output
+        ---
+        A dictionary structured as follows:
+        >>> {URL_0 : {year_0 : snapshot_dates, year_1 : snapshot_dates},
+        >>>  URL_1 : {year_0 : snapshot_dates, year_1 : snapshot_dates},
+        >>>  ...
+        >>> }
+        '''
+
+        return asyncio.run(self.fetch_calendar_async(url, years))
+
+
+    async def fetch_calendar_async(self, url: list, years: list = ['2013', '2014', '2015']) -> dict:
+        '''
+        Coroutine version of `fetch_calendar`.
+        '''
+
+        self.__failed__ = []
+        semaphore = asyncio.Semaphore(self.__concurrency__)
+        url       = list(url)
+
+        tasks   = [self.__fetch_url__(semaphore, i_url, years) for i_url in url]
+        results = await asyncio.gather(*tasks)
+
+        # Keep the input order, leaving out the URL's that failed.
+        url_dates = {}
+        for i_url, result in zip(url, results):
+
+            if result is None:
+                self.__failed__.append(i_url)
+            else:
+                url_dates[i_url] = result
+
+        return url_dates
+
+
+    def fetch_index(self, url: list, years: list = ['2013', '2014', '2015']) -> dict:
+        '''
+        Retrieves, for each `URL`, the dates for which a snapshot is available using the `CDX` index of the
+        archive. A single request per `URL` covers all the `years`, and the body is parsed while it streams in.
+        Blocking wrapper around `fetch_index_async`.
+
+        Parameters
+        ---
+        url : list
+            List of `URL`'s, each in a `str` format.
+
+        years : list, default = ['2013', '2014', '2015']
+            List of the years over which the fetcher will look. Only the first and the last are used as bounds.
+
+        Output
+        ---
+        A dictionary structured as follows:
+        >>> {URL_0 : sorted_snapshot_dates,
+        >>>  URL_1 : sorted_snapshot_dates,
+        >>>  ...
+        >>> }
+        where each value is a `np.array` of type `datetime64[D]`.
+        '''
+
+        return asyncio.run(self.fetch_index_async(url, years))
+
+
+    async def fetch_index_async(self, url: list, years: list = ['2013', '2014', '2015']) -> dict:
+        '''
+        Coroutine version of `fetch_index`.
+        '''
+
+        self.__failed__ = []
+        semaphore = asyncio.Semaphore(self.__concurrency__)
+        url       = list(url)
+        years     = sorted(years)
+
+        # Collapsing on the first 8 digits of the timestamp returns at most one line per day.
+        tasks = [self.__request__(semaphore, '/cdx/search/cdx',
+                                  {'url': i_url, 'from': years[0], 'to': years[-1], 'fl': 'timestamp',
+                                   'collapse': 'timestamp:8', 'filter': 'statuscode:200'},
+                                  self._parse_index, stream = True) for i_url in url]
+        results = await asyncio.gather(*tasks)
+
+        url_dates = {}
+        for i_url, result in zip(url, results):
+
+            if result is None:
+                self.__failed__.append(i_url)
+            else:
+                url_dates[i_url] = result
+
+        return url_dates
+
+
+    async def __fetch_url__(self, semaphore: asyncio.Semaphore, url: str, years: list) -> dict:
+
+        year_dates = {}
+
+        for year in years:
+
+            dates = await self.__request__(semaphore, '/__wb/calendarcaptures/2',
+                                           {'url': url, 'date': year, 'groupby': 'day'},
+                                           lambda content: self._parse_calendar(content, year))
+            if dates is None:
+                return None
+
+            year_dates[year] = dates
+
+        return year_dates
+
+
+    async def __request__(self, semaphore: asyncio.Semaphore, endpoint: str, params: dict, parse, stream: bool = False):
+
+        loop = asyncio.get_running_loop()
+        host = urlparse(self.__base_url__).netloc
+
+        # Cached responses skip both the rate limiter and the network.
+        if self.__cache__ is not None:
+
+            content = self.__cache__.get(self._full_url(endpoint, params))
+
+            if content is not None:
+                try:
+                    return parse(content.splitlines() if stream else content)
+                except ValueError:
+                    pass
+
+            if self.__cache__.is_offline():
+                return None
+
+        for attempt in range(self.__retries__ + 1):
+
+            # The slot is booked before taking a connection, so that waiting for it does not hold one.
+            await self.__limiter__.acquire(host)
+
+            async with semaphore:
+
+                try:
+                    # Parsing happens in the same thread, so that a streamed body is consumed as it arrives.
+                    return await loop.run_in_executor(self.__executor__,
+                                                      lambda: parse(self._get(endpoint, params, stream)))
+                except (requests.RequestException, ValueError):
+                    pass
+
+            # Back off a bit before trying again, not after the last attempt.
+            if attempt < self.__retries__:
+                await asyncio.sleep(2 ** attempt)
+
+        return None
+
+
+    def _full_url(self, endpoint: str, params: dict) -> str:
+        '''
+        Returns the complete `URL` of a request, used to address it in the cache.
+        '''
+
+        return requests.Request('GET', self.__base_url__ + endpoint, params = params).prepare().url
+
+
+    def _get(self, endpoint: str, params: dict, stream: bool = False):
+        '''
+        Sends a single blocking request through the shared session and returns the body. If `stream`,
+        an iterator over the lines of the body is returned instead, and nothing is kept in memory. When
+        a cache is set, the body is always read at once in order to be stored.
+        '''
+
+        response = self.__session__.get(self.__base_url__ + endpoint, params = params, timeout = self.__timeout__,
+                                        stream = stream and self.__cache__ is None)
+        response.raise_for_status()
+
+        if self.__cache__ is not None:
+            self.__cache__.put(self._full_url(endpoint, params), response.content)
+            return response.content.splitlines() if stream else response.content
+
+        return response.iter_lines() if stream else response.content
+
+
+    def _parse_calendar(self, content: bytes, year: str) -> np.ndarray:
+        '''
+        Given the `JSON` body of a calendar request, returns the dates which represent a snapshot.
+
+        Parameters
+        ---
+        content : bytes
+            Body of the response. Each item starts with the day encoded as `MMDD`;
+
+        year : str
+            The year the calendar refers to.
+
+        Output
+        ---
+        A `np.array` containing the dates of the snapshots for the year.
+        '''
+
+        items = json.loads(content).get('items', [])
+        dates = [date(int(year), *divmod(int(item[0]), 100)) for item in items]
+
+        return np.array(sorted(dates))
+
+
+    def _parse_index(self, lines) -> np.ndarray:
+        '''
+        Given the lines of a `CDX` response, returns the sorted dates which represent a snapshot. Both the
+        plain text and the `JSON` output of the index are accepted, with any number of timestamps per line,
+        since only the leading `YYYYMMDD` digits of each timestamp are looked at.
+
+        Parameters
+        ---
+        lines : iterable
+            Lines of the body, as `bytes` or `str`.
+
+        Output
+        ---
+        A sorted `np.array` of type `datetime64[D]`, without duplicates.
+        '''
+
+        days = set()
+
+        for line in lines:
+
+            # Every run of at least 8 digits is a timestamp. The header, if any, has no digits.
+            line = line.decode() if isinstance(line, bytes) else line
+            days.update(re.findall(r'(?<!\d)(\d{8})\d*', line))
+
+        days = np.array([f"{day[:4]}-{day[4:6]}-{day[6:]}" for day in days], dtype = 'datetime64[D]')
+
+        return np.sort(days)
@@ -0,0 +1,195 @@
+import os
+import re
+import glob
+import json
+import time
+import pickle
+import threading
+
+from datetime import date
+
+
+class ScrapeJournal():
+
+    def __init__(self, path: str = 'url_html/journal.jsonl'):
+        '''
+        Builds a `ScrapeJournal` object. It keeps an append-only log of the `URL`'s already scraped together
+        with their results, so that an interrupted scraping can be restarted without doing the same work twice.
+        Each line of the file is a batch, written at once: a batch is either entirely in the log or not at all.
+
+        Parameters
+        ---
+        path : str, default = 'url_html/journal.jsonl'
+            Location of the log. Missing folders are created.
+        '''
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok = True)
+
+        self.__path__    = path
+        self.__results__ = {}       # Key = URL : Value = (closest date, commit time)
+        self.__lock__    = threading.Lock()     # Several scrapers may commit to the same journal.
+        self.__load__()
+
+
+    def __load__(self) -> None:
+
+        if not os.path.exists(self.__path__):
+            return
+
+        valid_bytes = 0
+
+        with open(self.__path__, 'rb') as file:
+
+            for line in file:
+
+                # A crash while writing can only leave a broken last line: stop there.
+                if not line.endswith(b'\n'):
+                    break
+
+                try:
+                    batch        = json.loads(line)
+                    results      = dict(batch['results'])
+                    committed_at = float(batch['committed_at'])
+                except (ValueError, KeyError, TypeError):
+                    break
+
+                # Entries without a valid date (written by older versions) are left out: the URL is scraped again.
+                for url, closest in results.items():
+                    closest = self.__iso__(closest)
+                    if closest is not None:
+                        self.__results__[url] = (date.fromisoformat(closest), committed_at)
+
+                valid_bytes += len(line)
+
+        # Drop the broken tail, so that the next batch starts on a clean line.
+        if valid_bytes < os.path.getsize(self.__path__):
+            os.truncate(self.__path__, valid_bytes)
+
+
+    def __iso__(self, closest) -> str:
+        '''
+        Returns the date `closest` (a `date`, `datetime`, `np.datetime64`, `pd.Timestamp` or `str`) as 'YYYY-MM-DD',
+        or `None` if it is missing (`None`, `NaT`, `NaN`) or not a date.
+        '''
+
+        try:
+            return date.fromisoformat(str(closest)[:10]).isoformat()
+        except ValueError:
+            return None
+
+
+    def get_path(self) -> str:
+
+        return self.__path__
+
+
+    def is_done(self, url: str) -> bool:
+
+        return url in self.__results__
+
+
+    def pending(self, url: list) -> list:
+        '''
+        Returns the `URL`'s of `url` that are not in the log yet, in the same order.
+        '''
+
+        return [i_url for i_url in url if i_url not in self.__results__]
+
+
+    def get_results(self) -> dict:
+        '''
+        Returns the closest snapshot date of every `URL` in the log.
+
+        Output
+        ---
+        >>> {URL_0 : closest_date_0,
+        >>>  URL_1 : closest_date_1,
+        >>>  ...
+        >>> }
+        '''
+
+        return {url: closest for url, (closest, _) in self.__results__.items()}
+
+
+    def get_commit_times(self) -> dict:
+        '''
+        Returns the `UNIX` time at which each `URL` was written to the log.
+        '''
+
+        return {url: committed_at for url, (_, committed_at) in self.__results__.items()}
+
+
+    def import_shards(self, pattern: str = 'url_html/url_html*.pkl') -> int:
+        '''
+        Commits the results stored by the older versions of `Scraper.scrape`, one pickle file per batch.
+        Each file becomes a batch of the journal, dated with the last modification of the file.
+
+        Parameters
+        ---
+        pattern : str, default = 'url_html/url_html*.pkl'
+            Pattern matching the pickle files.
+
+        Output
+        ---
+        The number of `URL`'s actually written.
+        '''
+
+        # Sort numerically, so that url_html100.pkl comes after url_html50.pkl.
+        shards = sorted(glob.glob(pattern), key = lambda path: [int(n) for n in re.findall(r'\d+', os.path.basename(path))])
+        count  = 0
+
+        for shard in shards:
+
+            with open(shard, 'rb') as file:
+                batch = pickle.load(file)
+
+            count += self.commit(batch, committed_at = os.path.getmtime(shard))
+
+        return count
+
+
+    def commit(self, batch: dict, committed_at: float = None) -> int:
+        '''
+        Appends a batch of results to the log and forces it to the disk. `URL`'s already in the log are left out,
+        as well as the ones without a date (`None`, `NaT`): they are not done, and will be scraped again.
+
+        Parameters
+        ---
+        batch : dict
+            A `dict` containing, for each `URL`, the closest date for which a snapshot is available;
+
+        committed_at : float, default = None
+            `UNIX` time to record for the batch. If `None`, the current time.
+
+        Output
+        ---
+        The number of `URL`'s actually written.
+        '''
+
+        with self.__lock__:
+
+            batch = {url: self.__iso__(closest) for url, closest in batch.items() if url not in self.__results__}
+            batch = {url: closest for url, closest in batch.items() if closest is not None}
+            if len(batch) == 0:
+                return 0
+
+            committed_at = time.time() if committed_at is None else committed_at
+            line = json.dumps({'committed_at': committed_at, 'results': batch}) + '\n'
+
+            # The whole line, flushed before returning. A short write is completed by the next ones; if the process
+            # dies in between, the broken line is dropped by the next `__load__`.
+            data = line.encode()
+            fd   = os.open(self.__path__, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                written = 0
+                while written < len(data):
+                    written += os.write(fd, data[written:])
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+
+            for url, closest in batch.items():
+                self.__results__[url] = (date.fromisoformat(closest), committed_at)
+
+        return len(batch)
@@ -0,0 +1,224 @@
+import operator
+import numpy as np
+import pandas as pd
+
+from sklearn.decomposition import PCA
+from preprocessing.encoder import CategoryEncoder
+
+#\-- THE STEPS OF PrunedCV.preprocess, AS DATA --/#
+
+# Rows of the training data that are kept: (column, transform, comparison, threshold). 'shares' is the target.
+ROW_FILTERS = [('shares',                     None,     operator.lt, 12000),
+               ('n_tokens_content',           None,     operator.ne, 0),
+               ('num_hrefs',                  np.log1p, operator.lt, 4),
+               ('num_self_hrefs',             np.log1p, operator.lt, 3),
+               ('self_reference_avg_sharess', None,     operator.lt, 50000)]
+
+# Missing values are filled with the mean of the training rows kept by the filter on the target.
+FILL_MEAN = ['num_imgs', 'num_videos', 'num_keywords']
+
+DROP = ['kw_max_min', 'kw_max_avg', 'kw_min_min', 'url', 'timedelta', 'n_non_stop_words', 'n_tokens_content',
+        'n_non_stop_unique_tokens', 'self_reference_max_shares', 'self_reference_min_shares', 'rate_positive_words',
+        'rate_negative_words', 'max_positive_polarity', 'min_positive_polarity', 'min_negative_polarity',
+        'max_negative_polarity', 'abs_title_subjectivity', 'abs_title_sentiment_polarity', 'kw_min_max', 'kw_max_max',
+        'kw_min_avg']
+
+# Columns replaced by log1p(column + offset): (column, offset).
+LOG1P = [('num_hrefs', 0), ('num_self_hrefs', 0), ('num_imgs', 0), ('num_videos', 0), ('kw_avg_min', 1),
+         ('kw_avg_avg', 0), ('self_reference_avg_sharess', 0)]
+
+WEEKDAYS = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday']
+
+# Buckets of log1p(kw_avg_max), the first matching condition wins: (label, lower bound, upper bound), both open,
+# None if there is none.
+KW_AVG_MAX = [('kw_avg_max_none', None, 2), ('kw_avg_max_medium', 0, 11), ('kw_avg_max_high', 11, None)]
+
+# Intervals closed on the right, as `pd.cut`: column : (bins, labels).
+CUTS = {'title_sentiment_polarity' : ([-1.00001, -0.5, -0.000000001, +0.000000001, 0.5, 1],
+                                      ['high_negative_polarity', 'low_negative_polarity', 'neutral_polarity',
+                                       'low_positive_polarity', 'high_positive_polarity']),
+        'title_subjectivity'       : ([-0.000001, 0.000001, 0.334, 0.667, 1],
+                                      ['no_subjectivity', 'low_subjectivity', 'medium_subjectvity', 'high_subjectivity'])}
+
+# Columns one-hot encoded, in the order their indicators are appended after the other columns.
+ONE_HOT = ['data_channel', 'weekday', 'kw_avg_max', 'title_subjectivity', 'title_sentiment_polarity']
+
+
+class PreprocessPlan():
+
+    def __init__(self, n_components: float = 0.90):
+        '''
+        Builds a `PreprocessPlan` object. It runs the same transform as `PrunedCV.preprocess`, described by the
+        constants of this module instead of a sequence of `pd.DataFrame` operations: each filter is evaluated once
+        and all of them are combined into a single selection of the rows, the categorical columns are reduced to
+        integer codes, and the output matrix is written column by column into a single preallocated array. The
+        input is never modified or copied as a whole.
+
+        The output is the same as `PrunedCV.preprocess`, bit for bit.
+
+        Parameters
+        ---
+        n_components : float, default = 0.90
+            Passed to the `PCA`.
+        '''
+
+        self.__n_components__ = n_components
+
+
+    def row_mask(self, X: pd.DataFrame, y: pd.Series) -> tuple:
+        '''
+        Returns the mask of the rows kept by the filter on the target, and the mask of the rows kept by all the
+        filters of `ROW_FILTERS`. `y` must be aligned with `X`.
+        '''
+
+        target = np.ones(len(X), dtype = bool)
+        mask   = np.ones(len(X), dtype = bool)
+
+        for column, transform, compare, threshold in ROW_FILTERS:
+
+            values = np.asarray(y) if column == 'shares' else X[column].to_numpy()
+            values = transform(values) if transform is not None else values
+            keep   = compare(values, threshold)
+
+            mask &= keep
+            if column == 'shares':
+                target &= keep
+
+        return target, mask
+
+
+    def __codes__(self, X: pd.DataFrame, column: str, rows: np.ndarray, encoder: CategoryEncoder) -> np.ndarray:
+        '''
+        Returns, for each row of `rows`, the position of its category in the vocabulary of `encoder` (-1 if none).
+        The bins and the weekday are computed as integers and never go through strings.
+        '''
+
+        if column in CUTS:
+
+            # Same rule as pd.cut: (bins[i - 1], bins[i]], anything else (NaN included) has no category.
+            bins, labels = CUTS[column]
+            ids   = np.searchsorted(bins, X[column].to_numpy(dtype = np.float64)[rows], side = 'left')
+            codes = np.where((ids > 0) & (ids < len(bins)), ids - 1, len(labels))
+
+        elif column == 'kw_avg_max':
+
+            log_values = np.log1p(X[column].to_numpy(dtype = np.float64)[rows])
+            labels     = [label for label, _, _ in KW_AVG_MAX]
+            codes      = np.full(len(rows), len(labels))
+
+            # From the last bucket to the first, so that the first matching one is written last.
+            for position in reversed(range(len(KW_AVG_MAX))):
+                _, lower, upper = KW_AVG_MAX[position]
+                inside = np.ones(len(rows), dtype = bool)
+                inside = inside & (log_values > lower) if lower is not None else inside
+                inside = inside & (log_values < upper) if upper is not None else inside
+                codes[inside] = position
+
+        elif column == 'weekday':
+
+            labels = ['Not Weekend', 'Weekend']
+            codes  = (~X[column].isin(WEEKDAYS).to_numpy()[rows]).astype(int)
+
+        else:
+
+            return encoder.codes(column, X[column].to_numpy(dtype = object)[rows])
+
+        # From the position among `labels` (len(labels) if none) to the position in the vocabulary.
+        lookup = np.append(encoder.codes(column, labels), -1)
+
+        return lookup[codes]
+
+
+    def execute(self, X: pd.DataFrame, y: pd.Series, p: PCA = None, train: bool = True, means: dict = {}) -> tuple:
+        '''
+        Same as `PrunedCV.preprocess`.
+
+        Parameters
+        ---
+        X : pd.DataFrame
+            Data, with the columns of the development set but 'shares';
+
+        y : pd.Series
+            Target, aligned with `X`;
+
+        p : PCA, default = None
+            With `train = False`, the `PCA` fitted on the training data;
+
+        train : bool, default = True
+            If `True`, the rows are filtered, the means and the `PCA` are fitted. Otherwise `means` and `p` are used;
+
+        means : dict, default = {}
+            With `train = False`, the values used to fill the missing values.
+
+        Output
+        ---
+        The transformed data, the log of the target, the means used to fill the missing values and the `PCA`.
+        '''
+
+        if train:
+            target, mask = self.row_mask(X, y)
+            rows         = np.flatnonzero(mask)
+        else:
+            rows         = np.arange(len(X))
+
+        # Fill the missing values.
+        filled     = {}
+        dict_means = {}
+        for column in FILL_MEAN:
+
+            values  = X[column].to_numpy(dtype = np.float64)
+            missing = np.isnan(values)
+
+            if train:
+                fill               = pd.Series(values[target]).mean()
+                values             = np.where(missing, fill, values)
+                dict_means[column] = pd.Series(values[target]).mean()
+            elif column in means:
+                values             = np.where(missing, means[column], values)
+
+            filled[column] = values
+
+        # Layout of the output: the columns left, then the indicators of each categorical column.
+        excluded = set(DROP) | set(ONE_HOT) | {'shares'}
+        columns  = [column for column in X.columns if column not in excluded]
+        encoder  = CategoryEncoder(ONE_HOT).fit(X)
+        blocks   = [(encoder.get_vocabulary(column), self.__codes__(X, column, rows, encoder)) for column in ONE_HOT]
+
+        layout = [(column, None, None) for column in columns] + \
+                 [(name, codes, code) for names, codes in blocks for code, name in enumerate(names)]
+
+        # With a fitted PCA the layout is the one it was fitted on: missing columns are zeros.
+        if not train:
+            by_name = {name: (name, codes, code) for name, codes, code in layout}
+            layout  = [by_name.get(name, (name, 'zeros', None)) for name in p.feature_names_in_]
+
+        # Column-major, as the matrix pandas hands to the PCA: each column is written contiguously.
+        buffer = np.empty((len(rows), len(layout)), dtype = np.float64, order = 'F')
+        log1p  = dict(LOG1P)
+
+        for position, (name, codes, code) in enumerate(layout):
+
+            if isinstance(codes, str):
+                buffer[:, position] = 0.0
+            elif codes is not None:
+                np.equal(codes, code, out = buffer[:, position], casting = 'unsafe')
+            else:
+                values = filled[name] if name in filled else X[name].to_numpy()
+                values = values[rows] if len(rows) < len(values) else values
+
+                if name in log1p:
+                    np.log1p(values + log1p[name] if log1p[name] else values, out = buffer[:, position])
+                else:
+                    buffer[:, position] = values
+
+        frame = pd.DataFrame(buffer, columns = [name for name, _, _ in layout], copy = False)
+
+        if train:
+            p = PCA(n_components = self.__n_components__)
+            X_processed = p.fit_transform(frame)
+        else:
+            X_processed = p.transform(frame)
+
+        y_processed = pd.Series(np.log(y.to_numpy()[rows]), index = y.index[rows], name = y.name)
+
+        return X_processed, y_processed, dict_means, p
@@ -1,3 +1,10 @@
+import os
+import math
+import numbers
+import json
+import time
+import hashlib
+import tracemalloc
 import numpy as np
 import importlib
 from sklearn import metrics
@@ -6,11 +13,35 @@ import pandas as pd
 
 from sklearn.decomposition import PCA
 from sklearn.model_selection import KFold, StratifiedKFold, ParameterGrid
+from joblib import Parallel, delayed, effective_n_jobs
+
+from Results import ResultStore
+from Scoring import as_metric, score_predictions
+from Search import TPESampler
+from Plan import PreprocessPlan
+from preprocessing.encoder import CategoryEncoder
+
+# Parameters along which a model with `warm_start` can reuse the previous fit, the order of the path (1 = increasing
+# values, -1 = decreasing values), the module where the parameter means that and the models allowed (None = all of
+# the module). E.g. a neural network or SGD with warm_start runs max_iter more epochs, while the ensembles grow up to
+# max_iter; along alpha or C only the solvers that converge to a tolerance give (almost) the fit from scratch.
+WARM_PATHS = [('n_estimators', 1, '',                     None),
+              ('max_iter',     1, 'sklearn.ensemble',     None),
+              ('alpha',       -1, 'sklearn.linear_model', ['Lasso', 'ElasticNet', 'MultiTaskLasso', 'MultiTaskElasticNet']),
+              ('C',            1, 'sklearn.linear_model', ['LogisticRegression'])]
+
+# Budget under which the cells of a path are stored: warm-started along alpha or C they only approximate the fits
+# from scratch, so the two never share a cell of the `ResultStore`.
+WARM_BUDGET = 'warm_start'
+
+# Arrays of a preprocessed fold, as cached on disk by `__prepare_folds__`.
+FOLD_ARRAYS = ['X_train', 'y_train', 'X_valid', 'y_valid']
 
 
 class PrunedCV:
 
-    def __init__(self, X_train: pd.DataFrame, y_train: pd.DataFrame, folds: KFold | StratifiedKFold):
+    def __init__(self, X_train: pd.DataFrame, y_train: pd.DataFrame, folds: KFold | StratifiedKFold,
+                 dtype: type = np.float64, fold_views: bool = False):
         '''
         Initialize a new instance of the class. It creates a PrunedCV object that can be used to perform either model selection
         and model validation.
@@ -26,6 +57,16 @@ class PrunedCV:
         
         folds : KFold | StratifiedKFold
             Already built cross-validator object.
+
+        dtype : type, default = np.float64
+            Type of the array the data are converted to, e.g. `np.float32` to halve the memory.
+
+        fold_views : bool, default = False
+            If `True` and all the columns are numeric, the data are converted once to a contiguous array, and the
+            folds are gathered from it into buffers allocated once, instead of building new `pd.DataFrame`'s for
+            every configuration and fold. The models then get plain arrays, without the names of the features,
+            and the buffers are overwritten by the next fold: only for models that do not keep a reference to the
+            training data after `fit`.
         '''
 
         self.__folds__   = folds
@@ -34,6 +75,29 @@ class PrunedCV:
         self.__columns__ = list(X_train.columns)
         # self.__columns__.append('shares')
 
+        self.__fold_indices__ = None    # Computed once, the first time they are needed.
+        self.__buffers__      = {}      # Key = (name, length) : Value = preallocated array
+        self.__dtype__        = dtype
+        self.__fold_views__   = fold_views
+        self.__X_array__      = None
+        self.__y_array__      = None
+        self.__fold_keys__    = []      # Key of the preprocessed data of each fold, see `__prepare_folds__`.
+        self.__fold_data__    = {}      # Key = fold key : Value = (X_train, y_train, X_valid, y_valid)
+        self.__data_digest__  = None    # Hash of the data, computed once.
+        self.__sweep_digest__ = None    # Fingerprint of the sweep, see `__fingerprint__`.
+
+        numeric = all(pd.api.types.is_numeric_dtype(dtype_col) for dtype_col in X_train.dtypes)
+        if fold_views and numeric:
+            self.__X_array__ = np.ascontiguousarray(X_train.to_numpy(dtype = dtype))
+            self.__y_array__ = np.ascontiguousarray(np.asarray(y_train, dtype = dtype))
+
+        self.set_scheduler()
+        self.set_preprocessing(enabled = False)
+        self.set_warm_start(enabled = False)
+        self.set_store()
+        self.set_instrumentation()
+        self.set_time_budget()
+
     def set_params(self, param_grid: dict, scores: list) -> None:
         '''
         Pass the hyperparameters to tune and the scores used to choose the best ones. Notice that also a `sklearn` model is
@@ -45,7 +109,9 @@ class PrunedCV:
             Dictionary containing the model(s) and the hyperparameters.
 
         scores : list
-            List containing all the scores we want to use to evalute the models.
+            List containing all the scores we want to use to evalute the models. Each one can be a `Metric`, the name
+            of a built-in one ('rmse', 'mae', 'rmsle', 'r2', see `Scoring.METRICS`) or a `sklearn.metrics` method, whose
+            square root is taken.
         
         Examples
         ---
@@ -64,7 +130,7 @@ class PrunedCV:
         '''
 
         self.__param_grid__ = param_grid
-        self.__scores__     = scores
+        self.__scores__     = [as_metric(score) for score in scores]
 
     def set_evaluation(self, score: metrics = metrics.accuracy_score, 
                        thresh_skip: int = 0, thresh_percentage: float = 0.0) -> None:
@@ -75,7 +141,8 @@ class PrunedCV:
         Parameters
         ---
         score : list, default = [accuracy_score]
-            List of scores used to evaluate the goodness of a model. They have to be `sklearn.metrcis` methods.
+            List of scores used to evaluate the goodness of a model. They have to be `sklearn.metrcis` methods, or
+            anything accepted by `set_params`. The lower the score, the better the model.
          
         thresh_skip : int, default = 0
             How many times the actual model should be below the percentage of the maximal value in order to early stop the
@@ -86,12 +153,452 @@ class PrunedCV:
             model. It can greatly lower the computational cost, but if too small it can also skip potentially good models.            
         '''
 
+        metric = as_metric(score)
+        if metric.greater_is_better:
+            raise ValueError(f"The pruning needs a score where lower is better, '{metric.name}' is not.")
+
         self.__thresh_skip__       = thresh_skip
         self.__thresh_percentage__ = thresh_percentage
-        self.__score__             = score.__name__
+        self.__score__             = metric.name
+
+
+    def set_time_budget(self, config_budget: float = None, total_budget: float = None) -> None:
+        '''
+        Prunes the configurations by time as well as by score. Before each fold, the time of the folds already done
+        (fit + predict) is projected on all the folds: a configuration is skipped if the projection exceeds
+        `config_budget`, or if it would end after `total_budget`. Once `total_budget` is over, the configurations
+        left are skipped without being fitted. The reason of each skip is in the 'skip_reason' of its performance.
+
+        With the 'halving' scheduler (see `set_scheduler`) the checks run between the rounds: a configuration is not
+        promoted if the time of its last round, scaled up to all the samples, projected on all the folds exceeds
+        `config_budget`, and no round starts after `total_budget`.
+
+        Parameters
+        ---
+        config_budget : float, default = None
+            Maximum number of seconds for a configuration over all the folds. If `None`, no limit;
+
+        total_budget : float, default = None
+            Maximum number of seconds for the whole `do_cross_validation`, counted from its start. If `None`, no limit.
+        '''
+
+        self.__config_budget__ = config_budget
+        self.__total_budget__  = total_budget
+        self.__deadline__      = None
+
+
+    def __over_budget__(self, spent: float, done: int) -> str:
+        '''
+        Returns why a configuration that took `spent` seconds for its first `done` folds must stop (see
+        `set_time_budget`): 'time' if it exceeds its own budget, 'total_time' if it exceeds the one of the sweep,
+        `None` if it can go on.
+        '''
+
+        n_splits = len(self.__get_folds__())
+
+        if self.__deadline__ is not None and time.time() >= self.__deadline__:
+            return 'total_time'
+
+        if done == 0:
+            return None
+
+        pace = spent / done
+
+        if self.__config_budget__ is not None and pace * n_splits > self.__config_budget__:
+            return 'time'
+
+        if self.__deadline__ is not None and time.time() + pace * (n_splits - done) > self.__deadline__:
+            return 'total_time'
+
+        return None
+
+
+    def __cost__(self, results: dict) -> float:
+        '''
+        Returns the seconds spent to fit and score a fold, from its `timing` entry. A fold read from the store
+        (`cached`) costs nothing.
+        '''
+
+        timing = results.get('timing') or {}
+
+        if timing.get('cached', False):
+            return 0.0
+
+        return timing.get('fit_time', 0.0) + timing.get('predict_time', 0.0)
+
+
+    def set_scheduler(self, scheduler: str = 'pruning', eta: int = 3, min_folds: int = 1, min_fraction: float = 1.0,
+                      random_state: int = None, n_trials: int = 50, max_fits: int = None, time_budget: float = None,
+                      n_startup: int = 10) -> None:
+        '''
+        Choose how the budget of fits is spent among the configurations of each model.
+
+        Parameters
+        ---
+        scheduler : str, default = 'pruning'
+            * 'pruning' = every configuration goes through the folds, and is early stopped according to `thresh_skip`
+              and `thresh_percentage` (see `set_evaluation`);
+            * 'halving' = successive halving. All the configurations start with a small budget (few folds, trained on
+              a fraction of the samples), then only the best `1 / eta` of them are promoted to a budget `eta` times
+              larger, until the survivors are evaluated on all the folds with all the samples.
+            * 'tpe' = adaptive search. The grid of each model may contain `scipy.stats` distributions besides lists
+              (see `Search.TPESampler`). Configurations are proposed one batch of `n_jobs` at a time, each batch
+              according to the results of the previous ones, and go through the folds as with 'pruning'. The
+              search of a model stops after `n_trials` configurations, `max_fits` fits or `time_budget` seconds.
+
+        eta : int, default = 3
+            Reduction factor between two rounds of successive halving;
+
+        min_folds : int, default = 1
+            Number of folds used in the first rounds;
+
+        min_fraction : float, default = 1.0
+            Fraction of the training samples of each fold used in the first round. It grows by `eta` every round until
+            all the samples are used, and only then the number of folds starts growing;
+
+        random_state : int, default = None
+            Seed used to pick the subsamples, and to propose the configurations with 'tpe';
+
+        n_trials : int, default = 50
+            Maximum number of configurations of each model evaluated with 'tpe';
+
+        max_fits : int, default = None
+            Maximum number of fits (one per configuration and fold) of each model with 'tpe'. Pruned configurations
+            use less of it. If `None`, no limit;
+
+        time_budget : float, default = None
+            Maximum number of seconds spent on each model with 'tpe'. The batch running when it expires is completed.
+            If `None`, no limit;
+
+        n_startup : int, default = 10
+            Number of configurations drawn at random with 'tpe', before the search becomes adaptive.
+        '''
+
+        if scheduler not in ['pruning', 'halving', 'tpe']:
+            raise ValueError(f"Unknown scheduler '{scheduler}', choose among 'pruning', 'halving' and 'tpe'.")
+
+        self.__scheduler__    = scheduler
+        self.__eta__          = eta
+        self.__min_folds__    = min_folds
+        self.__min_fraction__ = min_fraction
+        self.__random_state__ = random_state
+        self.__n_trials__     = n_trials
+        self.__max_fits__     = max_fits
+        self.__time_budget__  = time_budget
+        self.__n_startup__    = n_startup
+
+
+    def set_preprocessing(self, enabled: bool = True, n_components: float = 0.90, cache_dir: str = None,
+                          fused: bool = True) -> None:
+        '''
+        Applies `preprocess` inside the cross-validation: it is fitted on the training part of each fold (the PCA
+        included) and then applied to its validation part. Since the result does not depend on the model, each fold
+        is preprocessed once, and the same matrices are reused by every model and configuration.
+
+        Parameters
+        ---
+        enabled : bool, default = True
+            If `False`, the folds are taken from the data as they are;
+
+        n_components : float, default = 0.90
+            Passed to the `PCA` of `preprocess`;
+
+        cache_dir : str, default = None
+            If given, the preprocessed folds are also saved to this folder, one `.npy` file per array of each fold, and
+            loaded from there memory-mapped, by this run and by later ones. The name of each file is a hash of the
+            data, of the fold and of the parameters above, so that a stale file is never used;
+
+        fused : bool, default = True
+            If `True`, the folds are preprocessed by a `PreprocessPlan`, which gives the same matrices as `preprocess`
+            without copying the data at each step. It does not change the results, hence neither the cached folds
+            nor the stored scores.
+        '''
+
+        if cache_dir is not None:
+            os.makedirs(cache_dir, exist_ok = True)
+
+        self.__preprocessing__ = {'enabled' : enabled, 'n_components' : n_components}
+        self.__cache_dir__     = cache_dir
+        self.__fused__         = fused
+        self.__fold_keys__     = []
+
+
+    def set_store(self, store: ResultStore = None) -> None:
+        '''
+        Pass a `ResultStore`. The scores of each fold are written there as soon as they are computed, and the
+        ones already stored for the same data, folds and preprocessing are read instead of being computed again.
+        Hence an interrupted sweep restarts where it stopped, and a widened grid only evaluates the new part.
+        Since the scores are the same, so are the pruning decisions.
+
+        Parameters
+        ---
+        store : ResultStore, default = None
+            The store to use. If `None`, nothing is kept after `do_cross_validation` returns.
+        '''
+
+        self.__store__ = store
+
+
+    def set_instrumentation(self, memory: bool = False) -> None:
+        '''
+        Every fit records, next to its scores, a `timing` entry with the fit and predict time (seconds), the size of
+        the training matrix (rows, columns, bytes), when it started and on which process. See `get_timings` and
+        `export_trace`.
+
+        Parameters
+        ---
+        memory : bool, default = False
+            If `True`, also the peak memory allocated by fit and predict is recorded (bytes), with `tracemalloc`.
+            Tracing the allocations slows down the fits, so it is off by default.
+        '''
+
+        self.__trace_memory__ = memory
+
+
+    def __start_measure__(self) -> tuple:
+        '''
+        Returns the wall time and the traced memory before a fit, see `__timing__`.
+        '''
+
+        if not self.__trace_memory__:
+            return time.time(), None
+
+        # Started on each process the first time, since the workers do not inherit it.
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+
+        return time.time(), tracemalloc.get_traced_memory()[0]
+
+
+    def __timing__(self, start: tuple, fit_time: float, predict_time: float, X_train) -> dict:
+        '''
+        Returns the `timing` entry of a fit started at `start` (see `__start_measure__`).
+        '''
+
+        nbytes = X_train.memory_usage(index = False).sum() if isinstance(X_train, pd.DataFrame) else X_train.nbytes
+        peak   = tracemalloc.get_traced_memory()[1] - start[1] if start[1] is not None else None
+
+        return {'start' : start[0], 'fit_time' : fit_time, 'predict_time' : predict_time, 'peak_memory' : peak,
+                'rows'  : X_train.shape[0], 'columns' : X_train.shape[1], 'nbytes' : int(nbytes),
+                'pid'   : os.getpid(), 'cached' : False}
+
+
+    def __data_hash__(self) -> str:
+        '''
+        Returns a hash of `X_train` and `y_train`, computed only the first time.
+        '''
+
+        if self.__data_digest__ is None:
+            self.__data_digest__ = hashlib.sha256(pd.util.hash_pandas_object(self.__X_train__).to_numpy().tobytes() +
+                                                  pd.util.hash_pandas_object(self.__y_train__).to_numpy().tobytes()).hexdigest()
+
+        return self.__data_digest__
+
+
+    def __fingerprint__(self) -> str:
+        '''
+        Returns the fingerprint of the sweep, a hash of the data, of the folds, of the type of the data and of the
+        preprocessing. Two sweeps with the same fingerprint produce the same score for the same cell.
+        '''
+
+        digest = hashlib.sha256()
+        digest.update(self.__data_hash__().encode())
+        digest.update(np.dtype(self.__dtype__).str.encode())
+        digest.update(json.dumps(self.__preprocessing__, sort_keys = True).encode())
 
+        for train_indices, valid_indices in self.__get_folds__():
+            digest.update(np.ascontiguousarray(train_indices, dtype = np.int64).tobytes())
+            digest.update(np.ascontiguousarray(valid_indices, dtype = np.int64).tobytes())
 
-    def preprocess(self, X, y, p = PCA, train = True, means: dict = {}):
+        return digest.hexdigest()
+
+
+    def __lookup__(self, model: type, config: dict, fold: int, budget: str = '') -> tuple:
+        '''
+        Returns the `(scores, weight)` of a cell from the store, or `None` if there is no store or the cell (with
+        all the scores of `set_params`) is not there.
+        '''
+
+        if self.__store__ is None:
+            return None
+
+        cell = self.__store__.get(self.__sweep_digest__, f"{model.__module__}.{model.__qualname__}", config, fold, budget)
+        names = [metric.name for metric in self.__scores__]
+
+        if cell is None or not all(name in cell[0] for name in names):
+            return None
+
+        results = {name: cell[0][name] for name in names}
+
+        # The timing of the run that computed the cell, with the fold of the cell's key.
+        if cell[0].get('timing') is not None:
+            results['timing'] = {**cell[0]['timing'], 'fold' : fold, 'cached' : True}
+
+        return results, cell[1]
+
+
+    def __record__(self, model: type, config: dict, fold: int, results: dict, weight: int, budget: str = '') -> None:
+        '''
+        Writes the scores of a cell to the store, if any.
+        '''
+
+        if self.__store__ is not None:
+            self.__store__.put(self.__sweep_digest__, f"{model.__module__}.{model.__qualname__}", config, fold, results, weight, budget)
+
+
+    def set_warm_start(self, enabled: bool = True) -> None:
+        '''
+        Evaluates the configurations that only differ in a parameter of `WARM_PATHS` as a single path, if the model
+        supports `warm_start`: on each fold the model is fitted once and then grown along the path (more estimators
+        or iterations, weaker regularization), scoring every value of the parameter on the way. The configurations
+        of a path keep their own scores and are pruned independently, against the best score known when the path
+        starts, as in a batch of `do_cross_validation`. Only used by the 'pruning' scheduler.
+
+        Growing `n_estimators` gives the same models as fitting from scratch. Along `alpha` or `C`, each fit starts
+        from the previous solution, so the result is the same only up to the tolerance of the solver: the cells of
+        a path are stored under their own budget (`WARM_BUDGET`), apart from the ones fitted from scratch. Models
+        whose warm refits run more epochs instead (SGD, neural networks) are always fitted from scratch.
+
+        Parameters
+        ---
+        enabled : bool, default = True
+            If `False`, every configuration is fitted from scratch.
+        '''
+
+        self.__warm_start__ = enabled
+
+
+    def __warm_groups__(self, model: type, configs: list) -> list:
+        '''
+        Groups the configurations that can be evaluated as a single path (see `set_warm_start`).
+
+        Output
+        ---
+        A list of `(positions, parameter)`, where `positions` are the positions in `configs` of the configurations
+        of a path, sorted along the path, and `parameter` the name of the parameter of the path. Configurations
+        that cannot be grouped come alone, with `parameter = None`. The list is sorted by the first position.
+        '''
+
+        singles = [([i], None) for i in range(len(configs))]
+
+        if not self.__warm_start__:
+            return singles
+
+        try:
+            params = model().get_params()
+        except TypeError:
+            return singles
+
+        if 'warm_start' not in params:
+            return singles
+
+        # The first parameter of WARM_PATHS the model accepts and the grid sweeps.
+        for name, order, module, models in WARM_PATHS:
+            values  = {repr(config[name]) for config in configs if name in config}
+            allowed = model.__module__.startswith(module) and (models is None or model.__name__ in models)
+            if name in params and len(values) > 1 and allowed:
+                break
+        else:
+            return singles
+
+        groups = {}
+        for i, config in enumerate(configs):
+
+            # Configurations setting warm_start themselves, or without a numeric value, are left alone.
+            if 'warm_start' in config or not isinstance(config.get(name), numbers.Real) or isinstance(config.get(name), bool):
+                groups[('__single__', i)] = [i]
+                continue
+
+            key = tuple(sorted((param, repr(value)) for param, value in config.items() if param != name))
+            groups.setdefault(key, []).append(i)
+
+        output = []
+        for positions in groups.values():
+            positions = sorted(positions, key = lambda i: order * configs[i][name])
+            output.append((positions, name if len(positions) > 1 else None))
+
+        return sorted(output, key = lambda group: min(group[0]))
+
+
+    def __fold_key__(self, fingerprint: str, fold: int, train_indices: np.ndarray, valid_indices: np.ndarray) -> str:
+        '''
+        Returns the key of the preprocessed data of a fold, a hash of the data, of the fold and of the parameters
+        of the preprocessing.
+        '''
+
+        digest = hashlib.sha256()
+        digest.update(fingerprint.encode())
+        digest.update(json.dumps(self.__preprocessing__, sort_keys = True).encode())
+        digest.update(str(fold).encode())
+        digest.update(np.ascontiguousarray(train_indices, dtype = np.int64).tobytes())
+        digest.update(np.ascontiguousarray(valid_indices, dtype = np.int64).tobytes())
+
+        return digest.hexdigest()
+
+
+    def __prepare_folds__(self) -> None:
+        '''
+        Preprocesses every fold once, see `set_preprocessing`. Folds already in memory or on disk are not
+        preprocessed again.
+        '''
+
+        if not self.__preprocessing__['enabled']:
+            return
+
+        fingerprint        = self.__data_hash__()
+        self.__fold_keys__ = []
+
+        for fold, (train_indices, valid_indices) in enumerate(self.__get_folds__()):
+
+            key = self.__fold_key__(fingerprint, fold, train_indices, valid_indices)
+            self.__fold_keys__.append(key)
+
+            if key in self.__fold_data__:
+                continue
+
+            paths = [os.path.join(self.__cache_dir__, f"fold_{key}_{name}.npy") for name in FOLD_ARRAYS] \
+                    if self.__cache_dir__ is not None else None
+
+            # Memory-mapped: the pages are read when needed, and shared by the workers instead of being copied.
+            if paths is not None and all(os.path.exists(path) for path in paths):
+                self.__fold_data__[key] = tuple(np.load(path, mmap_mode = 'r') for path in paths)
+                continue
+
+            if self.__fused__:
+
+                plan = PreprocessPlan(n_components = self.__preprocessing__['n_components'])
+                X_train, y_train, means, p = plan.execute(self.__X_train__.iloc[train_indices],
+                                                          self.__y_train__.iloc[train_indices])
+                X_valid, y_valid, _, _     = plan.execute(self.__X_train__.iloc[valid_indices],
+                                                          self.__y_train__.iloc[valid_indices],
+                                                          p = p, train = False, means = means)
+
+            else:
+
+                # `preprocess` modifies its input, so it gets copies.
+                X_train, y_train, means, p = self.preprocess(self.__X_train__.iloc[train_indices].copy(),
+                                                             self.__y_train__.iloc[train_indices].copy(),
+                                                             n_components = self.__preprocessing__['n_components'])
+                X_valid, y_valid, _, _     = self.preprocess(self.__X_train__.iloc[valid_indices].copy(),
+                                                             self.__y_train__.iloc[valid_indices].copy(),
+                                                             p = p, train = False, means = means)
+
+            self.__fold_data__[key] = tuple(np.ascontiguousarray(np.asarray(array, dtype = self.__dtype__))
+                                            for array in [X_train, y_train, X_valid, y_valid])
+
+            if paths is not None:
+
+                # Written aside and renamed, so that another process never maps a partial file. Each process has
+                # its own temporary file, in case two of them prepare the same fold.
+                for path, array in zip(paths, self.__fold_data__[key]):
+                    np.save(f"{path}.{os.getpid()}.tmp.npy", array)
+                    os.replace(f"{path}.{os.getpid()}.tmp.npy", path)
+
+                self.__fold_data__[key] = tuple(np.load(path, mmap_mode = 'r') for path in paths)
+
+
+    def preprocess(self, X, y, p = PCA, train = True, means: dict = {}, n_components: float = 0.90):
     
         if train:
             X['shares'] = y
@@ -167,52 +674,24 @@ class PrunedCV:
         y_processed = np.log(y)
         
 
-        one_hot_encoded = pd.get_dummies(X_processed['data_channel'])
-
-        # Concatenate the one-hot encoded columns with the original DataFrame
-        X_processed = pd.concat([X_processed, one_hot_encoded], axis = 1)
-        X_processed  = X_processed.drop('data_channel', axis = 1)
-
-        one_hot_encoded = pd.get_dummies(X_processed['weekday'])
-
-        # Concatenate the one-hot encoded columns with the original DataFrame
-        X_processed = pd.concat([X_processed, one_hot_encoded], axis = 1)
-        X_processed  = X_processed.drop('weekday', axis = 1)
-
-        one_hot_encoded = pd.get_dummies(X_processed['kw_avg_max'])
-
-        # Concatenate the one-hot encoded columns with the original DataFrame
-        X_processed = pd.concat([X_processed, one_hot_encoded], axis = 1)
-        X_processed  = X_processed.drop('kw_avg_max', axis = 1)
-
-        one_hot_encoded = pd.get_dummies(X_processed['title_subjectivity'])
+        # The indicators come from fixed vocabularies: every part of the data gets the same columns, as int8.
+        one_hot_columns = ['data_channel', 'weekday', 'kw_avg_max', 'title_subjectivity', 'title_sentiment_polarity']
+        encoder         = CategoryEncoder(one_hot_columns).fit(X_processed)
+        one_hot_encoded = pd.DataFrame(encoder.transform(X_processed), columns = encoder.get_feature_names(),
+                                       index = X_processed.index)
 
-        # Concatenate the one-hot encoded columns with the original DataFrame
-        X_processed = pd.concat([X_processed, one_hot_encoded], axis = 1)
-        X_processed  = X_processed.drop('title_subjectivity', axis = 1)
-
-        one_hot_encoded = pd.get_dummies(X_processed['title_sentiment_polarity'])
-
-        # Concatenate the one-hot encoded columns with the original DataFrame
-        X_processed = pd.concat([X_processed, one_hot_encoded], axis = 1)
-        X_processed  = X_processed.drop('title_sentiment_polarity', axis = 1)
-
-        categorical_features = ['high_negative_polarity', 'low_negative_polarity', 'neutral_polarity', 'low_positive_polarity', 'high_positive_polarity',
-                                'no_subjectivity', 'low_subjectivity', 'medium_subjectvity', 'high_subjectivity',
-                                'Not Weekend', 'Weekend',
-                                'kw_avg_max_none', 'kw_avg_max_medium', 'kw_avg_max_high']
-        
-        X_processed.loc[:, categorical_features] = X_processed.loc[:, categorical_features].astype(int)
+        X_processed = pd.concat([X_processed.drop(one_hot_columns, axis = 1), one_hot_encoded], axis = 1)
         
         if train:
 
-            p = PCA(n_components = 0.90)
+            p = PCA(n_components = n_components)
             temp = copy.deepcopy(X_processed)
             X_processed = p.fit_transform(temp)
         
         else:
 
-            temp = copy.deepcopy(X_processed)
+            # Same columns as the fitted ones, in the same order (a PCA fitted before the fixed vocabularies may differ).
+            temp = copy.deepcopy(X_processed).reindex(columns = p.feature_names_in_, fill_value = 0)
             X_processed = p.transform(temp)
 
 
@@ -225,16 +704,22 @@ class PrunedCV:
                            model: type, scores: list) -> dict:
         
 
+        start = self.__start_measure__()
+        toc   = time.perf_counter()
+
         model.fit(X_train, y_train)     
 
+        tic   = time.perf_counter()
         y_hat = model.predict(X_test)
-        # Exploit list comprehension to compute each score and store the results into a dictionary where each key is a score.
-        results     = [np.sqrt(score(y_test, y_hat)) for score in scores]
-        dic_results =  {k: v for k, v in zip([score.__name__ for score in scores], results)}
-        
-        return dic_results
+        tac   = time.perf_counter()
+
+        # All the scores in a single pass, see `Scoring.score_predictions`.
+        results           = score_predictions(scores, y_test, y_hat)
+        results['timing'] = self.__timing__(start, tic - toc, tac - tic, X_train)
 
-    def do_cross_validation(self, verbose: int = 0) -> dict:
+        return results
+
+    def do_cross_validation(self, verbose: int = 0, n_jobs: int = 1) -> dict:
         '''
         This method just starts the cross-validation procedure.
 
@@ -247,108 +732,719 @@ class PrunedCV:
             * 2 = new print at every new configuration;
             * 3 = print the configuration;
             * 4 = print any detail about the folds.
+
+        n_jobs : int, default = 1
+            Number of configurations evaluated at the same time, each on its own process. If `-1`, one per CPU.
+            Configurations are processed in batches of `n_jobs`: all the configurations of a batch are pruned
+            against the best score known when the batch starts, and the best score is updated at the end of
+            the batch, in the order of the grid. Hence the results do not depend on which process ends first,
+            and with `n_jobs = 1` they are exactly the ones of the serial procedure. With the 'halving'
+            scheduler, the folds of a round are spread over the processes instead.
         '''
 
         # Initialize best score and models performances.
         best               = 20000
         models_performance = {}
+        n_jobs             = effective_n_jobs(n_jobs)
+
+        # Absolute time, so that it holds on every process.
+        self.__deadline__ = time.time() + self.__total_budget__ if self.__total_budget__ is not None else None
+
+        # Done here, once, so that the workers receive the folds already preprocessed.
+        self.__prepare_folds__()
+        self.__sweep_digest__ = self.__fingerprint__() if self.__store__ is not None else None
+
+        with Parallel(n_jobs = n_jobs) as parallel:
+
+            # Iterate over all models of interest.
+            for model_str in self.__param_grid__.keys():                      
+
+                count_config = 0                                   
+                model_name   = model_str.split('.')[-1] 
+
+                # Used to retrieve the method and not just the string.
+                module = importlib.import_module(".".join(model_str.split('.')[:-1]))     
+                model  = getattr(module, model_name)                                     
+                                                                                        
+                models_performance[model_name] = {}
+                print(f"Model: {model_str}\n") if verbose >= 1 else None
+
+                if self.__scheduler__ == 'tpe':
+
+                    performances, best = self.__tpe_search__(model, self.__param_grid__[model_str], best, parallel, verbose)
+
+                    for performance in performances:
+
+                        models_performance[model_name][model_name + f"_{count_config}"] = performance
+                        count_config += 1
+
+                    print('\n')
+                    continue
+
+                configs = list(ParameterGrid(self.__param_grid__[model_str]))
+
+                if self.__scheduler__ == 'halving':
+
+                    for performance in self.__successive_halving__(model, configs, parallel, verbose):
+
+                        models_performance[model_name][model_name + f"_{count_config}"] = performance
+                        count_config += 1
+
+                    print('\n')
+                    continue
+
+                # For each model, iterate over all possible configuration (or path of configurations), n_jobs at a time.
+                groups       = self.__warm_groups__(model, configs)
+                performances = [None] * len(configs)
+
+                for start in range(0, len(groups), n_jobs):
+
+                    batch = groups[start:start + n_jobs]
+                    jobs  = [(model, [configs[i] for i in positions], parameter, best, verbose) for positions, parameter in batch]
+
+                    if n_jobs == 1:
+                        results = [self.__run_path__(*job) for job in jobs]
+                    else:
+                        results = parallel(delayed(self.__run_path__)(*job) for job in jobs)
+
+                    # Update the best score in the order of the grid.
+                    positions = [i for group, _ in batch for i in group]
+                    for i, performance in sorted(zip(positions, [performance for result in results for performance in result])):
+
+                        performances[i] = performance
 
-        # Iterate over all models of interest.
-        for model_str in self.__param_grid__.keys():                      
+                        # A configuration skipped before its first fold has no score.
+                        if len(performance['weight']) == 0:
+                            continue
 
-            count_config = 0                                   
-            model_name   = model_str.split('.')[-1] 
+                        total_avg_performance = np.average(performance[self.__score__], weights = performance['weight'])
 
-            # Used to retrieve the method and not just the string.
-            module = importlib.import_module(".".join(model_str.split('.')[:-1]))     
-            model  = getattr(module, model_name)                                     
-                                                                                    
-            models_performance[model_name] = {}
-            print(f"Model: {model_str}\n") if verbose >= 1 else None
+                        # If the model has really good performances, it becomes the new best.
+                        best = total_avg_performance if total_avg_performance <= best and self.__thresh_percentage__ != 0.0 else best
+
+                for performance in performances:
+
+                    model_config_name = model_name + f"_{count_config}"
+                    models_performance[model_name][model_config_name] = performance
+                    count_config += 1
+
+                print('\n')
+
+        self.models_perfomance = models_performance
+
+
+    def __run_config__(self, model: type, config: dict, best: float, verbose: int = 0) -> dict:
+        '''
+        Cross-validates a single configuration, pruning it against `best`. It only reads the state of the object,
+        so that it can run on another process.
+
+        Parameters
+        ---
+        model : type
+            Class of the model;
+
+        config : dict
+            Hyperparameters of the model;
+
+        best : float
+            Best average score found so far;
+
+        verbose : int, default = 0
+            Same as in `do_cross_validation`.
+
+        Output
+        ---
+        A `dict` with the scores and the weight of each fold, the configuration, whether it has been skipped and
+        why ('score', 'time' or 'total_time', see `set_time_budget`).
+        '''
+
+        print("\n\tNEW CONFIGURATION")        if verbose >= 2 else None
+        print(f"\nConfiguration: {config}\n") if verbose >= 3 else None
+
+        # Initialize the scores and the weight for each fold. Each list will be updated later.
+        performance = {metric.name: [] for metric in self.__scores__}
+        performance['weight'] = []
+        performance['timing'] = []
+
+        skipped     = False
+        skip_reason = None
+        count_skip  = 0                                                                                     
+        count_fold  = 1
+        spent       = 0.0
+
+        # Start the evaluation of the model using the folds.
+        for fold in range(len(self.__get_folds__())):
             
-            # For each model, iterate over all possible configuration.
-            for config in ParameterGrid(self.__param_grid__[model_str]):                                                                         
-                                                        
-                print("\n\tNEW CONFIGURATION")        if verbose >= 2 else None
-                print(f"\nConfiguration: {config}\n") if verbose >= 3 else None
-
-                model_config_name = model_name + f"_{count_config}"
-
-                # Initialize the scores and the weight for each fold. Each list will be updated later.
-                models_performance[model_name][model_config_name] = {score: [] \
-                                                                     for score in [score.__name__ for score in self.__scores__]}
-                models_performance[model_name][model_config_name]['weight'] = []                                         
-                                
-                skipped    = False
-                count_skip = 0                                                                                     
-                count_fold = 1
-
-                # Start the evaluation of the model using the folds.
-                for train_indices, valid_indices in self.__folds__.split(self.__X_train__, self.__y_train__):
-                    
-                    # If the model has already reached bad performances #thresh_skip times, early terminate the process.
-                    if count_skip == self.__thresh_skip__ and self.__thresh_skip__ != 0.0:
-
-                        skipped = True
-                        break
-
-                    X_train_fold = pd.DataFrame(self.__X_train__.iloc[train_indices], columns = self.__columns__)      
-                    
-                    y_train_fold = self.__y_train__.iloc[train_indices]      
-                    
-                    X_valid_fold = pd.DataFrame(self.__X_train__.iloc[valid_indices], columns = self.__columns__)
-                    
-                    y_valid_fold = self.__y_train__.iloc[valid_indices]
-                    
-
-                    # Train the classifier and evaluate it.                                                      
-                    clf = model(**config)                                           
-                    results = self.__evaluate_model__(X_train_fold, y_train_fold, X_valid_fold, y_valid_fold,
-                                                      clf, self.__scores__)
-                    
-                    # Append the scores to the dictionary.
-                    for score, result in results.items():
-                        
-                        models_performance[model_name][model_config_name][score].append(result)
-
-                    # Store the weight of the score, since different amount of samples per fold may occur.
-                    models_performance[model_name][model_config_name]['weight'].append(len(train_indices))
-                    
-                    # Every new fold, compute the average of the scores.
-                    actual_scores          = models_performance[model_name][model_config_name][self.__score__]
-                    actual_weights         = models_performance[model_name][model_config_name]['weight']
-                    actual_avg_performance = np.average(actual_scores, weights = actual_weights)
-
-                    # If the model has a bad performance, increase the count by 1.
-                    count_skip += 1 if actual_avg_performance > self.__thresh_percentage__ * best else 0
-                                        
-                    if verbose >= 4:
-                        
-                        print(f"Fold {count_fold} / {self.__folds__.get_n_splits()} - Skip: {count_skip} / {self.__thresh_skip__}")
-                        print(f"Results: {results}")
-                        print(f"Highest average {self.__score__}: {np.round(best, 4)}")
-
-                    count_fold += 1
+            # If the model has already reached bad performances #thresh_skip times, early terminate the process.
+            if count_skip == self.__thresh_skip__ and self.__thresh_skip__ != 0.0:
+
+                skipped, skip_reason = True, 'score'
+                break
+
+            # Same if it is too slow.
+            skip_reason = self.__over_budget__(spent, fold)
+            if skip_reason is not None:
+
+                skipped = True
+                print(f"Skipped by time budget ({skip_reason}) after {fold} folds, {spent:.1f} s") if verbose >= 3 else None
+                break
+
+            # Train the classifier and evaluate it.                                                      
+            results, weight = self.__fit_fold__(model, config, fold)
+            
+            # Append the scores to the dictionary.
+            for score, result in results.items():
                 
-                total_scores          = models_performance[model_name][model_config_name][self.__score__]
-                total_weights         = models_performance[model_name][model_config_name]['weight']
-                total_avg_performance = np.average(total_scores, weights = total_weights)
+                performance[score].append(result)
+
+            # Store the weight of the score, since different amount of samples per fold may occur.
+            performance['weight'].append(weight)
+            spent += self.__cost__(results)
+            
+            # Every new fold, compute the average of the scores.
+            actual_avg_performance = np.average(performance[self.__score__], weights = performance['weight'])
+
+            # If the model has a bad performance, increase the count by 1.
+            count_skip += 1 if actual_avg_performance > self.__thresh_percentage__ * best else 0
+                                
+            if verbose >= 4:
                 
+                print(f"Fold {count_fold} / {self.__folds__.get_n_splits()} - Skip: {count_skip} / {self.__thresh_skip__}")
+                print(f"Results: {results}")
+                print(f"Highest average {self.__score__}: {np.round(best, 4)}")
+
+            count_fold += 1
+
+        # Store the parameters in order to be able later to retrieve the best configuration.
+        performance['parameters']  = config
+        performance['skipped']     = skipped
+        performance['skip_reason'] = skip_reason
+
+        return performance
+
+
+    def __run_path__(self, model: type, configs: list, parameter: str, best: float, verbose: int = 0) -> list:
+        '''
+        Cross-validates the configurations of a path (see `set_warm_start`), pruning each of them against `best`.
+        A configuration alone is passed to `__run_config__`.
+
+        Parameters
+        ---
+        configs : list
+            Hyperparameters of the configurations, sorted along the path;
+
+        parameter : str
+            Name of the parameter of the path, `None` if `configs` has a single configuration.
+
+        Output
+        ---
+        A list with the performance of each configuration, in the order of `configs`, structured as the ones of
+        `__run_config__`.
+        '''
+
+        if parameter is None:
+            return [self.__run_config__(model, config, best, verbose) for config in configs]
+
+        print("\n\tNEW PATH")                                          if verbose >= 2 else None
+        print(f"\nPath over '{parameter}': {configs[0]} ... {configs[-1]}\n") if verbose >= 3 else None
+
+        performances = []
+        for _ in configs:
+            performance = {metric.name: [] for metric in self.__scores__}
+            performance['weight'] = []
+            performance['timing'] = []
+            performances.append(performance)
+
+        skipped     = [False] * len(configs)
+        skip_reason = [None] * len(configs)
+        count_skip  = [0] * len(configs)
+        spent       = [0.0] * len(configs)      # Time of the steps of each configuration along the path
+
+        for fold in range(len(self.__get_folds__())):
+
+            # If a configuration has already reached bad performances #thresh_skip times, or is too slow, early
+            # terminate it.
+            for j in range(len(configs)):
+
+                if skipped[j]:
+                    continue
+
+                if count_skip[j] == self.__thresh_skip__ and self.__thresh_skip__ != 0.0:
+                    skipped[j], skip_reason[j] = True, 'score'
+                    continue
+
+                skip_reason[j] = self.__over_budget__(spent[j], fold)
+                skipped[j]     = skip_reason[j] is not None
+
+            alive = [j for j in range(len(configs)) if not skipped[j]]
+            if len(alive) == 0:
+                break
+
+            cells   = {j: self.__lookup__(model, configs[j], fold, WARM_BUDGET) for j in alive}
+            missing = [j for j in alive if cells[j] is None]
+
+            # The path is followed up to the last configuration still missing: the ones before are needed anyway.
+            if len(missing) > 0:
+
+                clf = model(**configs[0])
+                clf.set_params(warm_start = True)
+                X_train, y_train, X_valid, y_valid = self.__fold_arrays__(fold)
+
+                # The fit time of each configuration is the one of its step along the path.
+                predictions = []
+                timings     = []
+                for j in range(missing[-1] + 1):
+
+                    clf.set_params(**{parameter: configs[j][parameter]})
+                    start = self.__start_measure__()
+                    toc   = time.perf_counter()
+                    clf.fit(X_train, y_train)
+                    tic   = time.perf_counter()
+
+                    if j in missing:
+                        predictions.append(clf.predict(X_valid))
+                        timings.append(self.__timing__(start, tic - toc, time.perf_counter() - tic, X_train))
+
+                # The predictions of the whole path are scored at once.
+                scores = score_predictions(self.__scores__, y_valid, np.vstack(predictions))
+
+                for row, j in enumerate(missing):
+
+                    results  = {name: float(values[row]) for name, values in scores.items()}
+                    results['timing'] = {**timings[row], 'fold' : fold}
+                    cells[j] = (results, len(y_train))
+                    self.__record__(model, configs[j], fold, results, len(y_train), WARM_BUDGET)
+
+            for j in alive:
+
+                results, weight = cells[j]
+                for score, result in results.items():
+                    performances[j][score].append(result)
+                performances[j]['weight'].append(weight)
+                spent[j] += self.__cost__(results)
+
+                actual_avg_performance = np.average(performances[j][self.__score__], weights = performances[j]['weight'])
+                count_skip[j] += 1 if actual_avg_performance > self.__thresh_percentage__ * best else 0
+
+                if verbose >= 4:
+
+                    print(f"Fold {fold + 1} / {self.__folds__.get_n_splits()} - {parameter} = {configs[j][parameter]} "
+                          f"- Skip: {count_skip[j]} / {self.__thresh_skip__}")
+                    print(f"Results: {results}")
+
+        for j, config in enumerate(configs):
+
+            performances[j]['parameters']  = config
+            performances[j]['skipped']     = skipped[j]
+            performances[j]['skip_reason'] = skip_reason[j]
+
+        return performances
+
+
+    def __get_folds__(self) -> list:
+        '''
+        Returns the `(train_indices, valid_indices)` of every fold. The split is computed only the first time.
+        '''
+
+        if self.__fold_indices__ is None:
+            self.__fold_indices__ = list(self.__folds__.split(self.__X_train__, self.__y_train__))
+
+        return self.__fold_indices__
+
+
+    def __take__(self, name: str, source: np.ndarray, indices: np.ndarray) -> np.ndarray:
+        '''
+        Gathers the rows `indices` of `source` into a buffer reserved to `name`, allocated only the first time
+        a fold of that shape is met (preprocessed folds can differ in width, e.g. after the PCA).
+        '''
+
+        shape = (len(indices),) + source.shape[1:]
+        key   = (name, shape, source.dtype.str)
+        if key not in self.__buffers__:
+            self.__buffers__[key] = np.empty(shape, dtype = source.dtype)
+
+        return np.take(source, indices, axis = 0, out = self.__buffers__[key])
+
+
+    def __train_size__(self, fold: int) -> int:
+        '''
+        Returns the number of training samples of a fold, after the preprocessing if any.
+        '''
+
+        if self.__preprocessing__['enabled']:
+            return len(self.__fold_data__[self.__fold_keys__[fold]][1])
+
+        return len(self.__get_folds__()[fold][0])
+
+
+    def __fold_arrays__(self, fold: int, rows: np.ndarray = None) -> tuple:
+        '''
+        Returns the `(X_train, y_train, X_valid, y_valid)` of a fold. If `rows` is given, only those positions of
+        the training part are kept. With `fold_views`, the buffers are overwritten by the next fold, so they must
+        be used right away.
+        '''
+
+        if self.__preprocessing__['enabled']:
+
+            X_train, y_train, X_valid, y_valid = self.__fold_data__[self.__fold_keys__[fold]]
+            if rows is not None and self.__fold_views__:
+                X_train = self.__take__('X_train', X_train, rows)
+                y_train = self.__take__('y_train', y_train, rows)
+            elif rows is not None:
+                X_train, y_train = X_train[rows], y_train[rows]
+
+            return X_train, y_train, X_valid, y_valid
+
+        train_indices, valid_indices = self.__get_folds__()[fold]
+        if rows is not None:
+            train_indices = train_indices[rows]
+
+        if self.__X_array__ is not None:
+
+            return (self.__take__('X_train', self.__X_array__, train_indices),
+                    self.__take__('y_train', self.__y_array__, train_indices),
+                    self.__take__('X_valid', self.__X_array__, valid_indices),
+                    self.__take__('y_valid', self.__y_array__, valid_indices))
+
+        X_train_fold = pd.DataFrame(self.__X_train__.iloc[train_indices], columns = self.__columns__)      
+        
+        y_train_fold = self.__y_train__.iloc[train_indices]      
+        
+        X_valid_fold = pd.DataFrame(self.__X_train__.iloc[valid_indices], columns = self.__columns__)
+        
+        y_valid_fold = self.__y_train__.iloc[valid_indices]
+
+        return X_train_fold, y_train_fold, X_valid_fold, y_valid_fold
+
+
+    def __fit_fold__(self, model: type, config: dict, fold: int, rows: np.ndarray = None, budget: str = '') -> tuple:
+        '''
+        Trains a configuration on the training part of a fold and scores it on the validation part.
+
+        Parameters
+        ---
+        fold : int
+            Position of the fold;
+
+        rows : np.ndarray, default = None
+            Positions, within the training part of the fold, of the samples to train on. If `None`, all of them;
+
+        budget : str, default = ''
+            Name of the subsample `rows`, used to store the result. A subsample without a name is never stored.
+
+        Output
+        ---
+        The scores, and the number of samples the model has been trained on.
+        '''
+
+        stored = rows is None or budget != ''
+
+        cell = self.__lookup__(model, config, fold, budget) if stored else None
+        if cell is not None:
+            return cell
+
+        clf = model(**config)
+        X_train, y_train, X_valid, y_valid = self.__fold_arrays__(fold, rows)
+        results = self.__evaluate_model__(X_train, y_train, X_valid, y_valid, clf, self.__scores__)
+        results['timing']['fold'] = fold
+
+        if stored:
+            self.__record__(model, config, fold, results, len(y_train), budget)
+
+        return results, len(y_train)
+
+
+    def __budgets__(self) -> list:
+        '''
+        Returns the budget of each round of successive halving, as `(number of folds, fraction of samples)`.
+        '''
+
+        n_splits = self.__folds__.get_n_splits()
+        budgets  = []
+
+        fraction = self.__min_fraction__
+        while fraction < 1.0:
+            budgets.append((self.__min_folds__, fraction))
+            fraction *= self.__eta__
+
+        n_folds = self.__min_folds__
+        while n_folds < n_splits:
+            budgets.append((n_folds, 1.0))
+            n_folds *= self.__eta__
+
+        budgets.append((n_splits, 1.0))
+
+        return budgets
+
+
+    def __tpe_search__(self, model: type, space: dict, best: float, parallel: Parallel, verbose: int = 0) -> tuple:
+        '''
+        Searches the configurations of a model with `Search.TPESampler` (see `set_scheduler`). Each configuration
+        goes through `__run_config__`, hence it is pruned and stored as with the 'pruning' scheduler.
+
+        Output
+        ---
+        A list with the performance of each configuration, in the order they were proposed, structured as the ones
+        of `__run_config__`, and the best score updated with them.
+        '''
+
+        n_jobs  = effective_n_jobs(parallel.n_jobs)
+        sampler = TPESampler(space, n_startup = self.__n_startup__, random_state = self.__random_state__)
+        start   = time.perf_counter()
+        n_fits  = 0
+
+        performances = []
+        while len(sampler) < self.__n_trials__:
+
+            if self.__time_budget__ is not None and time.perf_counter() - start >= self.__time_budget__:
+                break
+
+            if self.__max_fits__ is not None and n_fits >= self.__max_fits__:
+                break
+
+            if self.__deadline__ is not None and time.time() >= self.__deadline__:
+                break
+
+            batch = sampler.propose(min(n_jobs, self.__n_trials__ - len(sampler)))
+
+            if n_jobs == 1:
+                results = [self.__run_config__(model, config, best, verbose) for config in batch]
+            else:
+                results = parallel(delayed(self.__run_config__)(model, config, best, verbose) for config in batch)
+
+            for config, performance in zip(batch, results):
+
+                # A configuration skipped before its first fold has no score.
+                if len(performance['weight']) == 0:
+                    performances.append(performance)
+                    continue
+
+                total_avg_performance = np.average(performance[self.__score__], weights = performance['weight'])
+                sampler.observe(config, total_avg_performance)
 
                 # If the model has really good performances, it becomes the new best.
-                best = total_avg_performance if total_avg_performance <= best and self.__thresh_percentage__ != 0.0 else best
+                best    = total_avg_performance if total_avg_performance <= best and self.__thresh_percentage__ != 0.0 else best
+                n_fits += len(performance['weight'])
+                performances.append(performance)
 
-                # Store the parameters in order to be able later to retrieve the best configuration.
-                models_performance[model_name][model_config_name]['parameters'] = config
-                models_performance[model_name][model_config_name]['skipped'] = skipped
-                count_config += 1
+            print(f"\tTrial {len(sampler)} / {self.__n_trials__}: {n_fits} fits, "
+                  f"{time.perf_counter() - start:.1f} s") if verbose >= 2 else None
 
-            print('\n')
+        return performances, best
 
-        self.models_perfomance = models_performance
+
+    def __subsample__(self, permutation: np.ndarray, fraction: float) -> tuple:
+        '''
+        Returns the `(rows, budget)` to pass to `__fit_fold__` to train on a `fraction` of the training part of a
+        fold. A random subsample can only be stored if it is reproducible, i.e. if `random_state` is set.
+        '''
+
+        if fraction >= 1.0:
+            return None, ''
+
+        rows   = permutation[:max(1, int(round(fraction * len(permutation))))]
+        budget = f"fraction={fraction!r},seed={self.__random_state__!r}" if self.__random_state__ is not None else ''
+
+        return rows, budget
+
+
+    def __successive_halving__(self, model: type, configs: list, parallel: Parallel, verbose: int = 0) -> list:
+        '''
+        Evaluates the configurations of a model with successive halving (see `set_scheduler`).
+
+        Output
+        ---
+        A list with the performance of each configuration, in the order of `configs`, structured as the ones of
+        `__run_config__`. The scores are the ones of the largest budget the configuration reached, and the
+        configurations not promoted to the last round are marked as skipped, with reason 'halving' ('time' if they
+        were too slow for the `config_budget` of `set_time_budget`, 'total_time' if the rounds were stopped by its
+        `total_budget`).
+        '''
+
+        rng       = np.random.RandomState(self.__random_state__)
+        subsample = [rng.permutation(self.__train_size__(fold)) for fold in range(len(self.__get_folds__()))]
+        budgets   = self.__budgets__()
+
+        alive   = list(range(len(configs)))
+        reached = {i: None for i in alive}      # Key = configuration : Value = largest budget reached
+        cells   = {}                            # Key = (configuration, fold, fraction) : Value = results
+        slow    = set()                         # Configurations stopped by `config_budget`
+
+        stopped = False
+        for count_round, (n_folds, fraction) in enumerate(budgets):
+
+            # When the time of the sweep is over, the survivors keep the budget of the previous round.
+            if count_round > 0 and self.__deadline__ is not None and time.time() >= self.__deadline__:
+                stopped = True
+                break
+
+            print(f"\tRound {count_round + 1} / {len(budgets)}: {len(alive)} configurations, "
+                  f"{n_folds} folds, {fraction:.0%} of the samples") if verbose >= 2 else None
+
+            # Evaluate only what the previous rounds have not already evaluated.
+            todo = [(i, fold, fraction) for i in alive for fold in range(n_folds) if (i, fold, fraction) not in cells]
+            jobs = [(model, configs[i], fold) + self.__subsample__(subsample[fold], fraction) for i, fold, fraction in todo]
+
+            if effective_n_jobs(parallel.n_jobs) == 1:
+                outputs = [self.__fit_fold__(*job) for job in jobs]
+            else:
+                outputs = parallel(delayed(self.__fit_fold__)(*job) for job in jobs)
+
+            for cell, output in zip(todo, outputs):
+                cells[cell] = output
+
+            # Average the main score of each configuration over the folds of the round.
+            averages = {}
+            for i in alive:
+
+                reached[i] = (n_folds, fraction)
+                scores     = [cells[(i, fold, fraction)][0][self.__score__] for fold in range(n_folds)]
+                weights    = [cells[(i, fold, fraction)][1] for fold in range(n_folds)]
+                averages[i] = np.average(scores, weights = weights)
+
+            if count_round == len(budgets) - 1:
+                break
+
+            # Promote the best 1 / eta, keeping the order of the grid. The lower the score, the better.
+            n_promoted = max(1, math.ceil(len(alive) / self.__eta__))
+
+            # A configuration is not promoted if, at the pace of this round scaled up to all the samples, all the
+            # folds would exceed `config_budget` (as in `__over_budget__`).
+            if self.__config_budget__ is not None:
+
+                n_splits = len(self.__get_folds__())
+                for i in alive:
+
+                    spent = sum(self.__cost__(cells[(i, fold, fraction)][0]) for fold in range(n_folds)) / fraction
+                    if spent / n_folds * n_splits > self.__config_budget__:
+                        slow.add(i)
+
+                alive = [i for i in alive if i not in slow]
+
+            alive = sorted(sorted(alive, key = lambda i: averages[i])[:n_promoted])
+
+        # Gather the scores of the largest budget reached by each configuration.
+        performances = []
+        for i, config in enumerate(configs):
+
+            n_folds, fraction = reached[i]
+            performance = {metric.name: [] for metric in self.__scores__}
+            performance['weight'] = []
+            performance['timing'] = []
+
+            for fold in range(n_folds):
+
+                results, weight = cells[(i, fold, fraction)]
+                for score, result in results.items():
+                    performance[score].append(result)
+                performance['weight'].append(weight)
+
+            performance['parameters'] = config
+            performance['skipped']     = reached[i] != budgets[-1]
+            performance['skip_reason'] = (None         if not performance['skipped'] else
+                                          'time'       if i in slow else
+                                          'total_time' if stopped and i in alive else 'halving')
+            performance['budget']      = {'folds' : n_folds, 'fraction' : fraction}
+            performances.append(performance)
+
+        return performances
     
     def get_performance(self) -> dict:
         '''
         Just returns the performances.
         '''
-        return self.models_perfomance
\ No newline at end of file
+        return self.models_perfomance
+
+
+    def get_timings(self, level: str = 'fold') -> pd.DataFrame:
+        '''
+        Summarizes the `timing` entries of the last `do_cross_validation` (see `set_instrumentation`).
+
+        Parameters
+        ---
+        level : str, default = 'fold'
+            * 'fold' = one row per fit;
+            * 'config' = one row per configuration, with the total time, the peak memory and the number of folds;
+            * 'model' = one row per model, with the total time and the number of configurations and fits.
+
+        Output
+        ---
+        A `pd.DataFrame`, sorted by total time (fit + predict), the slowest first. Fits read from a `ResultStore`
+        have `cached = True` and the timing of the run that computed them.
+        '''
+
+        if level not in ['fold', 'config', 'model']:
+            raise ValueError(f"Unknown level '{level}', choose among 'fold', 'config' and 'model'.")
+
+        rows = []
+        for model_name, configs in self.models_perfomance.items():
+            for config_name, performance in configs.items():
+                # Folds read from an older store may have no timing: the fold comes from the entry, not from its
+                # position among the entries.
+                for position, timing in enumerate(performance['timing']):
+
+                    fold = timing.get('fold', position)
+                    rows.append({**timing, 'model' : model_name, 'config' : config_name, 'fold' : fold,
+                                 self.__score__ : performance[self.__score__][fold]})
+
+        timings = pd.DataFrame(rows, columns = ['model', 'config', 'fold', self.__score__, 'start', 'fit_time', 'predict_time',
+                                                'peak_memory', 'rows', 'columns', 'nbytes', 'pid', 'cached'])
+        timings['total_time'] = timings['fit_time'] + timings['predict_time']
+
+        if level == 'config':
+
+            timings = timings.groupby(['model', 'config'], sort = False).agg(folds        = ('fold', 'count'),
+                                                                             score        = (self.__score__, 'mean'),
+                                                                             fit_time     = ('fit_time', 'sum'),
+                                                                             predict_time = ('predict_time', 'sum'),
+                                                                             total_time   = ('total_time', 'sum'),
+                                                                             peak_memory  = ('peak_memory', 'max'),
+                                                                             nbytes       = ('nbytes', 'max'))
+            timings = timings.rename(columns = {'score' : self.__score__}).reset_index()
+
+        elif level == 'model':
+
+            timings = timings.groupby('model', sort = False).agg(configs      = ('config', 'nunique'),
+                                                                 fits         = ('fold', 'count'),
+                                                                 fit_time     = ('fit_time', 'sum'),
+                                                                 predict_time = ('predict_time', 'sum'),
+                                                                 total_time   = ('total_time', 'sum'),
+                                                                 peak_memory  = ('peak_memory', 'max')).reset_index()
+
+        return timings.sort_values('total_time', ascending = False, kind = 'stable').reset_index(drop = True)
+
+
+    def export_trace(self, path: str) -> None:
+        '''
+        Writes the fits of the last `do_cross_validation` to a `JSON` file in the Chrome trace format, which can
+        be opened with chrome://tracing or https://ui.perfetto.dev. Each process is a row, each fit and predict
+        a box. Fits read from a `ResultStore` did not run, and are left out.
+
+        Parameters
+        ---
+        path : str
+            Location of the file.
+        '''
+
+        timings = self.get_timings('fold')
+        timings = timings[~timings['cached'].astype(bool)]
+        origin  = timings['start'].min() if len(timings) > 0 else 0.0
+
+        events = []
+        for row in timings.itertuples(index = False):
+
+            args = {'model' : row.model, 'config' : row.config, 'fold' : row.fold, self.__score__ : getattr(row, self.__score__),
+                    'rows' : row.rows, 'columns' : row.columns, 'nbytes' : row.nbytes,
+                    'peak_memory' : None if pd.isna(row.peak_memory) else row.peak_memory}
+            begin = (row.start - origin) * 1e6
+
+            events.append({'name' : f"fit {row.config}", 'cat' : row.model, 'ph' : 'X', 'ts' : begin,
+                           'dur' : row.fit_time * 1e6, 'pid' : row.pid, 'tid' : row.pid, 'args' : args})
+            events.append({'name' : f"predict {row.config}", 'cat' : row.model, 'ph' : 'X', 'ts' : begin + row.fit_time * 1e6,
+                           'dur' : row.predict_time * 1e6, 'pid' : row.pid, 'tid' : row.pid, 'args' : args})
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok = True)
+
+        with open(path, 'w') as file:
+            json.dump({'traceEvents' : events, 'displayTimeUnit' : 'ms'}, file, default = float)
\ No newline at end of file
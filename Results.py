@@ -0,0 +1,154 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+import pandas as pd
+
+
+class ResultStore():
+
+    def __init__(self, path: str = 'results/cv_results.sqlite'):
+        '''
+        Builds a `ResultStore` object. It keeps on disk the scores of every `(model, configuration, fold)` evaluated
+        by `PrunedCV`, each written as soon as it is computed. A sweep interrupted or widened later only computes
+        the cells that are missing.
+
+        The cells are grouped by a fingerprint of the sweep (data, folds and preprocessing, see `PrunedCV`), so that
+        results obtained on different data are never mixed up.
+
+        Parameters
+        ---
+        path : str, default = 'results/cv_results.sqlite'
+            Location of the database. Missing folders are created.
+        '''
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok = True)
+
+        self.__path__ = path
+        self.__connect__()
+
+
+    def __connect__(self) -> None:
+
+        self.__lock__ = threading.Lock()
+
+        # The workers of PrunedCV write from other processes: wait for the lock of the file instead of failing.
+        self.__db__ = sqlite3.connect(self.__path__, timeout = 60, check_same_thread = False)
+        self.__db__.execute('PRAGMA journal_mode = WAL')
+        self.__db__.execute('''CREATE TABLE IF NOT EXISTS cells (
+                                   fingerprint TEXT,
+                                   model       TEXT,
+                                   config      TEXT,
+                                   fold        INTEGER,
+                                   budget      TEXT,
+                                   scores      TEXT,
+                                   weight      INTEGER,
+                                   created     REAL,
+                                   PRIMARY KEY (fingerprint, model, config, fold, budget))''')
+        self.__db__.commit()
+
+
+    def __getstate__(self) -> dict:
+
+        # The connection cannot be sent to another process: each process opens its own.
+        return {'path' : self.__path__}
+
+
+    def __setstate__(self, state: dict) -> None:
+
+        self.__path__ = state['path']
+        self.__connect__()
+
+
+    def close(self) -> None:
+
+        self.__db__.close()
+
+
+    def key(self, config: dict) -> str:
+        '''
+        Returns the canonical form of a configuration: `JSON` with sorted keys, `NumPy` scalars as `Python` ones.
+        '''
+
+        return json.dumps(config, sort_keys = True, default = lambda value: value.item() if hasattr(value, 'item') else repr(value))
+
+
+    def get(self, fingerprint: str, model: str, config: dict, fold: int, budget: str = '') -> tuple:
+        '''
+        Returns the `(scores, weight)` of a cell, or `None` if it was never evaluated.
+
+        Parameters
+        ---
+        fingerprint : str
+            Fingerprint of the sweep;
+
+        model : str
+            Full name of the model, e.g. 'sklearn.svm.SVR';
+
+        config : dict
+            Hyperparameters of the model;
+
+        fold : int
+            Position of the fold;
+
+        budget : str, default = ''
+            Which part of the training samples has been used, '' if all of them.
+        '''
+
+        with self.__lock__:
+            row = self.__db__.execute('SELECT scores, weight FROM cells WHERE fingerprint = ? AND model = ? AND config = ? '
+                                      'AND fold = ? AND budget = ?', (fingerprint, model, self.key(config), fold, budget)).fetchone()
+
+        if row is None:
+            return None
+
+        return json.loads(row[0]), row[1]
+
+
+    def put(self, fingerprint: str, model: str, config: dict, fold: int, scores: dict, weight: int, budget: str = '') -> None:
+        '''
+        Stores the `scores` of a cell and forces them to the disk, replacing the previous ones.
+        '''
+
+        # The scores are floats, the timing of the fit (see `PrunedCV.set_instrumentation`) a dict.
+        scores = json.dumps(scores, default = float)
+
+        with self.__lock__:
+            self.__db__.execute('INSERT OR REPLACE INTO cells VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                                (fingerprint, model, self.key(config), fold, budget, scores, int(weight), time.time()))
+            self.__db__.commit()
+
+
+    def count(self, fingerprint: str = None) -> int:
+        '''
+        Returns the number of cells stored, only the ones of `fingerprint` if given.
+        '''
+
+        with self.__lock__:
+
+            if fingerprint is None:
+                return self.__db__.execute('SELECT COUNT(*) FROM cells').fetchone()[0]
+
+            return self.__db__.execute('SELECT COUNT(*) FROM cells WHERE fingerprint = ?', (fingerprint,)).fetchone()[0]
+
+
+    def to_frame(self, fingerprint: str = None) -> pd.DataFrame:
+        '''
+        Returns the stored cells as a `pd.DataFrame`, one row per cell and one column per score. The timing of the
+        fits, if recorded, is in the columns 'timing.*'.
+        '''
+
+        query  = 'SELECT fingerprint, model, config, fold, budget, scores, weight, created FROM cells'
+        params = ()
+        if fingerprint is not None:
+            query  += ' WHERE fingerprint = ?'
+            params  = (fingerprint,)
+
+        with self.__lock__:
+            cells = pd.read_sql_query(query, self.__db__, params = params)
+
+        scores = pd.json_normalize([json.loads(score) for score in cells['scores']]).set_axis(cells.index)
+
+        return pd.concat([cells.drop('scores', axis = 1), scores], axis = 1)
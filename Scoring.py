@@ -0,0 +1,150 @@
+import numpy as np
+
+
+class Metric():
+
+    def __init__(self, name: str, function, target = None, output = None, vectorized: bool = True,
+                 greater_is_better: bool = False):
+        '''
+        Builds a `Metric` object, i.e. the declaration of a score: how it is computed and which transforms are
+        applied before and after. Metrics sharing the same `target` transform are computed on the same transformed
+        arrays, which are built only once (see `score_predictions`).
+
+        Parameters
+        ---
+        name : str
+            Name of the score, used as key of the results;
+
+        function : callable
+            If `vectorized`, `function(y_true, Y_pred, residuals)` with `y_true` of shape `(n,)`, `Y_pred` of shape
+            `(k, n)` (the predictions of `k` models stacked) and `residuals = Y_pred - y_true`; it must return an
+            array of shape `(k,)`. Otherwise `function(y_true, y_pred)`, called once per model, e.g. a
+            `sklearn.metrics` method;
+
+        target : callable, default = None
+            Transform applied to both the labels and the predictions before `function`, e.g. `np.exp` to go back
+            from a log target to the original one. If `None`, the arrays are used as they are;
+
+        output : callable, default = None
+            Transform applied to the result of `function`, e.g. `np.sqrt`;
+
+        vectorized : bool, default = True
+            See `function`;
+
+        greater_is_better : bool, default = False
+            Whether higher values of the score mean better models.
+        '''
+
+        self.name              = name
+        self.function          = function
+        self.target            = target
+        self.output            = output
+        self.vectorized        = vectorized
+        self.greater_is_better = greater_is_better
+
+
+    def __repr__(self) -> str:
+
+        return f"Metric('{self.name}')"
+
+
+def _mean_squared(y_true: np.ndarray, Y_pred: np.ndarray, residuals: np.ndarray) -> np.ndarray:
+
+    return np.einsum('ij,ij->i', residuals, residuals) / residuals.shape[1]
+
+
+def _mean_absolute(y_true: np.ndarray, Y_pred: np.ndarray, residuals: np.ndarray) -> np.ndarray:
+
+    return np.abs(residuals).mean(axis = 1)
+
+
+def _mean_squared_log(y_true: np.ndarray, Y_pred: np.ndarray, residuals: np.ndarray) -> np.ndarray:
+
+    # Negative predictions have no logarithm: clip them, as the shares are never negative.
+    log_residuals = np.log1p(np.maximum(Y_pred, 0.0)) - np.log1p(y_true)
+
+    return np.einsum('ij,ij->i', log_residuals, log_residuals) / log_residuals.shape[1]
+
+
+def _r2(y_true: np.ndarray, Y_pred: np.ndarray, residuals: np.ndarray) -> np.ndarray:
+
+    total = np.sum((y_true - y_true.mean()) ** 2)
+
+    return 1.0 - np.einsum('ij,ij->i', residuals, residuals) / total
+
+
+# Built-in regression scores. The models are trained on log(shares), hence RMSLE goes back to the shares first.
+METRICS = {'rmse'  : Metric('rmse',  _mean_squared, output = np.sqrt),
+           'mae'   : Metric('mae',   _mean_absolute),
+           'rmsle' : Metric('rmsle', _mean_squared_log, target = np.exp, output = np.sqrt),
+           'r2'    : Metric('r2',    _r2, greater_is_better = True)}
+
+
+def as_metric(score) -> Metric:
+    '''
+    Returns the `Metric` declared by `score`:
+    * a `Metric` is returned as it is;
+    * a `str` is looked up in `METRICS`;
+    * any other callable, e.g. a `sklearn.metrics` method, is called once per model and followed by a square root,
+      which is what `PrunedCV` has always done with them.
+    '''
+
+    if isinstance(score, Metric):
+        return score
+
+    if isinstance(score, str):
+
+        if score not in METRICS:
+            raise ValueError(f"Unknown score '{score}', choose among {list(METRICS.keys())} or pass a Metric.")
+
+        return METRICS[score]
+
+    return Metric(score.__name__, score, output = np.sqrt, vectorized = False)
+
+
+def score_predictions(metrics: list, y_true: np.ndarray, Y_pred: np.ndarray) -> dict:
+    '''
+    Computes all the `metrics` on the predictions of one or more models at once.
+
+    Parameters
+    ---
+    metrics : list
+        List of `Metric`'s;
+
+    y_true : np.ndarray
+        Labels, of shape `(n,)`;
+
+    Y_pred : np.ndarray
+        Predictions, of shape `(n,)` for a single model, or `(k, n)` for `k` models.
+
+    Output
+    ---
+    A `dict` with, for each metric, a `float` if `Y_pred` has one dimension, otherwise an array of shape `(k,)`.
+    '''
+
+    y_true = np.asarray(y_true, dtype = np.float64).ravel()
+    single = np.ndim(Y_pred) == 1
+    Y_pred = np.atleast_2d(np.asarray(Y_pred, dtype = np.float64))
+
+    spaces  = {}        # Key = target transform : Value = (y_true, Y_pred, residuals) in that space
+    results = {}
+
+    for metric in metrics:
+
+        if metric.target not in spaces:
+
+            y_space = y_true if metric.target is None else metric.target(y_true)
+            Y_space = Y_pred if metric.target is None else metric.target(Y_pred)
+            spaces[metric.target] = (y_space, Y_space, Y_space - y_space)
+
+        y_space, Y_space, residuals = spaces[metric.target]
+
+        if metric.vectorized:
+            values = metric.function(y_space, Y_space, residuals)
+        else:
+            values = np.array([metric.function(y_space, y_pred) for y_pred in Y_space])
+
+        values = values if metric.output is None else metric.output(values)
+        results[metric.name] = float(values[0]) if single else values
+
+    return results
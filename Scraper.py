@@ -1,17 +1,23 @@
 import requests
 import re
 import time
-import pickle
+import inspect
 import numpy as np
 import pandas as pd
 
 from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from urllib.parse import urlparse
 
 from selenium import webdriver
 from datetime import datetime, timedelta
 
 import concurrent.futures
 
+from Fetcher import AsyncFetcher, RateLimiter
+from Cache import ResponseCache, CacheMiss
+from Journal import ScrapeJournal
+
 
 class Scraper():
 
@@ -21,7 +27,57 @@ class Scraper():
         and the management of the `URL`'s. 
         '''
         
-        self = self
+        self.set_backend()
+        self.set_cache()
+        self.set_journal()
+        self.__limiter__ = None     # Shared by the workers of parallelize_scrape.
+
+
+    def set_cache(self, cache: ResponseCache = None) -> None:
+        '''
+        Pass a `ResponseCache`. Every page requested from now on is looked up there first, and stored
+        once downloaded. With an offline cache, the whole procedure can be replayed without network.
+
+        Parameter
+        ---
+        cache : ResponseCache, default = None
+            The cache to use. If `None`, everything is downloaded again.
+        '''
+
+        self.__cache__ = cache
+
+
+    def set_backend(self, backend: str = 'html', years: list = ['2013', '2014', '2015'], concurrency: int = 8,
+                    rate: float = 5.0, base_url: str = 'https://web.archive.org') -> None:
+        '''
+        Choose where the snapshot dates are taken from when calling `get_snap_dates` or `_dates_from_html`.
+
+        Parameters
+        ---
+        backend : str, default = 'html'
+            * 'html' = the dates are extracted from the calendar pages collected while scraping;
+            * 'index' = the dates are requested to the `CDX` index of the archive, one request per `URL`.
+              The `HTML`'s are not needed, only their `URL`'s.
+
+        years : list, default = ['2013', '2014', '2015']
+            Years covered by the 'index' backend;
+
+        concurrency : int, default = 8
+            Maximum number of index requests in flight at the same time;
+
+        rate : float, default = 5.0
+            Maximum number of index requests per second;
+
+        base_url : str, default = 'https://web.archive.org'
+            Root of the archive.
+        '''
+
+        if backend not in ['html', 'index']:
+            raise ValueError(f"Unknown backend '{backend}', choose between 'html' and 'index'.")
+
+        self.__backend__        = backend
+        self.__index_years__    = years
+        self.__fetcher_params__ = {'concurrency' : concurrency, 'rate' : rate, 'base_url' : base_url}
 
 
     def set_url(self, url_timedelta: pd.DataFrame) -> None:
@@ -39,6 +95,28 @@ class Scraper():
         self.__url_timedelta__ = url_timedelta
 
 
+    def set_journal(self, journal: ScrapeJournal = None) -> None:
+        '''
+        Pass a `ScrapeJournal`. The results of `scrape` are committed there in batches, and the `URL`'s it
+        already contains are skipped, so that an interrupted scraping can simply be started again.
+
+        Parameter
+        ---
+        journal : ScrapeJournal, default = None
+            The journal to use. If `None`, the default 'url_html/journal.jsonl' is opened when needed.
+        '''
+
+        self.__journal__ = journal
+
+
+    def get_journal(self) -> ScrapeJournal:
+
+        if self.__journal__ is None:
+            self.__journal__ = ScrapeJournal()
+
+        return self.__journal__
+
+
     def start_driver(self) -> None:
         '''
         Start a `Selenium` webdriver using Firefox as browser.
@@ -48,7 +126,8 @@ class Scraper():
         print('DRIVER ONLINE')
 
 
-    def scrape(self, url: list = [], years: list = ['2013', '2014', '2015'], backup = True) -> dict:
+    def scrape(self, url: list = [], years: list = ['2013', '2014', '2015'], backup = True, batch_size: int = 10,
+               lean: bool = False, pause: float = 2, restart_every: int = 20) -> dict:
         '''
         Starts the scraping over the `years`. For each `URL`, It redirects the
         `Selenium` Driver to Calendar section in Wayback Machine. Then, collect
@@ -58,7 +137,25 @@ class Scraper():
         Parameters
         ---
         years : list, default = ['2013', '2014', '2015']
-            List of the years over which the scraper will look.
+            List of the years over which the scraper will look;
+
+        backup : bool, default = True
+            If `True`, every `batch_size` `URL`'s the closest snapshot dates are committed to the journal
+            (see `set_journal`), and the `URL`'s already in the journal are skipped;
+
+        batch_size : int, default = 10
+            How many `URL`'s are committed at once;
+
+        lean : bool, default = False
+            If `True`, each calendar is reduced to its snapshot dates as soon as it arrives and the parsed
+            page is thrown away, so that memory does not grow with the number of `URL`'s. The raw page is
+            still spilled to the cache, if one is set (see `set_cache`);
+
+        pause : float, default = 2
+            Seconds to wait for the calendar to be rendered by the browser;
+
+        restart_every : int, default = 20
+            The browser is restarted every `restart_every` `URL`'s. If `0`, it is never restarted.
         
         Output
         ---
@@ -67,14 +164,20 @@ class Scraper():
         >>>  URL_1 : HTML_1
         >>>  ...
         >>> }
+        With `lean`, the snapshot dates take the place of the `HTML`, which `get_snap_dates` accepts as well.
         '''
         
         if len(url) == 0:
             pool_url = self.__url__
         else:
             pool_url = url
+
+        # Work already in the journal is not done again.
+        if backup:
+            pool_url = self.get_journal().pending(pool_url)
+            print(f"{len(pool_url)} URL's left to scrape.")
         
-        count_url  = 6081
+        count_url  = 1
         self.__url_html__ = {}      # Key = URL : Value = HTML
 
         # Iterate over the url's.
@@ -83,7 +186,7 @@ class Scraper():
             print(f"Current URL: {url}")
             self.__url_html__[f'{url}'] = {}
 
-            if count_url % 20 == 0:
+            if restart_every and count_url % restart_every == 0:
 
                 self.__driver__.close()
                 self.__driver__.quit()
@@ -95,17 +198,31 @@ class Scraper():
             for year in years:
 
                 successful = False
-                
+                attempt    = 0
+
                 while not successful:
                     # Refers to January, 1st. Arbitrary decision.
                     archive_url = 'https://web.archive.org/web/' + f"{year}" + '0101000000*/' + url
-                    self.__driver__.get(archive_url)    # Retrive the current HTML.
-                    print("\n\t\tzzz...zzz...zzz...")         # Let the scraper rest a bit...
-                    time.sleep(2)
-                    print("")
-                    print(f"\t\t       !!!!")
-                    html = self.__driver__.page_source
-                    print(f"\nfrom {year}\t  HTML ACQUIRED!")
+                    # The cache is only trusted once: an incomplete calendar found there is downloaded again.
+                    cached = self.__cache__.get(archive_url) if self.__cache__ is not None and attempt == 0 else None
+                    html   = cached
+                    attempt += 1
+
+                    if html is None:
+
+                        if self.__cache__ is not None and self.__cache__.is_offline():
+                            raise CacheMiss(archive_url)
+
+                        if self.__limiter__ is not None:
+                            self.__limiter__.wait('web.archive.org')
+
+                        self.__driver__.get(archive_url)    # Retrive the current HTML.
+                        print("\n\t\tzzz...zzz...zzz...")         # Let the scraper rest a bit...
+                        time.sleep(pause)
+                        print("")
+                        print(f"\t\t       !!!!")
+                        html = self.__driver__.page_source
+                        print(f"\nfrom {year}\t  HTML ACQUIRED!")
                     
                     soup = BeautifulSoup(html, 'html.parser')       # Parse to get a neat structure.
                     divs = soup.find_all('div', class_='month-day-container')
@@ -113,48 +230,208 @@ class Scraper():
                     print("")
                     print("\t\t     Failure.") if not successful else print("\t\t     Success!")
 
-                self.__url_html__[f'{url}'].update({year : soup})
-        
-            if (backup) and (count_url % 10 == 0):
+                # Only complete calendars are worth storing.
+                if self.__cache__ is not None and cached is None:
+                    self.__cache__.put(archive_url, html)
 
-                candidate_dates = self.get_snap_dates(self.__url_html__)
-                url_fold = set(self.__url_html__.keys())
-                selected_timedelta = self.__url_timedelta__.loc[self.__url_timedelta__['url'].isin(url_fold), 'timedelta']
-                shifted_dates   = self.shift_dates(self.__url_html__.keys(), selected_timedelta)
-
-                closest = []
-                for i, key in zip(range(len(candidate_dates)), candidate_dates.keys()):
-                    closest.append(self.get_closest(shifted_dates[i], candidate_dates[key]))
-
-                print(self.__url__)
-                # print(self.__url_html__)
-                print(closest)
-                scraping_dates = {k: v for k, v in zip(self.__url__[self.__url__.isin(list(self.__url_html__.keys()))], closest)}
-                #scraping_dates = {k: v for k, v in zip(self.__url__[self.__url__ in list(self.__url_html__.keys())], closest)}
+                # Keep either the whole page or just what will be used later, in a compact form.
+                payload = np.asarray(self._get_snap_dates(soup, year), dtype = 'datetime64[D]') if lean else soup
+                self.__url_html__[f'{url}'].update({year : payload})
+                del soup, html
+        
+            if (backup) and (count_url % batch_size == 0):
 
-                with open(f'url_html/url_html{count_url}.pkl', 'wb') as file:
-                    
-                    pickle.dump(scraping_dates, file)
-                    self.__url_html__ = {}      # Key = URL : Value = HTML
+                self._commit_backup()
+                self.__url_html__ = {}      # Key = URL : Value = HTML
 
             count_url += 1
             print(count_url) 
 
+        # The last batch may be incomplete.
+        if backup and len(self.__url_html__) > 0:
+
+            self._commit_backup()
+            self.__url_html__ = {}
+
         return self.__url_html__
         
     
-    def parallelize_scrape(self, url_partition):
+    def _commit_backup(self) -> dict:
+        '''
+        Computes the closest snapshot date of the `URL`'s scraped since the last commit, and appends them
+        to the journal as a single batch.
 
+        Output
+        ---
+        A `dict` containing, for each `URL`, the closest date for which a snapshot is available.
+        '''
+
+        candidate_dates = self.get_snap_dates(self.__url_html__)
+        batch_url       = list(candidate_dates.keys())
+
+        # Look up the timedelta of each URL, so that the order of the batch does not matter.
+        url_timedelta = self.__url_timedelta__.drop_duplicates('url').set_index('url')['timedelta']
+        shifted_dates = self.shift_dates_frame(pd.DataFrame({'url'       : batch_url,
+                                                             'timedelta' : url_timedelta.loc[batch_url].to_numpy()}))
+
+        offsets, values = self.to_ragged(candidate_dates)
+        closest         = self.get_closest_batch(offsets, values, shifted_dates).astype(object)
+        scraping_dates  = dict(zip(batch_url, closest))
+
+        print(f"{self.get_journal().commit(scraping_dates)} URL's committed.")
+
+        return scraping_dates
+
+
+    def parallelize_scrape(self, url_partition: list = None, n_workers: int = 4, mode: str = 'browser',
+                           rate: float = 5.0, **kwargs) -> dict:
+        '''
+        Runs several scrapers at the same time. Each worker owns its browser (or its connection pool), its
+        own buffer and a disjoint shard of the `URL`'s, while the rate limit, the cache and the journal are
+        shared. The results are merged in the order of the shards, whatever the order in which workers end.
+
+        Parameters
+        ---
+        url_partition : list, default = None
+            List of lists of `URL`'s, one per worker. If `None`, the `URL`'s passed to `set_url` are split
+            into `n_workers` contiguous shards;
+
+        n_workers : int, default = 4
+            Number of workers, used only when `url_partition` is not given;
+
+        mode : str, default = 'browser'
+            * 'browser' = each worker runs `scrape` with its own `Selenium` driver;
+            * 'fetch' = each worker runs `scrape_async`, without any browser.
+
+        rate : float, default = 5.0
+            Maximum number of requests per second sent to the archive by all the workers together;
+
+        **kwargs
+            Passed to `scrape` or `scrape_async`. Arguments the method of `mode` does not take (e.g. `backup` with
+            'fetch') raise a `TypeError` before any worker starts.
+
+        Output
+        ---
+        The same dictionary returned by `scrape` or `scrape_async`, for all the shards.
+        '''
+
+        if mode not in ['browser', 'fetch']:
+            raise ValueError(f"Unknown mode '{mode}', choose between 'browser' and 'fetch'.")
+
+        # The URL's come from the shards and the limiter is the shared one.
+        method   = self.scrape if mode == 'browser' else self.scrape_async
+        accepted = set(inspect.signature(method).parameters) - {'url', 'rate_limiter'}
+        unknown  = sorted(set(kwargs) - accepted)
+        if len(unknown) > 0:
+            raise TypeError(f"Mode '{mode}' does not take {unknown}, choose among {sorted(accepted)}.")
+
+        if url_partition is None:
+            url_partition = [list(shard) for shard in np.array_split(np.array(list(self.__url__), dtype = object), n_workers)]
+
+        if len(url_partition) == 0:
+            self.__url_html__ = {}
+            return self.__url_html__
+
+        # Disjoint shards, otherwise two workers would do the same work.
+        all_url = [url for shard in url_partition for url in shard]
+        if len(all_url) != len(set(all_url)):
+            raise ValueError("The shards of url_partition must not overlap.")
+
+        limiter = RateLimiter(rate)
+
+        # Open the journal once, so that all the workers share it.
+        if mode == 'browser' and kwargs.get('backup', True):
+            self.get_journal()
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers = len(url_partition)) as executor:
+
+            futures = [executor.submit(self._run_worker, list(shard), mode, limiter, kwargs) for shard in url_partition]
+
+            # Merge in the order of the shards.
+            self.__url_html__ = {}
+            for future in futures:
+                self.__url_html__.update(future.result())
+
+        return self.__url_html__
+
+
+    def _spawn_worker(self) -> 'Scraper':
+        '''
+        Returns a new `Scraper` with the same settings, but nothing else in common with this one.
+        '''
+
+        worker = Scraper()
+        worker.set_url(self.__url_timedelta__)
+        worker.__backend__        = self.__backend__
+        worker.__index_years__    = self.__index_years__
+        worker.__fetcher_params__ = dict(self.__fetcher_params__)
+        worker.set_cache(self.__cache__)
+        worker.set_journal(self.__journal__)
+
+        return worker
+
+
+    def _run_worker(self, shard: list, mode: str, limiter: RateLimiter, kwargs: dict) -> dict:
+
+        worker = self._spawn_worker()
+        worker.__limiter__ = limiter
+
+        if mode == 'fetch':
+            return worker.scrape_async(shard, rate_limiter = limiter, **kwargs)
+
+        worker.start_driver()
+        try:
+            return worker.scrape(shard, **kwargs)
+        finally:
+            worker.__driver__.quit()
+
+
+    def scrape_async(self, url: list = [], years: list = ['2013', '2014', '2015'], concurrency: int = 8,
+                     rate: float = 5.0, base_url: str = 'https://web.archive.org', rate_limiter: RateLimiter = None) -> dict:
+        '''
+        Same goal as `scrape`, but the snapshot calendar is requested directly to the Wayback Machine
+        through an `AsyncFetcher`, with no browser involved. Many `URL`'s are processed at the same time.
+
+        Parameters
+        ---
+        years : list, default = ['2013', '2014', '2015']
+            List of the years over which the scraper will look;
+
+        concurrency : int, default = 8
+            Maximum number of requests in flight at the same time;
+
+        rate : float, default = 5.0
+            Maximum number of requests per second sent to the archive;
+
+        base_url : str, default = 'https://web.archive.org'
+            Root of the archive;
+
+        rate_limiter : RateLimiter, default = None
+            An already built limiter, shared with other scrapers. If passed, `rate` is ignored.
+
+        Output
+        ---
+        A dictionary containing the `URL` and the snapshot dates associated for each year as follows:
+        >>> {URL_0 : {year_0 : dates_0, year_1 : dates_1},
+        >>>  URL_1 : {year_0 : dates_0, year_1 : dates_1}
+        >>>  ...
+        >>> }
+        It can be passed to `get_snap_dates` as it is.
+        '''
+
+        pool_url = self.__url__ if len(url) == 0 else url
+
+        fetcher = AsyncFetcher(base_url = base_url, concurrency = concurrency, rate = rate, cache = self.__cache__,
+                               rate_limiter = rate_limiter)
+        try:
+            self.__url_html__ = fetcher.fetch_calendar(pool_url, years)
+        finally:
+            fetcher.close()
+
+        print(f"{len(fetcher.get_failed())} URL's could not be retrieved.") if fetcher.get_failed() else None
+
+        return self.__url_html__
 
-        with concurrent.futures.ThreadPoolExecutor() as executor:
-            # Submit the scraping tasks to the executor
-            results = [executor.submit(self.scrape, url_fold) for url_fold in url_partition]
-            # Retrieve the results as they complete
-            for future in concurrent.futures.as_completed(results):
-                scraped_data = future.result()
-                # Process or store the scraped data as desired
-        
-        return scraped_data
 
     def get_snap_dates(self, list_html: dict = {}) -> dict:
         '''
@@ -165,7 +442,8 @@ class Scraper():
         ---
         list_html : list
             List containing the `HTML`'s. Each `HTML` refers to a calendar page of Wayback Machine
-            and stores the information about the snapshots and the related dates.
+            and stores the information about the snapshots and the related dates. Years whose dates
+            have already been extracted (e.g. by `scrape_async`) are taken as they are.
         
         Output
         ---
@@ -174,8 +452,17 @@ class Scraper():
         >>>  URL_1 : [snapshot_date_1, snapshot_date_1],
         >>>  ...
         >>> }
+        With the 'index' backend, each value is a sorted `np.array` of type `datetime64[D]`.
         '''
         
+        if self.__backend__ == 'index':
+
+            # Only the URL's are needed, the HTML's are ignored.
+            url = list(list_html.keys()) if list_html else list(self.__url__)
+            self.__dates__ = self._get_index_dates(url)
+
+            return self.__dates__
+
         # If a list of URL's is not provided, refers to the one stored in the class.
         list_html = self.__url_html__ if not list_html else list_html
         dates = {}
@@ -189,13 +476,41 @@ class Scraper():
             # Iterate over the years for a specific URL.
             for year in list(soup.keys()):
 
-                dates[url].extend(self._get_snap_dates(soup[year], year))  # For each URL, append the year and the related dates.    
+                if isinstance(soup[year], BeautifulSoup):
+                    dates[url].extend(self._get_snap_dates(soup[year], year))  # For each URL, append the year and the related dates.    
+                else:
+                    dates[url].extend(soup[year])
 
         self.__dates__ = dates
 
         return dates
 
 
+    def _get_index_dates(self, url: list) -> dict:
+        '''
+        Requests the snapshot dates of each `URL` to the `CDX` index of the archive.
+
+        Parameters
+        ---
+        url : list
+            List of `URL`'s, each in a `str` format.
+
+        Output
+        ---
+        A `dict` containing, for each `URL`, a sorted `np.array` of type `datetime64[D]`.
+        '''
+
+        fetcher = AsyncFetcher(**self.__fetcher_params__, cache = self.__cache__)
+        try:
+            url_dates = fetcher.fetch_index(url, self.__index_years__)
+        finally:
+            fetcher.close()
+
+        print(f"{len(fetcher.get_failed())} URL's could not be retrieved.") if fetcher.get_failed() else None
+
+        return url_dates
+
+
     def _get_snap_dates(self, soup: BeautifulSoup, scraping_year: str) -> list: 
         '''
         Given the HTML of the calendar from Wayback Machine as input, returns all the dates which represent a snapshot.
@@ -259,6 +574,36 @@ class Scraper():
         return self.__shifted_dates__
 
 
+    def shift_dates_frame(self, url_timedelta: pd.DataFrame = None) -> np.ndarray:
+        '''
+        Columnar version of `shift_dates`: the dates are extracted from all the `URL`'s and shifted at once,
+        without any Python loop. The results are the same.
+
+        Parameters
+        ---
+        url_timedelta : pd.DataFrame, default = None
+            A `pd.DataFrame` with the columns `url` and `timedelta`. If `None`, the one passed to `set_url`.
+
+        Output
+        ---
+        A `np.array` of type `datetime64[D]` containing the shifted dates, in the same order as the rows.
+        `URL`'s without a date, or rows without a timedelta, give `NaT`.
+        '''
+
+        url_timedelta = self.__url_timedelta__ if url_timedelta is None else url_timedelta
+
+        dates = url_timedelta['url'].str.extract(r"http://mashable.com/(\d{4}/\d{2}/\d{2})/[-\w]+/", expand = False)
+        dates = pd.to_datetime(dates, format = "%Y/%m/%d").to_numpy().astype('datetime64[D]')
+        days  = pd.to_numeric(url_timedelta['timedelta']).to_numpy(dtype = np.float64)
+
+        # NaT is the smallest int64: only the valid rows go through the arithmetic.
+        valid   = ~np.isnat(dates) & ~np.isnan(days)
+        shifted = np.full(len(dates), np.datetime64('NaT'), dtype = 'datetime64[D]')
+        shifted[valid] = dates[valid] + days[valid].astype(np.int64).astype('timedelta64[D]')
+
+        return shifted
+
+
     def _date_from_string(self, date_str_list: list, date_format = "%Y/%m/%d") -> datetime:
         '''
         Given a `str` date, returns the date in a `date.time` format.
@@ -297,15 +642,100 @@ class Scraper():
         Returns the closest `datetime` date for which a snapshot is available.
         '''
 
-        masked = np.array(real_dates)[np.array(real_dates) <=candidate_date]   # Filter possible candidate dates.
-        if len(masked) == 0:
-            closest = candidate_date
-        else:
-            closest = masked[(candidate_date - np.array([filtered for filtered in masked])).argmin()]
+        real_dates = np.asarray(real_dates)
+        masked     = real_dates[real_dates <= candidate_date]   # Filter possible candidate dates.
+
+        # The closest date in the past is simply the latest one.
+        closest = candidate_date if len(masked) == 0 else masked.max()
 
         return closest
 
 
+    def to_ragged(self, url_dates: dict) -> tuple:
+        '''
+        Packs the snapshot dates of many `URL`'s into two flat arrays, as expected by `get_closest_batch`.
+
+        Parameters
+        ---
+        url_dates : dict
+            A `dict` containing, for each `URL`, the dates for which a snapshot is available, as returned
+            by `get_snap_dates`.
+
+        Output
+        ---
+        A tuple `(offsets, values)`: the dates of the i-th `URL` are `values[offsets[i]:offsets[i + 1]]`,
+        sorted, and `values` is of type `datetime64[D]`.
+        '''
+
+        lengths = [len(dates) for dates in url_dates.values()]
+        offsets = np.concatenate([[0], np.cumsum(lengths)]).astype(np.int64)
+
+        if offsets[-1] == 0:
+            return offsets, np.array([], dtype = 'datetime64[D]')
+
+        values  = np.concatenate([np.asarray(dates, dtype = 'datetime64[D]') for dates in url_dates.values() if len(dates) > 0])
+        segment = np.repeat(np.arange(len(lengths)), lengths)
+        values  = values[np.lexsort((values, segment))]       # Sort the dates within each URL.
+
+        return offsets, values
+
+
+    def get_closest_batch(self, offsets: np.ndarray, values: np.ndarray, candidate_dates: list) -> np.ndarray:
+        '''
+        Same as `get_closest`, but for many `URL`'s at once: a single `np.searchsorted` over all of them.
+
+        Parameters
+        ---
+        offsets : np.ndarray
+            Array of length N + 1. The dates of the i-th `URL` are `values[offsets[i]:offsets[i + 1]]`;
+
+        values : np.ndarray
+            Snapshot dates of all the `URL`'s, of type `datetime64[D]` and sorted within each `URL`;
+
+        candidate_dates : list
+            The N initial dates shifted in the future, one per `URL`.
+
+        Output
+        ---
+        A `np.array` of type `datetime64[D]` with the closest date in the past of each `URL`. When no
+        snapshot precedes the candidate (e.g. the `URL` has none), the candidate itself is returned; a `NaT`
+        candidate gives `NaT`. `NaT` snapshots are ignored.
+        '''
+
+        offsets    = np.asarray(offsets, dtype = np.int64)
+        candidates = np.asarray(candidate_dates, dtype = 'datetime64[D]')
+        values     = np.asarray(values, dtype = 'datetime64[D]')
+
+        # NaT is the smallest int64 and would overflow the keys: the NaT snapshots are dropped, and the NaT
+        # candidates are left out of the search.
+        kept = ~np.isnat(values)
+        if not kept.all():
+            offsets = np.concatenate([[0], np.cumsum(kept)])[offsets]
+            values  = values[kept]
+
+        valid = ~np.isnat(candidates)
+        if len(values) == 0 or not valid.any():
+            return candidates
+
+        days       = values.astype(np.int64)
+        cand_days  = np.where(valid, candidates.astype(np.int64), days.min())
+
+        # Give each URL its own disjoint range of keys, so that one sorted array covers all of them.
+        lowest  = min(days.min(), cand_days.min())
+        stride  = max(days.max(), cand_days.max()) - lowest + 1
+        segment = np.repeat(np.arange(len(offsets) - 1), np.diff(offsets))
+
+        keys    = segment * stride + (days - lowest)
+        queries = np.arange(len(candidates)) * stride + (cand_days - lowest)
+
+        # Position of the last snapshot not later than the candidate, -1 if none. It belongs to the URL only if
+        # it is within the snapshots of that URL, so an URL without any never finds one.
+        position = np.searchsorted(keys, queries, side = 'right') - 1
+        found    = valid & (position >= offsets[:-1]) & (position < offsets[1:])
+
+        return np.where(found, values[np.clip(position, 0, None)], candidates)
+
+
     def _dates_from_html(self, url_html: dict) -> dict:
         '''
         Extracts the dates within the `HTML` for which a snapshot is available.
@@ -320,6 +750,12 @@ class Scraper():
         A `dict` containing the candidate dates within the `HTML`.
         '''
 
+        if self.__backend__ == 'index':
+
+            self.__url_dates__ = self._get_index_dates(list(url_html.keys()))
+
+            return self.__url_dates__
+
         self.__url_dates__ = {}
 
         # Iterate over the URLs.
@@ -402,8 +838,9 @@ class Scraper():
         The closest date to `candidate_date` in the past.
         '''
 
-        masked = np.array(snap_dates)[np.array(snap_dates) <= candidate_date]                       # Filter possible candidate dates.
-        closest = masked[(candidate_date - np.array([filtered for filtered in masked])).argmin()]   # Retrieve the closest date.
+        snap_dates = np.asarray(snap_dates)
+        masked     = snap_dates[snap_dates <= candidate_date]      # Filter possible candidate dates.
+        closest    = masked.max()                                  # Retrieve the closest date.
 
         return closest
 
@@ -439,7 +876,7 @@ class ScrapePast(Scraper):
 
     def __init__(self):
 
-        self = self
+        super().__init__()
 
 
     def set_url(self, url: list) -> None:
@@ -456,44 +893,144 @@ class ScrapePast(Scraper):
         super().set_url(url)
 
     
-    def recall_past(self, old_url: list):
+    def recall_past(self, old_url: list, n_fetchers: int = 4, n_parsers: int = None, rate: float = 1.0,
+                    parser: str = 'html.parser', keep_html: bool = False, retries: int = 3) -> tuple:
+        '''
+        Retrieves the archived articles and extracts their keywords and the number of images and videos.
+        Downloads run on a pool of threads, while the parsing runs on a pool of processes as soon as
+        each page arrives. Only the extracted information is sent back, not the parsed page.
+
+        Parameters
+        ---
+        old_url : list
+            List of Wayback `URL`'s of the articles, e.g. the values returned by `switch_date`;
+
+        n_fetchers : int, default = 4
+            Number of threads downloading the pages;
+
+        n_parsers : int, default = None
+            Number of processes parsing the pages. If `None`, one per CPU;
+
+        rate : float, default = 1.0
+            Maximum number of requests per second sent to the archive;
+
+        parser : str, default = 'html.parser'
+            Parser used by `BeautifulSoup`, e.g. 'lxml' if installed;
+
+        keep_html : bool, default = False
+            If `True`, the raw pages are kept in memory as `bytes`. It is rarely needed and expensive;
+
+        retries : int, default = 3
+            Number of times a failed download (network error or a status other than 2xx) is tried again, with an
+            exponential backoff, before giving up. Failed pages are never cached nor parsed.
+
+        Output
+        ---
+        A tuple `(old_url_html, url_info)`. The first is empty unless `keep_html`, the second is structured as follows:
+        >>> {URL_0 : {'keywords' : [...], 'imgs' : n_imgs, 'videos' : n_videos},
+        >>>  URL_1 : {'keywords' : [...], 'imgs' : n_imgs, 'videos' : n_videos},
+        >>>  ...
+        >>> }
+        '''
 
+        old_url = list(old_url)
         self.__old_url_html__ = {}
         self.__url_info__ = {}
-        
-        for url in old_url:
-
-            time.sleep(1)
-            print(f"URL: {url}")
-            print("\n\t\t -- REQUEST SENT --")
-            toc = time.time()
-            html = requests.get(url)
-            tic = time.time()
-            print("\n\t\t-- HTML ACQUIRED! --")
-            print(f"\nTime: {(tic - toc):.4f}")
-            print("")
-            soup = BeautifulSoup(html.content, 'html.parser')
-            self.__url_info__[f'{url}'] = {}
-
-            meta_tag = soup.find('meta', attrs={'name': 'keywords', 'data-page-subject': 'true'})
-
-            # Extract the content attribute value as a string
-            keywords_string = meta_tag['content']
-
-            # Split the keywords into a list
-            keywords_list = keywords_string.split(', ')
-            
-            imgs   = soup.select('.article-content img')
-            videos = soup.select('.article-content iframe')
 
-            self.__old_url_html__[f"{url}"] = soup
-            self.__url_info__[f"{url}"]['keywords'] = keywords_list
-            self.__url_info__[f"{url}"]['imgs'] = len(imgs)
-            self.__url_info__[f"{url}"]['videos'] = len(videos)
+        limiter = RateLimiter(rate)
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections = 1, pool_maxsize = n_fetchers)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers = n_fetchers) as fetchers, \
+             concurrent.futures.ProcessPoolExecutor(max_workers = n_parsers) as parsers:
+
+            fetched = {fetchers.submit(self._fetch_past, session, limiter, url, retries): url for url in old_url}
+            parsed  = {}
+
+            # Hand each page over to the parsers as soon as it is downloaded.
+            for future in concurrent.futures.as_completed(fetched):
+
+                url     = fetched[future]
+                content = future.result()
+                print(f"URL: {url}\t-- HTML ACQUIRED! --")
+
+                parsed[url] = parsers.submit(_extract_article, content, parser)
+                if keep_html:
+                    self.__old_url_html__[url] = content
+
+            # Collect the results in the same order as the input.
+            for url in old_url:
+                self.__url_info__[url] = parsed[url].result()
+
+        session.close()
 
         return self.__old_url_html__, self.__url_info__
 
 
+    def _fetch_past(self, session: requests.Session, limiter: RateLimiter, url: str, retries: int = 3) -> bytes:
+        '''
+        Returns the raw page of `url`, from the cache if possible. Errors (e.g. 429, 503, 404) raise before the
+        page reaches the cache, and are retried `retries` times before being raised to the caller.
+        '''
+
+        def download() -> bytes:
+
+            limiter.wait(urlparse(url).netloc)
+            toc  = time.time()
+            html = session.get(url, timeout = 60)
+            tic  = time.time()
+            print(f"{url}\tTime: {(tic - toc):.4f}\tStatus: {html.status_code}")
+
+            # An error page must be neither stored nor parsed as an article.
+            html.raise_for_status()
+
+            return html.content
+
+        for attempt in range(retries + 1):
+
+            try:
+                if self.__cache__ is not None:
+                    return self.__cache__.fetch(url, download)
+                return download()
+
+            except requests.RequestException:
+                if attempt == retries:
+                    raise
+                time.sleep(2 ** attempt)
+
+
+def _extract_article(content: bytes, parser: str = 'html.parser') -> dict:
+    '''
+    Parses an archived article and returns its keywords and the number of images and videos. Defined at
+    module level so that it can be sent to the worker processes of `ScrapePast.recall_past`.
+
+    Parameters
+    ---
+    content : bytes
+        The raw page;
+
+    parser : str, default = 'html.parser'
+        Parser used by `BeautifulSoup`.
+
+    Output
+    ---
+    A `dict` with the keys 'keywords', 'imgs' and 'videos'.
+    '''
+
+    soup = BeautifulSoup(content, parser)
+
+    # Extract the content attribute value as a string, and split the keywords into a list.
+    meta_tag      = soup.find('meta', attrs={'name': 'keywords', 'data-page-subject': 'true'})
+    keywords_list = meta_tag['content'].split(', ') if meta_tag is not None else []
+
+    imgs   = soup.select('.article-content img')
+    videos = soup.select('.article-content iframe')
+
+    return {'keywords' : keywords_list, 'imgs' : len(imgs), 'videos' : len(videos)}
+
+
 class ScrapeTrends(Scraper):
 
 
@@ -503,7 +1040,7 @@ class ScrapeTrends(Scraper):
         of trends from the Wayback Machine.
         '''
 
-        self = self
+        super().__init__()
 
 
     def recall_trend(self, url_html: dict) -> dict: 
@@ -514,7 +1051,7 @@ class ScrapeTrends(Scraper):
         Parameters
         ---
         url_html : dict
-            Dictionary containing the `URL's and the related `HTML` files.
+            Dictionary containing the `URL's and the related `HTML` files, either parsed or raw.
         
         Output
         ---
@@ -529,7 +1066,13 @@ class ScrapeTrends(Scraper):
             url_trends[f"{url}"] = []
             html = url_html[url]
 
-            text = html.text
+            # Raw pages (e.g. read back from the cache) are searched as they are, without being parsed.
+            if isinstance(html, bytes):
+                text = html.decode(errors = 'ignore')
+            elif isinstance(html, str):
+                text = html
+            else:
+                text = html.text
             channels = re.findall(r'(?<="channel":")[^"]*', text)
 
             url_trends[f"{url}"].extend(channels)
@@ -0,0 +1,181 @@
+import json
+import numpy as np
+
+from scipy import stats
+
+
+class TPESampler():
+
+    def __init__(self, space: dict, n_startup: int = 10, n_candidates: int = 24, gamma: float = 0.25,
+                 random_state: int = None):
+        '''
+        Builds a `TPESampler` object. It proposes configurations with the Tree-structured Parzen Estimator: the
+        configurations observed so far are split into the best `gamma` fraction and the rest, a density is fitted
+        on each group, and the candidates most likely under the first density relative to the second are proposed.
+        Everything runs locally, on the history of the search.
+
+        Each parameter is mapped to the unit interval through the `CDF` of its distribution, so that the densities
+        do not depend on its scale (e.g. a log-uniform parameter is searched uniformly in the log space).
+
+        Parameters
+        ---
+        space : dict
+            Search space of a model. Each parameter is either a list of values, drawn uniformly, or a frozen
+            `scipy.stats` distribution, e.g. `scipy.stats.loguniform(1e-3, 1e2)` or `scipy.stats.randint(1, 10)`;
+
+        n_startup : int, default = 10
+            Number of configurations drawn at random before the densities are used;
+
+        n_candidates : int, default = 24
+            Number of candidates drawn for each proposal;
+
+        gamma : float, default = 0.25
+            Fraction of the observed configurations considered good;
+
+        random_state : int, default = None
+            Seed of the sampler.
+
+        Examples
+        ---
+        >>> space = {'C'       : stats.loguniform(1e-2, 1e2),
+        >>>          'epsilon' : stats.uniform(0.0, 2.0),
+        >>>          'kernel'  : ['linear', 'rbf']}
+        '''
+
+        for name, values in space.items():
+            if not isinstance(values, (list, tuple, np.ndarray)) and not hasattr(values, 'ppf'):
+                raise TypeError(f"Parameter '{name}' must be a list of values or a scipy.stats distribution.")
+
+        self.__space__        = space
+        self.__n_startup__    = n_startup
+        self.__n_candidates__ = n_candidates
+        self.__gamma__        = gamma
+        self.__rng__          = np.random.RandomState(random_state)
+
+        self.__history__    = []        # List of (position of each parameter, loss)
+        self.__seen__       = set()     # Configurations already proposed, as JSON
+        self.__n_proposed__ = 0
+
+
+    def __len__(self) -> int:
+
+        return self.__n_proposed__
+
+
+    def __encode__(self, name: str, value) -> float:
+        '''
+        Returns the position of `value` in the unit interval, or its index if the parameter is a list.
+        '''
+
+        values = self.__space__[name]
+
+        if not hasattr(values, 'ppf'):
+            return [repr(v) for v in values].index(repr(value))
+
+        # A discrete value covers the CDF from the previous value to itself: take the middle.
+        if isinstance(values.dist, stats.rv_discrete):
+            return float((values.cdf(value) + values.cdf(value - 1)) / 2)
+
+        return float(values.cdf(value))
+
+
+    def __decode__(self, name: str, position: float):
+        '''
+        Returns the value of a parameter from its position, see `__encode__`.
+        '''
+
+        values = self.__space__[name]
+
+        if not hasattr(values, 'ppf'):
+            value = values[int(position)]
+            return value.item() if hasattr(value, 'item') else value
+
+        value = values.ppf(np.clip(position, 1e-6, 1 - 1e-6))
+
+        return int(value) if isinstance(values.dist, stats.rv_discrete) else float(value)
+
+
+    def __parzen__(self, name: str, positions: np.ndarray, candidates: np.ndarray = None, n: int = 0):
+        '''
+        Parzen estimator of a parameter fitted on the observed `positions`, mixed with the uniform prior. If
+        `candidates` is given, returns their log density, otherwise draws `n` of them.
+        '''
+
+        values = self.__space__[name]
+        prior  = 1.0 / (len(positions) + 1)
+
+        if not hasattr(values, 'ppf'):
+
+            # Counts of each value, smoothed by the prior.
+            weights  = np.bincount(positions.astype(int), minlength = len(values)) + prior
+            weights /= weights.sum()
+
+            if candidates is None:
+                return self.__rng__.choice(len(values), size = n, p = weights).astype(float)
+
+            return np.log(weights[candidates.astype(int)])
+
+        sigma = np.clip(1.06 * np.std(positions) * len(positions) ** -0.2, 0.05, 0.5) if len(positions) > 0 else 0.5
+
+        if candidates is None:
+
+            centers = self.__rng__.choice(positions, size = n) if len(positions) > 0 else np.zeros(n)
+            draws   = np.clip(centers + sigma * self.__rng__.randn(n), 0.0, 1.0)
+            uniform = self.__rng__.rand(n) < prior
+
+            return np.where(uniform, self.__rng__.rand(n), draws)
+
+        kernels = stats.norm.pdf(candidates[:, None], loc = positions[None, :], scale = sigma).mean(axis = 1) if len(positions) > 0 else 0.0
+
+        return np.log(prior + (1 - prior) * kernels)
+
+
+    def propose(self, n: int = 1) -> list:
+        '''
+        Returns `n` new configurations. Configurations already proposed are avoided as long as possible.
+        '''
+
+        names    = list(self.__space__.keys())
+        proposed = []
+
+        for _ in range(n):
+
+            if len(self.__history__) < self.__n_startup__:
+
+                candidates = np.array([self.__parzen__(name, np.array([]), n = self.__n_candidates__) for name in names])
+                scores     = np.zeros(self.__n_candidates__)
+
+            else:
+
+                # Split the history: the best gamma fraction (the lower the loss, the better) and the rest.
+                history = sorted(self.__history__, key = lambda observation: observation[1])
+                n_good  = max(1, int(np.ceil(self.__gamma__ * len(history))))
+                good    = np.array([positions for positions, _ in history[:n_good]])
+                bad     = np.array([positions for positions, _ in history[n_good:]])
+
+                candidates = np.array([self.__parzen__(name, good[:, i], n = self.__n_candidates__) for i, name in enumerate(names)])
+                scores     = sum(self.__parzen__(name, good[:, i], candidates[i]) -
+                                 self.__parzen__(name, bad[:, i] if len(bad) > 0 else np.array([]), candidates[i])
+                                 for i, name in enumerate(names))
+
+            configs = [{name: self.__decode__(name, candidates[i, j]) for i, name in enumerate(names)}
+                       for j in range(self.__n_candidates__)]
+
+            # The most promising candidate not proposed yet, otherwise the most promising one.
+            order  = np.argsort(-scores, kind = 'stable')
+            unseen = [j for j in order if json.dumps(configs[j], sort_keys = True, default = repr) not in self.__seen__]
+            config = configs[unseen[0] if len(unseen) > 0 else order[0]]
+
+            self.__seen__.add(json.dumps(config, sort_keys = True, default = repr))
+            self.__n_proposed__ += 1
+            proposed.append(config)
+
+        return proposed
+
+
+    def observe(self, config: dict, loss: float) -> None:
+        '''
+        Adds the result of a configuration to the history. The lower the `loss`, the better.
+        '''
+
+        self.__history__.append(([self.__encode__(name, config[name]) for name in self.__space__.keys()], float(loss)))
@@ -0,0 +1,137 @@
+import os
+import re
+import glob
+import pickle
+import argparse
+import pandas as pd
+
+from Journal import ScrapeJournal
+
+
+class SnapshotStore():
+
+    def __init__(self, path: str = 'url_html/snapshots.parquet'):
+        '''
+        Builds a `SnapshotStore` object. It gives access to the closest snapshot date of every scraped `URL`,
+        kept in a single `Parquet` table with columns `url`, `closest_date` and `scraped_at`.
+
+        Parameters
+        ---
+        path : str, default = 'url_html/snapshots.parquet'
+            Location of the table.
+        '''
+
+        self.__path__  = path
+        self.__table__ = None
+
+
+    def compact(self, pattern: str = 'url_html/url_html*.pkl', journal: str = 'url_html/journal.jsonl') -> pd.DataFrame:
+        '''
+        Merges the pickle files written by `Scraper.scrape` and the journal into the table, and writes it to disk.
+        If the same `URL` appears more than once, the most recent result is kept. `URL`'s without a date (`None`,
+        `NaT`) are left out, as in the journal.
+
+        Parameters
+        ---
+        pattern : str, default = 'url_html/url_html*.pkl'
+            Pattern matching the pickle files;
+
+        journal : str, default = 'url_html/journal.jsonl'
+            Location of the journal. Ignored if it does not exist.
+
+        Output
+        ---
+        The compacted table, indexed by `url`.
+        '''
+
+        frames = []
+        shards = sorted(glob.glob(pattern), key = lambda path: [int(n) for n in re.findall(r'\d+', os.path.basename(path))])
+
+        for shard in shards:
+
+            with open(shard, 'rb') as file:
+                batch = {url: closest for url, closest in pickle.load(file).items() if not pd.isna(closest)}
+
+            frames.append(pd.DataFrame({'url'          : list(batch.keys()),
+                                        'closest_date' : [str(closest)[:10] for closest in batch.values()],
+                                        'scraped_at'   : os.path.getmtime(shard)}))
+
+        if os.path.exists(journal):
+
+            log = ScrapeJournal(journal)
+            frames.append(pd.DataFrame({'url'          : list(log.get_results().keys()),
+                                        'closest_date' : [str(closest) for closest in log.get_results().values()],
+                                        'scraped_at'   : list(log.get_commit_times().values())}))
+
+        table = pd.concat(frames, ignore_index = True) if frames else pd.DataFrame(columns = ['url', 'closest_date', 'scraped_at'])
+        table['closest_date'] = pd.to_datetime(table['closest_date'])
+        table['scraped_at']   = pd.to_datetime(table['scraped_at'], unit = 's')
+
+        # Stable sort on the time, then keep the last occurrence of every URL.
+        table = table.sort_values('scraped_at', kind = 'stable').drop_duplicates('url', keep = 'last')
+        table = table.set_index('url').sort_index()
+
+        if os.path.dirname(self.__path__):
+            os.makedirs(os.path.dirname(self.__path__), exist_ok = True)
+        table.to_parquet(self.__path__)
+        self.__table__ = table
+
+        return table
+
+
+    def load(self) -> pd.DataFrame:
+        '''
+        Reads the table from disk, once. Later calls return the table already in memory.
+        '''
+
+        if self.__table__ is None:
+            self.__table__ = pd.read_parquet(self.__path__)
+
+        return self.__table__
+
+
+    def lookup(self, url: str):
+        '''
+        Returns the closest snapshot date of `url`, or `None` if it was never scraped. The `URL`'s are
+        hashed by the index of the table, so the lookup does not depend on its size.
+        '''
+
+        table = self.load()
+
+        if url not in table.index:
+            return None
+
+        return table.at[url, 'closest_date'].date()
+
+
+    def join(self, data: pd.DataFrame, on: str = 'url') -> pd.DataFrame:
+        '''
+        Adds the columns `closest_date` and `scraped_at` to `data`, matching its `on` column with the `URL`'s
+        of the table. Rows never scraped get `NaT`.
+
+        Parameters
+        ---
+        data : pd.DataFrame
+            Any frame with a column of `URL`'s, e.g. the one read from 'development.csv';
+
+        on : str, default = 'url'
+            Name of the column containing the `URL`'s.
+
+        Output
+        ---
+        A new `pd.DataFrame`, with the same rows and order as `data`.
+        '''
+
+        return data.join(self.load(), on = on)
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description = 'Merge the scraped snapshot dates into a single Parquet table.')
+    parser.add_argument('--pattern', default = 'url_html/url_html*.pkl', help = 'pattern of the pickle files')
+    parser.add_argument('--journal', default = 'url_html/journal.jsonl', help = 'location of the journal')
+    parser.add_argument('--output',  default = 'url_html/snapshots.parquet', help = 'location of the table')
+    args = parser.parse_args()
+
+    table = SnapshotStore(args.output).compact(args.pattern, args.journal)
+    print(f"{len(table)} URL's written to {args.output}")
@@ -0,0 +1,58 @@
+#\-- BENCHMARK: CHUNKED INGESTION --/#
+# Reads a CSV of the dataset at once with DATA_TYPES (as the notebooks do) and chunk by chunk with COMPACT_TYPES,
+# and reports the wall time, the memory of the frame and the peak memory of each. The file is the evaluation set
+# repeated N_COPIES times, written to a temporary folder. Run from the root of the repository:
+#       python benchmarks/bench_chunked_ingest.py
+
+import os
+import sys
+import time
+import tempfile
+import tracemalloc
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from preprocessing.ingest import ChunkReader, DATA_TYPES, COMPACT_TYPES
+
+N_COPIES  = 25
+CHUNKSIZE = 20000
+
+path = os.path.join(tempfile.mkdtemp(), 'evaluation_large.csv')
+pd.concat([pd.read_csv('data/summer_project_dataset/evaluation.csv')] * N_COPIES, ignore_index = True).to_csv(path, index = False)
+
+
+def read_at_once():
+
+    data = pd.read_csv(path, dtype = DATA_TYPES)
+    return len(data), data.memory_usage(deep = True).sum()
+
+
+def read_in_chunks():
+
+    n_rows, largest = 0, 0
+    for chunk in ChunkReader(path, chunksize = CHUNKSIZE, dtype = COMPACT_TYPES):
+        n_rows += len(chunk)
+        largest = max(largest, chunk.memory_usage(deep = True).sum())
+
+    return n_rows, largest
+
+
+results = {}
+for name, method in [('read_csv + DATA_TYPES', read_at_once), ('ChunkReader + COMPACT', read_in_chunks)]:
+
+    tracemalloc.start()
+    toc = time.perf_counter()
+    n_rows, frame = method()
+    tic = time.perf_counter()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    results[name] = (n_rows, tic - toc, frame, peak)
+
+assert len(set(n_rows for n_rows, _, _, _ in results.values())) == 1
+
+print(f"File: {os.path.getsize(path) / 2 ** 20:.1f} MB, {results['read_csv + DATA_TYPES'][0]} rows, chunks of {CHUNKSIZE}\n")
+for name, (_, elapsed, frame, peak) in results.items():
+    print(f"{name:<22} {elapsed:8.2f} s   frame (largest chunk) {frame / 2 ** 20:7.1f} MB   peak {peak / 2 ** 20:7.1f} MB")
+
+os.remove(path)
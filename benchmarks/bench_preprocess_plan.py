@@ -0,0 +1,83 @@
+#\-- BENCHMARK: PrunedCV.preprocess VS PreprocessPlan --/#
+# Runs the transform of a fold (fit on 80% of the rows, applied to the other 20%) with PrunedCV.preprocess
+# (a copy of the data at each step) and with PreprocessPlan (masks computed once, one output buffer), checks that
+# both give the same matrices bit for bit, and reports the best wall time and the peak memory of each. Run from the
+# root of the repository, optionally with the path of the development set:
+#       python benchmarks/bench_preprocess_plan.py [data/summer_project_dataset/development.csv]
+
+import os
+import sys
+import time
+import tracemalloc
+import numpy as np
+import pandas as pd
+
+from sklearn.model_selection import KFold
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Pruned import PrunedCV
+from Plan import PreprocessPlan
+
+N_ROWS   = 30000
+N_REPEAT = 5
+SEED     = 42
+PATH     = sys.argv[1] if len(sys.argv) > 1 else 'data/summer_project_dataset/development.csv'
+
+# Without the development set, the evaluation one (same columns, no target) with a log-normal target.
+if os.path.exists(PATH):
+    data = pd.read_csv(PATH)
+else:
+    PATH = 'data/summer_project_dataset/evaluation.csv'
+    data = pd.read_csv(PATH)
+    data['shares'] = np.round(np.exp(np.random.RandomState(SEED).randn(len(data)) * 0.9 + 7.3)).astype(int)
+
+data = data.drop(columns = 'id', errors = 'ignore').sample(N_ROWS, replace = True, random_state = SEED).reset_index(drop = True)
+X, y = data.drop(columns = 'shares'), data['shares']
+
+train_indices, valid_indices = next(KFold(n_splits = 5, shuffle = True, random_state = SEED).split(X))
+cross_validator = PrunedCV(X, y, KFold(n_splits = 5))
+plan            = PreprocessPlan()
+
+
+def run_preprocess():
+
+    X_train, y_train, means, p = cross_validator.preprocess(X.iloc[train_indices].copy(), y.iloc[train_indices].copy())
+    X_valid, y_valid, _, _     = cross_validator.preprocess(X.iloc[valid_indices].copy(), y.iloc[valid_indices].copy(),
+                                                            p = p, train = False, means = means)
+    return X_train, y_train, X_valid, y_valid, means
+
+
+def run_plan():
+
+    X_train, y_train, means, p = plan.execute(X.iloc[train_indices], y.iloc[train_indices])
+    X_valid, y_valid, _, _     = plan.execute(X.iloc[valid_indices], y.iloc[valid_indices], p = p, train = False, means = means)
+
+    return X_train, y_train, X_valid, y_valid, means
+
+
+timings = {}
+for name, method in [('preprocess', run_preprocess), ('PreprocessPlan', run_plan)]:
+
+    best = np.inf
+    for _ in range(N_REPEAT):
+        toc = time.perf_counter()
+        result = method()
+        tic = time.perf_counter()
+        best = min(best, tic - toc)
+
+    tracemalloc.start()
+    method()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    timings[name] = (best, peak, result)
+
+# Same matrices, same targets, same means.
+for legacy, fused in zip(timings['preprocess'][2][:4], timings['PreprocessPlan'][2][:4]):
+    assert np.array_equal(np.asarray(legacy), np.asarray(fused))
+assert timings['preprocess'][2][4] == timings['PreprocessPlan'][2][4]
+
+print(f"Data: {PATH}, {N_ROWS} rows, train {len(train_indices)} / validation {len(valid_indices)}\n")
+for name, (best, peak, _) in timings.items():
+    print(f"{name:<16} {best * 1000:10.2f} ms   peak {peak / 2 ** 20:6.1f} MB")
+print(f"Speed-up: {timings['preprocess'][0] / timings['PreprocessPlan'][0]:.1f}x")
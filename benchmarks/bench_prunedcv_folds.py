@@ -0,0 +1,63 @@
+#\-- BENCHMARK: FOLD VIEWS IN PrunedCV --/#
+# Runs the same grid with fold_views = False (new pd.DataFrame's for every configuration and fold) and with
+# fold_views = True (fold indices cached, data converted once and gathered into preallocated buffers), and
+# reports the wall time per configuration and the extra memory needed by the sweep (the conversion of the data
+# is done once, when PrunedCV is built, and is reported apart). Run from the root of the repository:
+#       python benchmarks/bench_prunedcv_folds.py
+
+import os
+import io
+import sys
+import time
+import tracemalloc
+import contextlib
+import numpy as np
+import pandas as pd
+
+from sklearn.model_selection import KFold
+from sklearn.metrics import mean_squared_error
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Pruned import PrunedCV
+
+N_ROWS    = 30000
+N_COLUMNS = 50
+SEED      = 42
+
+rng = np.random.RandomState(SEED)
+X   = pd.DataFrame(rng.randn(N_ROWS, N_COLUMNS), columns = [f"x_{i}" for i in range(N_COLUMNS)])
+y   = pd.Series(X.to_numpy() @ rng.randn(N_COLUMNS) + rng.randn(N_ROWS))
+
+# A cheap model, so that the time spent on the data is not hidden by the fits.
+param_grid = {'sklearn.linear_model.Ridge' : {'alpha' : list(np.logspace(-3, 3, 10))}}
+n_configs  = len(param_grid['sklearn.linear_model.Ridge']['alpha'])
+
+results = {}
+for fold_views in [False, True]:
+
+    tracemalloc.start()
+
+    cross_validator = PrunedCV(X, y, KFold(n_splits = 5, shuffle = True, random_state = SEED), fold_views = fold_views)
+    cross_validator.set_params(param_grid, [mean_squared_error])
+    cross_validator.set_evaluation(mean_squared_error)
+    setup, _ = tracemalloc.get_traced_memory()
+    tracemalloc.reset_peak()
+
+    toc = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        cross_validator.do_cross_validation()
+    tic = time.perf_counter()
+
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    results[fold_views] = (tic - toc, setup, peak - setup, cross_validator.get_performance())
+
+# Same scores either way.
+for config, performance in results[False][3]['Ridge'].items():
+    assert np.allclose(performance['mean_squared_error'], results[True][3]['Ridge'][config]['mean_squared_error'])
+
+print(f"Data: {N_ROWS} x {N_COLUMNS}, {n_configs} configurations, 5 folds\n")
+for fold_views, (elapsed, setup, peak, _) in results.items():
+    print(f"fold_views = {str(fold_views):<5}  {elapsed / n_configs * 1000:8.1f} ms per configuration   "
+          f"setup {setup / 2 ** 20:6.1f} MB   sweep peak {peak / 2 ** 20:6.1f} MB")
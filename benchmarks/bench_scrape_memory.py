@@ -0,0 +1,94 @@
+#\-- BENCHMARK: MEMORY OF Scraper.scrape --/#
+# Feeds Scraper.scrape with a synthetic calendar page instead of a real browser, and samples the resident
+# memory while the URL's are processed. The lean mode commits to a journal as a real run does, and its memory
+# must stay flat; the eager mode keeps every parsed page and is run on fewer URL's, just to show the growth.
+# Run from the root of the repository:
+#       python benchmarks/bench_scrape_memory.py [N_URLS]
+
+import os
+import io
+import sys
+import time
+import resource
+import tempfile
+import contextlib
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Scraper import Scraper
+from Journal import ScrapeJournal
+
+N_URLS   = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+N_EAGER  = 500
+N_SAMPLE = 10
+
+
+def build_calendar() -> str:
+    '''
+    A calendar with 12 months of 31 days, a snapshot every third day.
+    '''
+
+    months = []
+    for _ in range(12):
+        days = ''.join('<div class="month-day-container"><div style="touch-action: pan-y; user-select: none;">'
+                       f'{day}</div></div>' if day % 3 == 0 else
+                       f'<div class="month-day-container"><div>{day}</div></div>' for day in range(1, 29))
+        months.append(f'<div class="month">{days}</div>')
+
+    return '<html><body>' + ''.join(months) + '</body></html>'
+
+
+class FakeDriver():
+
+    page_source = build_calendar()
+
+    def get(self, url):
+        pass
+
+
+def rss_mb() -> float:
+    '''
+    Current resident memory of the process, in MB.
+    '''
+
+    with open('/proc/self/statm') as file:
+        pages = int(file.read().split()[1])
+
+    return pages * resource.getpagesize() / 2 ** 20
+
+
+def run(n_urls: int, lean: bool) -> list:
+
+    url = [f"http://mashable.com/2013/01/{1 + i % 28:02d}/article-{i}/" for i in range(n_urls)]
+    scrap = Scraper()
+    scrap.set_url(pd.DataFrame({'url' : url, 'timedelta' : 700}))
+    scrap.set_journal(ScrapeJournal(os.path.join(tempfile.mkdtemp(), 'journal.jsonl')))
+    scrap.__driver__ = FakeDriver()
+
+    # Scrape in chunks, sampling the memory in between, and keep whatever the scraper returns.
+    samples = []
+    stored  = {}
+    done    = 0
+    for chunk in np.array_split(np.array(url), N_SAMPLE):
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            stored.update(scrap.scrape(list(chunk), backup = lean, lean = lean, pause = 0, restart_every = 0))
+        done += len(chunk)
+        samples.append((done, rss_mb()))
+
+    return samples
+
+
+print(f"Calendar page: {len(FakeDriver.page_source) / 1024:.1f} KB\n")
+
+for name, n_urls, lean in [('lean', N_URLS, True), ('eager', N_EAGER, False)]:
+
+    toc = time.time()
+    samples = run(n_urls, lean)
+    tic = time.time()
+
+    print(f"{name} ({n_urls} URL's, {tic - toc:.1f} s)")
+    for count, rss in samples:
+        print(f"\t{count:>7} URL's\t{rss:8.1f} MB")
+    print(f"\tGrowth per 1000 URL's: {(samples[-1][1] - samples[0][1]) / max(samples[-1][0] - samples[0][0], 1) * 1000:.2f} MB\n")
@@ -0,0 +1,45 @@
+#\-- BENCHMARK: SHIFTING THE DATES OF THE URL'S --/#
+# Compares Scraper.shift_dates (one regex and one timedelta per URL) with Scraper.shift_dates_frame
+# (a single columnar pass). Run from the root of the repository:
+#       python benchmarks/bench_shift_dates.py
+
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Scraper import Scraper
+
+N_ROWS   = 30000
+N_REPEAT = 5
+
+# The evaluation set has the same url/timedelta columns as the development one.
+data = pd.read_csv('data/summer_project_dataset/evaluation.csv', usecols = ['url', 'timedelta'])
+data = data.sample(N_ROWS, replace = True, random_state = 42).reset_index(drop = True)
+
+scrap = Scraper()
+scrap.set_url(data)
+
+timings = {}
+for name, method in [('shift_dates', lambda: scrap.shift_dates(data['url'], data['timedelta'])),
+                     ('shift_dates_frame', lambda: scrap.shift_dates_frame(data))]:
+
+    best = np.inf
+    for _ in range(N_REPEAT):
+        toc = time.perf_counter()
+        result = method()
+        tic = time.perf_counter()
+        best = min(best, tic - toc)
+
+    timings[name] = (best, result)
+
+# Both methods must agree on every row.
+loop_dates = np.array(timings['shift_dates'][1], dtype = 'datetime64[D]')
+assert (loop_dates == timings['shift_dates_frame'][1]).all()
+
+print(f"Rows: {N_ROWS}")
+for name, (best, _) in timings.items():
+    print(f"{name:<20} {best * 1000:10.2f} ms")
+print(f"Speed-up: {timings['shift_dates'][0] / timings['shift_dates_frame'][0]:.1f}x")
@@ -0,0 +1,185 @@
+import io
+import os
+import json
+import hashlib
+import numpy as np
+import pandas as pd
+
+# From the root of the repository or from this folder (e.g. eda.ipynb).
+try:
+    from preprocessing.ingest import ChunkReader, COMPACT_TYPES
+    from preprocessing.pipeline import Pipeline
+except ImportError:
+    from ingest import ChunkReader, COMPACT_TYPES
+    from pipeline import Pipeline
+
+# Feather needs pyarrow: without it the raw frames are read from the CSV every time, the features are still cached.
+try:
+    from pyarrow import feather
+except ImportError:
+    feather = None
+
+
+class DatasetCache():
+
+    def __init__(self, cache_dir: str = 'cache/datasets'):
+        '''
+        Builds a `DatasetCache` object. It keeps on disk, in binary columnar formats, what every session used to
+        rebuild from the CSV's: the typed raw frame (Feather, uncompressed) and the feature matrix and target after
+        a `Pipeline` (`.npy`, along with the fitted pipeline). Both are read back from memory-mapped files, so no
+        CSV is parsed again. The features and the target stay memory-mapped (read-only), and processes reading the
+        same files share the same pages; the raw frame is converted once into memory of its own, so that it can be
+        modified in place like a frame read from the CSV.
+
+        Each entry is addressed by a hash of the content of the source file and of everything that changes the
+        result (types, steps of the pipeline, target), so that a stale entry is never used.
+
+        Parameters
+        ---
+        cache_dir : str, default = 'cache/datasets'
+            Folder of the cache. Missing folders are created.
+        '''
+
+        os.makedirs(cache_dir, exist_ok = True)
+
+        self.__cache_dir__ = cache_dir
+        self.__hashes__    = os.path.join(cache_dir, 'hashes')
+        os.makedirs(self.__hashes__, exist_ok = True)
+
+
+    def file_hash(self, path: str) -> str:
+        '''
+        Returns the `SHA-256` of the content of the file. It is remembered, next to the cache, as long as the size
+        and the modification time of the file do not change.
+        '''
+
+        # One small file per version of the source, named after its path and its version: processes never write
+        # the same file, and the versions left behind by a change of the source are removed.
+        stat    = os.stat(path)
+        source  = hashlib.sha256(os.path.abspath(path).encode()).hexdigest()[:16]
+        version = hashlib.sha256(f"{os.path.abspath(path)}:{stat.st_size}:{stat.st_mtime_ns}".encode()).hexdigest()[:16]
+        entry   = os.path.join(self.__hashes__, f"{source}_{version}")
+
+        if os.path.exists(entry):
+            with open(entry) as file:
+                return file.read()
+
+        digest = hashlib.sha256()
+        with open(path, 'rb') as file:
+            for block in iter(lambda: file.read(1 << 20), b''):
+                digest.update(block)
+
+        self.__write__(entry, lambda file: file.write(digest.hexdigest().encode()))
+
+        for name in os.listdir(self.__hashes__):
+            if name.startswith(f"{source}_") and name != os.path.basename(entry) and '.tmp' not in name:
+                try:
+                    os.remove(os.path.join(self.__hashes__, name))
+                except FileNotFoundError:
+                    pass        # Removed by another process.
+
+        return digest.hexdigest()
+
+
+    def __key__(self, *parts) -> str:
+
+        return hashlib.sha256(json.dumps(parts, sort_keys = True, default = repr).encode()).hexdigest()[:32]
+
+
+    def __write__(self, path: str, write) -> None:
+
+        # Written aside and renamed, so that another process never reads a partial file.
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, 'wb') as file:
+            write(file)
+        os.replace(tmp, path)
+
+
+    def raw(self, path: str, dtype: dict = COMPACT_TYPES) -> pd.DataFrame:
+        '''
+        Returns the CSV at `path` read with the types of `dtype` (see `preprocessing.ingest`), from the cache if
+        it is there.
+        '''
+
+        if feather is None:
+            return ChunkReader(path, dtype = dtype).read()
+
+        types  = {column: repr(kind) for column, kind in dtype.items()}
+        cached = os.path.join(self.__cache_dir__, f"raw_{self.__key__(self.file_hash(path), types)}.feather")
+
+        if not os.path.exists(cached):
+            frame = ChunkReader(path, dtype = dtype).read()
+            self.__write__(cached, lambda file: feather.write_feather(frame, file, compression = 'uncompressed'))
+            return frame
+
+        frame = feather.read_table(cached, memory_map = True).to_pandas()
+
+        # Arrow may give back its own string type: same values, cast to the declared one. The other columns already
+        # have their type, and are not copied again.
+        casts = {column: dtype[column] for column in frame.columns
+                 if column in dtype and frame[column].dtype != pd.api.types.pandas_dtype(dtype[column])}
+
+        return frame.astype(casts) if len(casts) > 0 else frame
+
+
+    def features(self, path: str, pipeline: Pipeline, target: str = 'shares', fit: bool = True,
+                 dtype: dict = COMPACT_TYPES) -> tuple:
+        '''
+        Returns the features and the target of the CSV at `path`, from the cache if they are there.
+
+        Parameters
+        ---
+        path : str
+            Location of the CSV;
+
+        pipeline : Pipeline
+            Preprocessing. If `fit`, it is fitted on the data (on a miss) or replaced by the fitted one stored in
+            the cache (on a hit); otherwise it must be fitted already, and is only applied;
+
+        target : str, default = 'shares'
+            Column of the target. If the file does not have it, the target is `None`;
+
+        fit : bool, default = True
+            See `pipeline`;
+
+        dtype : dict, default = COMPACT_TYPES
+            Types the CSV is read with.
+
+        Output
+        ---
+        The features and the target as read-only memory-mapped arrays, and the fitted `Pipeline`.
+        '''
+
+        # A pipeline only applied changes the result through what it has learned: hash that too.
+        fitted = ''
+        if not fit:
+            buffer = io.BytesIO()
+            pipeline.save(buffer)
+            fitted = hashlib.sha256(buffer.getvalue()).hexdigest()
+
+        types = {column: repr(kind) for column, kind in dtype.items()}
+        key   = self.__key__(self.file_hash(path), types, pipeline.get_steps(), target, fit, fitted)
+        files = {name: os.path.join(self.__cache_dir__, f"features_{key}_{name}")
+                 for name in ['X.npy', 'y.npy', 'pipeline.npz']}
+
+        if not os.path.exists(files['X.npy']):
+
+            frame = self.raw(path, dtype)
+            y     = frame.pop(target) if target in frame.columns else None
+
+            if fit:
+                X, y = pipeline.fit_transform(frame, y)
+            else:
+                X = pipeline.transform(frame)
+
+            # The X's last: it marks the entry as complete.
+            if y is not None:
+                self.__write__(files['y.npy'], lambda file: np.save(file, np.asarray(y, dtype = np.float64)))
+            self.__write__(files['pipeline.npz'], lambda file: pipeline.save(file))
+            self.__write__(files['X.npy'], lambda file: np.save(file, np.ascontiguousarray(X)))
+
+        X        = np.load(files['X.npy'], mmap_mode = 'r')
+        y        = np.load(files['y.npy'], mmap_mode = 'r') if os.path.exists(files['y.npy']) else None
+        pipeline = Pipeline.load(files['pipeline.npz'])
+
+        return X, y, pipeline
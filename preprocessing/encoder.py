@@ -0,0 +1,125 @@
+import numpy as np
+import pandas as pd
+
+from scipy import sparse
+
+# Levels of the categorical columns of the dataset, known in advance: every batch gets the same indicators, in
+# the same order, whatever values it happens to contain. The order is the one of `pd.get_dummies` on the full data.
+VOCABULARIES = {'data_channel'             : ['bus', 'entertainment', 'lifestyle', 'socmed', 'tech', 'world'],
+                'weekday'                  : ['Not Weekend', 'Weekend'],
+                'kw_avg_max'               : ['kw_avg_max_high', 'kw_avg_max_medium', 'kw_avg_max_none'],
+                'title_subjectivity'       : ['no_subjectivity', 'low_subjectivity', 'medium_subjectvity',
+                                              'high_subjectivity'],
+                'title_sentiment_polarity' : ['high_negative_polarity', 'low_negative_polarity', 'neutral_polarity',
+                                              'low_positive_polarity', 'high_positive_polarity']}
+
+
+class CategoryEncoder():
+
+    def __init__(self, columns: list, vocabularies: dict = VOCABULARIES, dtype: type = np.int8):
+        '''
+        Builds a `CategoryEncoder` object: one-hot encoding with a vocabulary fixed once and for all. The columns in
+        `vocabularies` use the levels given there, the others the levels seen by `fit`, sorted. After that the
+        indicators never change: a level missing from a batch still has its (empty) column, a missing value has no
+        indicator at all (as with `pd.get_dummies`), and any other value outside the vocabulary raises a
+        `ValueError` instead of silently becoming a row of zeros.
+
+        The indicators are written directly into a `dtype` array or a sparse `CSR` matrix, never into a frame of
+        `object`'s.
+
+        Parameters
+        ---
+        columns : list
+            Columns to encode, in the order their indicators are laid out;
+
+        vocabularies : dict, default = VOCABULARIES
+            Column : list of levels, for the columns whose levels are known in advance;
+
+        dtype : type, default = np.int8
+            Type of the indicators.
+        '''
+
+        self.__columns__      = list(columns)
+        self.__vocabularies__ = {column: list(vocabularies[column]) for column in columns if column in vocabularies}
+        self.__dtype__        = dtype
+
+
+    def fit(self, X) -> 'CategoryEncoder':
+        '''
+        Learns the levels of the columns without a vocabulary. `X` is a `pd.DataFrame` or a `dict` of arrays.
+        '''
+
+        for column in self.__columns__:
+
+            if column in self.__vocabularies__:
+                continue
+
+            values = X[column]
+            if isinstance(getattr(values, 'dtype', None), pd.CategoricalDtype):
+                levels = list(values.cat.categories)
+            else:
+                levels = sorted(pd.Series(np.asarray(values, dtype = object)).dropna().unique())
+
+            self.__vocabularies__[column] = [level.item() if hasattr(level, 'item') else level for level in levels]
+
+        return self
+
+
+    def get_vocabulary(self, column: str) -> list:
+
+        return list(self.__vocabularies__[column])
+
+
+    def get_feature_names(self) -> list:
+        '''
+        Returns the names of the indicators, i.e. the levels, column after column.
+        '''
+
+        return [str(level) for column in self.__columns__ for level in self.__vocabularies__[column]]
+
+
+    def codes(self, column: str, values) -> np.ndarray:
+        '''
+        Returns the position of each value in the vocabulary of `column`, -1 if it is missing. Raises a
+        `ValueError` if a value is neither in the vocabulary nor missing.
+        '''
+
+        values = np.asarray(values, dtype = object)
+        codes  = pd.Index(self.__vocabularies__[column]).get_indexer(values)
+
+        unknown = (codes < 0) & ~pd.isna(values)
+        if unknown.any():
+            raise ValueError(f"Column '{column}' has values outside its vocabulary: "
+                             f"{sorted(set(map(str, values[unknown])))}, expected one of {self.__vocabularies__[column]}.")
+
+        return codes
+
+
+    def transform(self, X, sparse_output: bool = False):
+        '''
+        Returns the indicators of `X`: an array of shape `(n, len(get_feature_names()))`, or a `CSR` matrix of the
+        same shape if `sparse_output`.
+        '''
+
+        n_rows  = len(X[self.__columns__[0]]) if self.__columns__ else 0
+        offsets = np.cumsum([0] + [len(self.__vocabularies__[column]) for column in self.__columns__])
+
+        # Column of the indicator of each row and categorical column, -1 if none.
+        positions = np.empty((n_rows, len(self.__columns__)), dtype = np.int64)
+        for i, column in enumerate(self.__columns__):
+            codes           = self.codes(column, X[column])
+            positions[:, i] = np.where(codes >= 0, codes + offsets[i], -1)
+
+        if not sparse_output:
+            output = np.zeros((n_rows, offsets[-1]), dtype = self.__dtype__)
+            rows, columns = np.nonzero(positions >= 0)
+            output[rows, positions[rows, columns]] = 1
+            return output
+
+        # Row by row the positions are already increasing: they are the indices of the CSR matrix as they are.
+        valid   = positions >= 0
+        indptr  = np.concatenate([[0], np.cumsum(valid.sum(axis = 1))])
+        indices = positions[valid]
+
+        return sparse.csr_matrix((np.ones(len(indices), dtype = self.__dtype__), indices, indptr),
+                                 shape = (n_rows, offsets[-1]))
@@ -0,0 +1,154 @@
+import os
+import importlib.util
+import numpy as np
+import pandas as pd
+
+# From the root of the repository or from this folder (e.g. eda.ipynb).
+try:
+    from preprocessing.encoder import VOCABULARIES
+except ImportError:
+    from encoder import VOCABULARIES
+
+# Types of the columns of 'development.csv' / 'evaluation.csv', as read so far by `scrape.py` and the notebooks.
+DATA_TYPES = {
+              'url' : str, 'timedelta' : int, 'shares' : int, 'data_channel' : str, 'weekday' : str,
+
+              'n_tokens_title'          : int, 'n_tokens_content'       : int, 'n_unique_tokens' : float, 'n_non_stop_words' : float,
+              'n_non_stop_unique_tokens': float, 'average_token_length' : float,
+
+              'num_hrefs' : int, 'num_self_hrefs' : int, 'num_imgs' : float, 'num_videos' : float,
+
+              'kw_min_min' : float, 'kw_max_min' : float, 'kw_avg_min' : float, 'kw_min_max' : float, 'kw_max_max'   : float,
+              'kw_avg_max' : float, 'kw_min_avg' : float, 'kw_max_avg' : float, 'kw_avg_avg' : float, 'num_keywords' : float,
+
+              'self_reference_min_shares' : float, 'self_reference_max_shares' : float, 'self_reference_avg_sharess' : float,
+
+              'LDA_00' : float, 'LDA_01' : float, 'LDA_02' : float, 'LDA_03' : float, 'LDA_04' : float,
+
+              'global_subjectivity' : float, 'global_sentiment_polarity' : float, 'global_rate_positive_words' : float, 'global_rate_negative_words' : float,
+
+              'rate_positive_words' : float, 'rate_negative_words' : float,
+
+              'avg_positive_polarity' : float, 'min_positive_polarity' : float, 'max_positive_polarity' : float, 'avg_negative_polarity' : float,
+              'min_negative_polarity' : float, 'max_negative_polarity' : float,
+
+              'title_subjectivity' : float, 'title_sentiment_polarity' : float, 'abs_title_subjectivity' : float, 'abs_title_sentiment_polarity' : float,
+              }
+
+# Same columns, in the smallest types that hold them: float32 for the measures, the narrowest integer for the counts
+# (the ranges of the dataset fit with room to spare), categories for the channel and the day, Arrow strings for the
+# URL's when pyarrow is there. A row takes about half the memory.
+WEEKDAY_LEVELS = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
+
+COMPACT_TYPES = {column: (np.float32 if kind is float else np.int32) for column, kind in DATA_TYPES.items()}
+COMPACT_TYPES.update({'id'             : np.int32,
+                      'timedelta'      : np.int16,
+                      'n_tokens_title' : np.int16,
+                      'num_hrefs'      : np.int16,
+                      'num_self_hrefs' : np.int16,
+                      'url'            : 'string[pyarrow]' if importlib.util.find_spec('pyarrow') is not None else str,
+                      'data_channel'   : pd.CategoricalDtype(VOCABULARIES['data_channel']),
+                      'weekday'        : pd.CategoricalDtype(WEEKDAY_LEVELS)})
+
+
+class ChunkReader():
+
+    def __init__(self, path: str, chunksize: int = 50000, dtype: dict = COMPACT_TYPES, usecols = None):
+        '''
+        Builds a `ChunkReader` object. It reads a CSV of the dataset `chunksize` rows at a time, in the types of
+        `dtype`, so that the memory needed does not depend on the size of the file: only one chunk is in memory at
+        any time, and each one can go through a fitted preprocessing (`transform`) or all the way to the
+        predictions (`predict`).
+
+        Parameters
+        ---
+        path : str
+            Location of the CSV, e.g. 'data/summer_project_dataset/evaluation.csv';
+
+        chunksize : int, default = 50000
+            Number of rows of each chunk;
+
+        dtype : dict, default = COMPACT_TYPES
+            Type of each column. `DATA_TYPES` reads the data as the notebooks do;
+
+        usecols : list | callable, default = None
+            Passed to `pd.read_csv`. If `None`, all the columns.
+        '''
+
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"No file at '{path}'.")
+
+        self.__path__      = path
+        self.__chunksize__ = chunksize
+        self.__dtype__     = dtype
+        self.__usecols__   = usecols
+
+
+    def __iter__(self):
+        '''
+        Yields the chunks, as `pd.DataFrame`'s.
+        '''
+
+        # Types of columns missing from the file (e.g. 'shares' in the evaluation set) are ignored by pandas.
+        with pd.read_csv(self.__path__, chunksize = self.__chunksize__, dtype = self.__dtype__,
+                         usecols = self.__usecols__) as chunks:
+            for chunk in chunks:
+                yield chunk
+
+
+    def read(self) -> pd.DataFrame:
+        '''
+        Returns the whole file, in the types of `dtype`.
+        '''
+
+        return pd.concat(iter(self), ignore_index = True)
+
+
+    def transform(self, preprocessing):
+        '''
+        Yields, for each chunk, its rows transformed by `preprocessing`, a fitted object with a `transform` method,
+        e.g. a `preprocessing.pipeline.Pipeline`, and the chunk's 'id' column (`None` if there is none).
+        '''
+
+        for chunk in self:
+            ids = chunk['id'].to_numpy() if 'id' in chunk.columns else None
+            yield preprocessing.transform(chunk), ids
+
+
+    def predict(self, preprocessing, model, path: str, inverse = np.exp) -> int:
+        '''
+        Writes the predictions of `model` on every row to the CSV at `path`, in the format of
+        'sample_submission.csv' (columns 'Id' and 'Predicted'), one chunk at a time. Returns the number of rows.
+
+        Parameters
+        ---
+        preprocessing : object
+            Fitted object with a `transform` method, see `transform`;
+
+        model : object
+            Fitted model with a `predict` method;
+
+        path : str
+            Location of the output. Missing folders are created;
+
+        inverse : callable, default = np.exp
+            Applied to the predictions, to go back from the target the model was trained on (the log of the shares)
+            to the shares. If `None`, the predictions are written as they are.
+        '''
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok = True)
+
+        n_rows = 0
+        with open(path, 'w', newline = '') as file:
+
+            for position, (X, ids) in enumerate(self.transform(preprocessing)):
+
+                predictions = model.predict(X)
+                predictions = inverse(predictions) if inverse is not None else predictions
+                ids         = ids if ids is not None else np.arange(n_rows, n_rows + len(X))
+
+                pd.DataFrame({'Id' : ids, 'Predicted' : predictions}).to_csv(file, header = position == 0, index = False)
+                n_rows += len(X)
+
+        return n_rows
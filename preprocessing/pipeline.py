@@ -0,0 +1,335 @@
+import json
+import numpy as np
+import pandas as pd
+
+from sklearn.decomposition import PCA
+from sklearn.preprocessing import RobustScaler
+
+# From the root of the repository or from this folder (e.g. eda.ipynb).
+try:
+    from preprocessing.encoder import CategoryEncoder, VOCABULARIES
+except ImportError:
+    from encoder import CategoryEncoder, VOCABULARIES
+
+COMPARISONS = {'lt' : np.less, 'le' : np.less_equal, 'gt' : np.greater, 'ge' : np.greater_equal,
+               'eq' : np.equal, 'ne' : np.not_equal}
+
+WEEKDAYS = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday']
+
+STEPS = ['drop', 'filter', 'fill_nan', 'encode_weekdays', 'cut', 'apply_log', 'apply_log1p', 'apply_one_hot',
+         'robust_scale', 'pca']
+
+
+class Pipeline():
+
+    def __init__(self, steps: list):
+        '''
+        Builds a `Pipeline` object: the steps of `Preprocessing` (and the PCA of `PrunedCV.preprocess`), fitted once
+        and then applied to new rows without fitting anything again. Everything learned by `fit` (fill values,
+        scaler, PCA, levels of the one-hot encoded columns, layout of the output) is kept in the object, and `save`
+        writes it to a single `.npz` file that `Pipeline.load` reads back, e.g. in a batch scorer.
+
+        `fit` and `transform` run the same code, column by column on `NumPy` arrays: the rows seen when serving go
+        through exactly what the training rows went through, minus the filters.
+
+        Parameters
+        ---
+        steps : list
+            List of `(name, parameters)`, run in order. The names and their parameters are:
+            * 'drop'            : columns. Removes the columns;
+            * 'filter'          : column, op ('lt', 'le', 'gt', 'ge', 'eq', 'ne'), value, log1p = False,
+                                  target = False. Keeps the rows where `column op value` (on log1p(column) if
+                                  `log1p`). Only applied by `fit`. It filters on `y` if `target`, or if `column` is
+                                  the name of `y` (a `pd.Series`); `column` is then optional;
+            * 'fill_nan'        : columns. Fills the missing values with the mean of the rows kept so far;
+            * 'encode_weekdays' : no parameters. 'weekday' becomes 'Not Weekend' / 'Weekend';
+            * 'cut'             : column, bins, labels, right = True, log1p = False. Replaces the values with the
+                                  label of their bin, as `pd.cut`;
+            * 'apply_log'       : columns. Replaces the columns with their log;
+            * 'apply_log1p'     : columns, offset = 0. Replaces the columns with log1p(column + offset);
+            * 'apply_one_hot'   : column, levels = None. Replaces the column with one indicator per level, appended
+                                  at the end. If `levels` is `None`, they are the ones of `encoder.VOCABULARIES` or,
+                                  for other columns, the values seen by `fit`, sorted; a value outside them has no
+                                  indicator;
+            * 'robust_scale'    : columns. Centers on the median and scales by the interquartile range;
+            * 'pca'             : n_components = 0.90. Replaces all the columns with their principal components.
+
+        Examples
+        ---
+        >>> pipeline = Pipeline([('filter',        {'column' : 'shares', 'op' : 'lt', 'value' : 12000, 'target' : True}),
+        >>>                      ('fill_nan',      {'columns' : ['num_imgs', 'num_videos', 'num_keywords']}),
+        >>>                      ('drop',          {'columns' : ['url', 'timedelta']}),
+        >>>                      ('apply_log1p',   {'columns' : ['num_hrefs', 'num_imgs']}),
+        >>>                      ('apply_one_hot', {'column' : 'data_channel'}),
+        >>>                      ('pca',           {'n_components' : 0.90})])
+        >>> X_train, y_train = pipeline.fit_transform(X, y)
+        >>> pipeline.save('pipeline.npz')
+        >>> X_new = Pipeline.load('pipeline.npz').transform(X_new)
+        '''
+
+        for name, _ in steps:
+            if name not in STEPS:
+                raise ValueError(f"Unknown step '{name}', choose among {STEPS}.")
+
+        self.__steps__    = [(name, dict(params)) for name, params in steps]
+        self.__state__    = None        # One dict per step, filled by `fit`.
+        self.__columns__  = None        # Columns of the data `fit` has seen.
+        self.__features__ = None        # Columns of the output.
+        self.__target__   = None        # Name of the target, for the filters.
+
+
+    def get_steps(self) -> list:
+
+        return [(name, dict(params)) for name, params in self.__steps__]
+
+
+    def get_feature_names(self) -> list:
+
+        return list(self.__features__)
+
+
+    def fit(self, X: pd.DataFrame, y: pd.Series = None) -> 'Pipeline':
+        '''
+        Fits every step on `X` (and `y`, used by the filters on the target).
+        '''
+
+        self.fit_transform(X, y)
+
+        return self
+
+
+    def fit_transform(self, X: pd.DataFrame, y: pd.Series = None) -> tuple:
+        '''
+        Fits every step and returns the transformed training data, as `transform`, and the target of the rows kept
+        by the filters (`None` if `y` is `None`).
+        '''
+
+        self.__state__   = [{} for _ in self.__steps__]
+        self.__columns__ = list(X.columns)
+        self.__target__  = getattr(y, 'name', None)
+
+        columns, y = self.__run__(X, None if y is None else np.asarray(y), fit = True)
+        self.__features__ = list(columns.keys())
+
+        return self.__stack__(columns), y
+
+
+    def transform(self, X: pd.DataFrame) -> np.ndarray:
+        '''
+        Applies the fitted steps to `X`, without the filters, and returns a `float64` array with the columns of
+        `get_feature_names`.
+        '''
+
+        if self.__state__ is None:
+            raise RuntimeError('The pipeline must be fitted (or loaded) first.')
+
+        columns, _ = self.__run__(X, None, fit = False)
+
+        return self.__stack__(columns)
+
+
+    def __run__(self, X: pd.DataFrame, y: np.ndarray, fit: bool) -> tuple:
+
+        # Column name : 1-D array. Only the columns seen by `fit` are taken; when serving, the ones missing are fine
+        # as long as no step needs them (e.g. they are dropped).
+        columns = {column: X[column].to_numpy() for column in self.__columns__ if fit or column in X.columns}
+
+        for (name, params), state in zip(self.__steps__, self.__state__):
+            columns, y = getattr(self, f"__{name}__")(columns, y, params, state, fit)
+
+        return columns, y
+
+
+    def __stack__(self, columns: dict) -> np.ndarray:
+
+        # Column-major: each column is written contiguously.
+        output = np.empty((len(next(iter(columns.values()))) if columns else 0, len(self.__features__)),
+                          dtype = np.float64, order = 'F')
+
+        for position, name in enumerate(self.__features__):
+            if columns[name].dtype == object:
+                raise ValueError(f"Column '{name}' is not numeric: drop it or encode it before the end of the pipeline.")
+            output[:, position] = columns[name]
+
+        return output
+
+
+    def __drop__(self, columns: dict, y: np.ndarray, params: dict, state: dict, fit: bool) -> tuple:
+
+        return {name: values for name, values in columns.items() if name not in params['columns']}, y
+
+
+    def __filter__(self, columns: dict, y: np.ndarray, params: dict, state: dict, fit: bool) -> tuple:
+
+        if not fit:
+            return columns, y
+
+        column = params.get('column')
+
+        if params.get('target', False) or (column is not None and column == self.__target__):
+            if y is None:
+                raise ValueError("The filter on the target needs `y`.")
+            values = y
+        elif column in columns:
+            values = columns[column]
+        else:
+            raise ValueError(f"The filter on '{column}' matches no column: if it is the target, pass `y` as a named "
+                             f"`pd.Series` or set 'target' : True in the step.")
+
+        values = np.log1p(values) if params.get('log1p', False) else values
+        keep   = COMPARISONS[params['op']](values, params['value'])
+
+        return {name: column[keep] for name, column in columns.items()}, None if y is None else y[keep]
+
+
+    def __fill_nan__(self, columns: dict, y: np.ndarray, params: dict, state: dict, fit: bool) -> tuple:
+
+        if fit:
+            state['values'] = {name: float(np.nanmean(columns[name].astype(np.float64))) for name in params['columns']}
+
+        for name, value in state['values'].items():
+            values        = columns[name].astype(np.float64)
+            columns[name] = np.where(np.isnan(values), value, values)
+
+        return columns, y
+
+
+    def __encode_weekdays__(self, columns: dict, y: np.ndarray, params: dict, state: dict, fit: bool) -> tuple:
+
+        columns['weekday'] = np.where(np.isin(columns['weekday'], WEEKDAYS), 'Not Weekend', 'Weekend').astype(object)
+
+        return columns, y
+
+
+    def __cut__(self, columns: dict, y: np.ndarray, params: dict, state: dict, fit: bool) -> tuple:
+
+        bins   = params['bins']
+        values = columns[params['column']].astype(np.float64)
+        values = np.log1p(values) if params.get('log1p', False) else values
+
+        # Same rule as pd.cut: (bins[i - 1], bins[i]] if right, [bins[i - 1], bins[i]) otherwise.
+        ids   = np.searchsorted(bins, values, side = 'left' if params.get('right', True) else 'right')
+        valid = (ids > 0) & (ids < len(bins))
+
+        columns[params['column']] = np.array(list(params['labels']) + [None], dtype = object)[np.where(valid, ids - 1, -1)]
+
+        return columns, y
+
+
+    def __apply_log__(self, columns: dict, y: np.ndarray, params: dict, state: dict, fit: bool) -> tuple:
+
+        for name in params['columns']:
+            columns[name] = np.log(columns[name].astype(np.float64))
+
+        return columns, y
+
+
+    def __apply_log1p__(self, columns: dict, y: np.ndarray, params: dict, state: dict, fit: bool) -> tuple:
+
+        for name in params['columns']:
+            columns[name] = np.log1p(columns[name].astype(np.float64) + params.get('offset', 0))
+
+        return columns, y
+
+
+    def __apply_one_hot__(self, columns: dict, y: np.ndarray, params: dict, state: dict, fit: bool) -> tuple:
+
+        column = params['column']
+        values = columns.pop(column)
+
+        if fit:
+            levels          = params.get('levels')
+            vocabularies    = VOCABULARIES if levels is None else {column: levels}
+            state['levels'] = CategoryEncoder([column], vocabularies).fit({column: values}).get_vocabulary(column)
+
+        # int8 indicators, cast only once the output is stacked.
+        encoder    = CategoryEncoder([column], {column: state['levels']})
+        indicators = encoder.transform({column: values})
+        for position, name in enumerate(encoder.get_feature_names()):
+            columns[name] = indicators[:, position]
+
+        return columns, y
+
+
+    def __robust_scale__(self, columns: dict, y: np.ndarray, params: dict, state: dict, fit: bool) -> tuple:
+
+        if fit:
+            scaler          = RobustScaler().fit(np.column_stack([columns[name] for name in params['columns']]))
+            state['center'] = scaler.center_
+            state['scale']  = scaler.scale_
+
+        for position, name in enumerate(params['columns']):
+            columns[name] = (columns[name].astype(np.float64) - state['center'][position]) / state['scale'][position]
+
+        return columns, y
+
+
+    def __pca__(self, columns: dict, y: np.ndarray, params: dict, state: dict, fit: bool) -> tuple:
+
+        if fit:
+            state['columns'] = list(columns.keys())
+
+        matrix = np.empty((len(columns[state['columns'][0]]), len(state['columns'])), dtype = np.float64, order = 'F')
+        for position, name in enumerate(state['columns']):
+            matrix[:, position] = columns[name]
+
+        if fit:
+            p                   = PCA(n_components = params.get('n_components', 0.90)).fit(matrix)
+            state['mean']       = p.mean_
+            state['components'] = p.components_
+
+        # Same as PCA.transform, without whitening.
+        components = (matrix - state['mean']) @ state['components'].T
+
+        return {f"pca_{i}": components[:, i] for i in range(components.shape[1])}, y
+
+
+    def save(self, path) -> None:
+        '''
+        Writes the steps and everything fitted to a single compressed `.npz` file (or open binary file): the arrays
+        as they are, the rest as `JSON`. No pickle is involved, so the file can be loaded safely anywhere.
+        '''
+
+        if self.__state__ is None:
+            raise RuntimeError('The pipeline must be fitted first.')
+
+        arrays = {}
+        states = []
+        for position, state in enumerate(self.__state__):
+
+            plain = {}
+            for key, value in state.items():
+                if isinstance(value, np.ndarray):
+                    arrays[f"{position}.{key}"] = value
+                else:
+                    plain[key] = value
+            states.append(plain)
+
+        spec = {'steps' : self.__steps__, 'state' : states, 'columns' : self.__columns__,
+                'features' : self.__features__, 'target' : self.__target__}
+
+        np.savez_compressed(path, spec = np.array(json.dumps(spec)), **arrays)
+
+
+    @staticmethod
+    def load(path: str) -> 'Pipeline':
+        '''
+        Returns the `Pipeline` written by `save`, ready to `transform`.
+        '''
+
+        with np.load(path, allow_pickle = False) as data:
+
+            spec     = json.loads(str(data['spec']))
+            pipeline = Pipeline([(name, params) for name, params in spec['steps']])
+
+            pipeline.__state__    = spec['state']
+            pipeline.__columns__  = spec['columns']
+            pipeline.__features__ = spec['features']
+            pipeline.__target__   = spec['target']
+
+            for key in data.files:
+                if key != 'spec':
+                    position, name = key.split('.', 1)
+                    pipeline.__state__[int(position)][name] = data[key]
+
+        return pipeline
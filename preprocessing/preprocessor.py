@@ -4,6 +4,12 @@ import numpy as np
 from sklearn.ensemble import IsolationForest
 from sklearn.preprocessing import RobustScaler
 
+# From the root of the repository or from this folder (e.g. eda.ipynb).
+try:
+    from preprocessing.encoder import CategoryEncoder, VOCABULARIES
+except ImportError:
+    from encoder import CategoryEncoder, VOCABULARIES
+
 class Preprocessing():
 
     def __init__(self, df: pd.DataFrame) -> None:
@@ -82,9 +88,17 @@ class Preprocessing():
 
         return self.__dataframe__
     
-    def apply_one_hot(self, column: str = '') -> pd.DataFrame:
-        
-        one_hot_encoded = pd.get_dummies(self.__dataframe__[column])
+    def apply_one_hot(self, column: str = '', levels: list = None) -> pd.DataFrame:
+        '''
+        Replaces the column with int8 indicators of its levels: the ones given, otherwise the fixed ones of
+        `encoder.VOCABULARIES`, otherwise the values present, sorted.
+        '''
+
+        encoder = CategoryEncoder([column], VOCABULARIES if levels is None else {column: levels})
+        encoder.fit(self.__dataframe__)
+
+        one_hot_encoded = pd.DataFrame(encoder.transform(self.__dataframe__), columns = encoder.get_feature_names(),
+                                       index = self.__dataframe__.index)
         self.__dataframe__ = pd.concat([self.__dataframe__, one_hot_encoded], axis = 1)
         self.__dataframe__ = self.__dataframe__.drop(column, axis = 1)
         
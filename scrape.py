@@ -50,6 +50,8 @@ from datetime import datetime, timedelta
 import pickle
 
 from Scraper import Scraper
+from Journal import ScrapeJournal
+from preprocessing.ingest import DATA_TYPES
 
 #\-- SET ENVIRONMENT --/#
 # Before starting we need to store the data properly. We define an ad-hoc folder where we will store everything.
@@ -86,40 +88,17 @@ np.random.seed(SEED)                                    #####################
 
 
 
-data_types = {
-              'url' : str, 'timedelta' : int, 'shares' : int, 'data_channel' : str, 'weekday' : str, 
-              
-              'n_tokens_title'          : int, 'n_tokens_content'       : int, 'n_unique_tokens' : float, 'n_non_stop_words' : float,
-              'n_non_stop_unique_tokens': float, 'average_token_length' : float,
-
-              'num_hrefs' : int, 'num_self_hrefs' : int, 'num_imgs' : float, 'num_videos' : float,
-              
-              'kw_min_min' : float, 'kw_max_min' : float, 'kw_avg_min' : float, 'kw_min_max' : float, 'kw_max_max'   : float,
-              'kw_avg_max' : float, 'kw_min_avg' : float, 'kw_max_avg' : float, 'kw_avg_avg' : float, 'num_keywords' : float,
-              
-              'self_reference_min_shares' : float, 'self_reference_max_shares' : float, 'self_reference_avg_sharess' : float,
-              
-              'LDA_00' : float, 'LDA_01' : float, 'LDA_02' : float, 'LDA_03' : float, 'LDA_04' : float,
-              
-              'global_subjectivity' : float, 'global_sentiment_polarity' : float, 'global_rate_positive_words' : float, 'global_rate_negative_words' : float,
-              
-              'rate_positive_words' : float, 'rate_negative_words' : float,
-              
-              'avg_positive_polarity' : float, 'min_positive_polarity' : float, 'max_positive_polarity' : float, 'avg_negative_polarity' : float,
-              'min_negative_polarity' : float, 'max_negative_polarity' : float,
-
-              'title_subjectivity' : float, 'title_sentiment_polarity' : float, 'abs_title_subjectivity' : float, 'abs_title_sentiment_polarity' : float,
-              }                                                    
-                                                                   
-                                                                   
 data = pd.read_csv(file_PATH + r'/development.csv',                 
-                   usecols = lambda column: column != 'id', dtype = data_types)
+                   usecols = lambda column: column != 'id', dtype = DATA_TYPES)
 
 
-# to_be_scraped = data[data['num_imgs'].isna()]
-to_be_scraped = data[data['num_imgs'].isna()].iloc[6080:7000]
+# The URL's already in the journal are skipped, so the whole pool can be passed at every run.
+to_be_scraped = data[data['num_imgs'].isna()]
 scrap = Scraper()
 scrap.set_url(to_be_scraped[['url', 'timedelta']])
+journal = ScrapeJournal('url_html/journal.jsonl')
+journal.import_shards('url_html/url_html*.pkl')     # Progress saved before the journal existed.
+scrap.set_journal(journal)
 scrap.start_driver()
 
-scrap.scrape()
+scrap.scrape(lean = True)
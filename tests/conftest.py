@@ -0,0 +1,25 @@
+import os
+import sys
+import numpy as np
+import pandas as pd
+import pytest
+
+# The modules live at the root of the repository, as for the notebooks and the benchmarks.
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+EVALUATION = os.path.join(ROOT, 'data', 'summer_project_dataset', 'evaluation.csv')
+
+
+@pytest.fixture(scope = 'session')
+def evaluation():
+    '''
+    The evaluation set without its 'id', with a synthetic target distributed as the shares (log-normal, some above
+    12000), since the development set is not in the repository.
+    '''
+
+    X = pd.read_csv(EVALUATION).drop(columns = 'id')
+    y = pd.Series(np.round(np.exp(np.random.RandomState(0).randn(len(X)) * 0.9 + 7.3)).astype(int),
+                  index = X.index, name = 'shares')
+
+    return X, y
@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+
+from Cache import ResponseCache, CacheMiss
+from Fetcher import AsyncFetcher
+
+SNAPSHOT = 'https://web.archive.org/web/20140301000000/http://mashable.com/2014/02/01/a/'
+
+
+def unreachable():
+
+    raise AssertionError('An offline cache must not download anything.')
+
+
+def test_offline_hit(tmp_path):
+
+    online = ResponseCache(str(tmp_path / 'responses.sqlite'))
+    assert online.fetch(SNAPSHOT, lambda: b'<html>page</html>') == b'<html>page</html>'
+    online.close()
+
+    # A new session, offline: the stored page is served, also through an equivalent URL.
+    offline = ResponseCache(str(tmp_path / 'responses.sqlite'), offline = True)
+    assert offline.fetch(SNAPSHOT, unreachable) == b'<html>page</html>'
+    assert offline.fetch(SNAPSHOT.replace('web.archive.org', 'WEB.ARCHIVE.ORG:443'), unreachable) == b'<html>page</html>'
+
+    with pytest.raises(CacheMiss):
+        offline.fetch(SNAPSHOT.replace('2014/02/01/a', '2014/02/01/b'), unreachable)
+
+    offline.close()
+
+
+def test_offline_fetcher(tmp_path):
+
+    cache   = ResponseCache(str(tmp_path / 'responses.sqlite'), offline = True)
+    fetcher = AsyncFetcher('http://127.0.0.1:9', cache = cache)
+    params  = {'url': 'a.com', 'from': '2013', 'to': '2015', 'fl': 'timestamp', 'collapse': 'timestamp:8',
+               'filter': 'statuscode:200'}
+    cache.put(fetcher._full_url('/cdx/search/cdx', params), b"20130105120000\n20140302000000\n")
+
+    # Nothing listens on the port: the dates can only come from the cache, the URL missing from it fails.
+    dates = fetcher.fetch_index(['a.com', 'b.com'], years = ['2013', '2015'])
+    fetcher.close()
+
+    np.testing.assert_array_equal(dates['a.com'], np.array(['2013-01-05', '2014-03-02'], dtype = 'datetime64[D]'))
+    assert fetcher.get_failed() == ['b.com']
@@ -0,0 +1,106 @@
+import os
+import shutil
+import numpy as np
+import pandas as pd
+import pytest
+
+import preprocessing.cache
+from conftest import EVALUATION
+from preprocessing.cache import DatasetCache
+from preprocessing.ingest import ChunkReader
+from preprocessing.pipeline import Pipeline
+
+STEPS = [('drop',            {'columns' : ['url', 'id']}),
+         ('fill_nan',        {'columns' : ['num_imgs', 'num_videos', 'num_keywords']}),
+         ('encode_weekdays', {}),
+         ('apply_one_hot',   {'column' : 'data_channel'}),
+         ('apply_one_hot',   {'column' : 'weekday'})]
+
+
+@pytest.fixture
+def source(tmp_path):
+    '''
+    A copy of the evaluation set with a target, which the tests can modify.
+    '''
+
+    frame = pd.read_csv(EVALUATION)
+    frame['shares'] = np.round(np.exp(np.random.RandomState(0).randn(len(frame)) * 0.9 + 7.3)).astype(int)
+
+    path = str(tmp_path / 'development.csv')
+    frame.to_csv(path, index = False)
+
+    return path
+
+
+class NoCSV(ChunkReader):
+
+    def read(self):
+        raise AssertionError('A hit must not read the CSV.')
+
+
+def test_raw_hit_and_miss(source, tmp_path, monkeypatch):
+
+    cache = DatasetCache(str(tmp_path / 'cache'))
+    miss  = cache.raw(source)
+    pd.testing.assert_frame_equal(miss, ChunkReader(source).read())
+
+    # The hit is read from the Feather file, with the same types, and can be modified like the CSV's frame.
+    monkeypatch.setattr(preprocessing.cache, 'ChunkReader', NoCSV)
+    hit = cache.raw(source)
+    pd.testing.assert_frame_equal(hit, miss)
+    hit.loc[0, 'num_imgs'] = -1.0
+
+
+def test_stale_entries(source, tmp_path):
+
+    cache = DatasetCache(str(tmp_path / 'cache'))
+    first = cache.raw(source)
+    files = sorted(os.listdir(tmp_path / 'cache'))
+
+    # Touched, same content: same entry, the hash is only computed again.
+    os.utime(source, (0, 0))
+    pd.testing.assert_frame_equal(cache.raw(source), first)
+    assert sorted(os.listdir(tmp_path / 'cache')) == files
+    assert len(os.listdir(tmp_path / 'cache' / 'hashes')) == 1
+
+    # Modified: a new entry, with the new content.
+    frame = pd.read_csv(source)
+    frame.iloc[:100].to_csv(source, index = False)
+    assert len(cache.raw(source)) == 100
+    assert len([name for name in os.listdir(tmp_path / 'cache') if name.startswith('raw_')]) == 2
+    assert len(os.listdir(tmp_path / 'cache' / 'hashes')) == 1
+
+    # Another file with the same content shares the entry.
+    shutil.copy(source, tmp_path / 'copy.csv')
+    cache.raw(str(tmp_path / 'copy.csv'))
+    assert len([name for name in os.listdir(tmp_path / 'cache') if name.startswith('raw_')]) == 2
+
+
+def test_features_hit_and_miss(source, tmp_path):
+
+    cache = DatasetCache(str(tmp_path / 'cache'))
+
+    # As without the cache: the pipeline fitted on the frame read from the CSV.
+    frame        = ChunkReader(source).read()
+    y            = frame.pop('shares')
+    expected     = Pipeline(STEPS)
+    X_old, y_old = expected.fit_transform(frame, y)
+
+    X, y, pipeline = cache.features(source, Pipeline(STEPS))
+    np.testing.assert_array_equal(X, X_old)
+    np.testing.assert_array_equal(y, y_old)
+    assert pipeline.get_feature_names() == expected.get_feature_names()
+
+    # The hit is memory-mapped, read-only, and comes with the fitted pipeline.
+    X_hit, y_hit, pipeline = cache.features(source, Pipeline(STEPS))
+    assert isinstance(X_hit, np.memmap) and not X_hit.flags.writeable
+    np.testing.assert_array_equal(X_hit, X_old)
+    np.testing.assert_array_equal(pipeline.transform(frame), X_old)
+
+    # Other steps, or a pipeline only applied, are other entries.
+    n_entries = len(os.listdir(tmp_path / 'cache'))
+    X_log, _, _ = cache.features(source, Pipeline(STEPS + [('apply_log1p', {'columns' : ['num_hrefs']})]))
+    assert X_log.shape == X_old.shape and not np.array_equal(X_log, X_old)
+    X_applied, _, _ = cache.features(source, pipeline, fit = False)
+    np.testing.assert_array_equal(X_applied, pipeline.transform(frame))
+    assert len(os.listdir(tmp_path / 'cache')) == n_entries + 2 * 3
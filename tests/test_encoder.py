@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from preprocessing.encoder import CategoryEncoder, VOCABULARIES
+from preprocessing.preprocessor import Preprocessing
+
+
+def test_dense_and_sparse_outputs_match():
+
+    rng = np.random.RandomState(0)
+    X   = pd.DataFrame({'data_channel' : rng.choice(VOCABULARIES['data_channel'] + [None], 1000),
+                        'weekday'      : rng.choice(VOCABULARIES['weekday'], 1000),
+                        'color'        : rng.choice(['red', 'green', 'blue'], 1000)})
+
+    encoder = CategoryEncoder(['data_channel', 'weekday', 'color']).fit(X)
+    dense   = encoder.transform(X)
+    csr     = encoder.transform(X, sparse_output = True)
+
+    assert dense.dtype == np.int8 and csr.dtype == np.int8
+    assert dense.shape == csr.shape == (len(X), len(encoder.get_feature_names()))
+    np.testing.assert_array_equal(csr.toarray(), dense)
+
+    # One indicator per column, none for the missing values, as pd.get_dummies.
+    expected = X['data_channel'].notna().to_numpy().astype(int) + 2
+    np.testing.assert_array_equal(dense.sum(axis = 1), expected)
+    np.testing.assert_array_equal(dense[:, :6], pd.get_dummies(X['data_channel']).to_numpy())
+
+
+def test_fixed_vocabulary_layout():
+
+    batch   = pd.DataFrame({'data_channel' : ['tech', 'tech']})
+    encoder = CategoryEncoder(['data_channel']).fit(batch)
+
+    # Levels missing from the batch keep their (empty) column, in the order of the vocabulary.
+    assert encoder.get_feature_names() == VOCABULARIES['data_channel']
+    np.testing.assert_array_equal(encoder.transform(batch).sum(axis = 0),
+                                  [2 if level == 'tech' else 0 for level in VOCABULARIES['data_channel']])
+
+
+def test_values_outside_the_vocabulary():
+
+    # Fixed vocabulary, or the one learned by fit: a value never seen raises, instead of a row of zeros.
+    encoder = CategoryEncoder(['data_channel', 'color']).fit(pd.DataFrame({'data_channel' : ['tech'], 'color' : ['red']}))
+
+    with pytest.raises(ValueError, match = 'data_channel'):
+        encoder.transform(pd.DataFrame({'data_channel' : ['tech', 'sport'], 'color' : ['red', 'red']}))
+
+    with pytest.raises(ValueError, match = 'color'):
+        encoder.transform(pd.DataFrame({'data_channel' : ['tech', 'tech'], 'color' : ['red', 'blue']}), sparse_output = True)
+
+    # Same for the one-hot encoding of the preprocessing, e.g. the weekdays before `encode_weekdays`.
+    with pytest.raises(ValueError, match = 'weekday'):
+        Preprocessing(pd.DataFrame({'weekday' : ['monday', 'sunday']})).apply_one_hot('weekday')
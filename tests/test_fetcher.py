@@ -0,0 +1,118 @@
+import json
+import time
+import threading
+import numpy as np
+import pytest
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+from Fetcher import AsyncFetcher
+
+INDEX = b"20130105120000\n20130105180000\n20140302000000\n"
+
+
+@pytest.fixture
+def archive():
+    '''
+    A local `CDX` endpoint. Each `URL` fails with a 503 as many times as `failures[url]` says, then answers
+    `bodies[url]`, `INDEX` by default. Every request is logged with the time it arrived.
+    '''
+
+    failures = {}
+    bodies   = {}
+    log      = []
+    lock     = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+
+        def do_GET(self):
+
+            url = parse_qs(urlparse(self.path).query)['url'][0]
+            with lock:
+                log.append((url, time.monotonic()))
+                failing = failures.get(url, 0) > 0
+                failures[url] = failures.get(url, 0) - 1
+
+            self.send_response(503 if failing else 200)
+            self.end_headers()
+            self.wfile.write(b'' if failing else bodies.get(url, INDEX))
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target = server.serve_forever, daemon = True)
+    thread.start()
+
+    yield f"http://127.0.0.1:{server.server_address[1]}", failures, bodies, log
+
+    server.shutdown()
+    server.server_close()
+
+
+def test_retries_until_success(archive):
+
+    base_url, failures, _, log = archive
+    failures['a.com'] = 1
+
+    fetcher = AsyncFetcher(base_url, rate = 0, retries = 2)
+    dates   = fetcher.fetch_index(['a.com'])
+    fetcher.close()
+
+    assert [url for url, _ in log] == ['a.com', 'a.com']
+    np.testing.assert_array_equal(dates['a.com'], np.array(['2013-01-05', '2014-03-02'], dtype = 'datetime64[D]'))
+    assert fetcher.get_failed() == []
+
+
+def test_gives_up_without_a_last_backoff(archive):
+
+    base_url, failures, _, log = archive
+    failures['a.com'] = 10
+
+    fetcher = AsyncFetcher(base_url, rate = 0, retries = 1)
+    toc     = time.monotonic()
+    dates   = fetcher.fetch_index(['a.com'])
+    elapsed = time.monotonic() - toc
+    fetcher.close()
+
+    # One backoff of 1 s between the two attempts, none after the last one.
+    assert len(log) == 2
+    assert dates == {} and fetcher.get_failed() == ['a.com']
+    assert 1.0 <= elapsed < 2.0
+
+
+def test_rate_limit(archive):
+
+    base_url, _, _, log = archive
+    rate    = 20.0
+    url     = [f"site{i}.com" for i in range(10)]
+
+    fetcher = AsyncFetcher(base_url, concurrency = 8, rate = rate)
+    dates   = fetcher.fetch_index(url)
+    fetcher.close()
+
+    # Concurrent requests, but never more than `rate` per second on the same host.
+    arrivals = np.sort([arrival for _, arrival in log])
+    assert sorted(dates) == sorted(url)
+    assert np.all(np.diff(arrivals) >= 0.8 / rate)
+
+
+def test_index_with_several_timestamps_per_line(archive):
+
+    base_url, _, bodies, _ = archive
+    timestamps = ['20130105120000', '20130105180000', '20130611000000', '20140302000000', '20151231235959']
+
+    # The JSON output, on a single line or one row per line, and the plain text one give the same dates.
+    rows = [['timestamp']] + [[timestamp] for timestamp in timestamps]
+    bodies['json.com']  = json.dumps(rows).encode()
+    bodies['lines.com'] = ('[' + ',\n'.join(json.dumps(row) for row in rows) + ']').encode()
+    bodies['plain.com'] = '\n'.join(timestamps).encode()
+
+    fetcher = AsyncFetcher(base_url, rate = 0)
+    dates   = fetcher.fetch_index(['json.com', 'lines.com', 'plain.com'])
+    fetcher.close()
+
+    expected = np.array(['2013-01-05', '2013-06-11', '2014-03-02', '2015-12-31'], dtype = 'datetime64[D]')
+    for url in ['json.com', 'lines.com', 'plain.com']:
+        np.testing.assert_array_equal(dates[url], expected)
@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+
+from sklearn.linear_model import Ridge
+
+from conftest import EVALUATION
+from preprocessing.ingest import ChunkReader, COMPACT_TYPES, DATA_TYPES
+from preprocessing.pipeline import Pipeline
+
+STEPS = [('drop',            {'columns' : ['url', 'id']}),
+         ('fill_nan',        {'columns' : ['num_imgs', 'num_videos', 'num_keywords']}),
+         ('encode_weekdays', {}),
+         ('apply_log1p',     {'columns' : ['num_hrefs', 'num_imgs']}),
+         ('apply_one_hot',   {'column' : 'data_channel'}),
+         ('apply_one_hot',   {'column' : 'weekday'})]
+
+
+def test_compact_types_match_the_data_types():
+
+    # As read so far by the notebooks, and in chunks with the compact types.
+    old = pd.read_csv(EVALUATION, dtype = DATA_TYPES)
+    new = ChunkReader(EVALUATION, chunksize = 700).read()
+
+    assert list(new.columns) == list(old.columns) and len(new) == len(old)
+
+    # The URL's take the same memory, everything else about half.
+    size = lambda frame: frame.drop(columns = 'url').memory_usage(deep = True).sum()
+    assert size(new) < size(old) / 2
+
+    for column in old.columns:
+
+        if DATA_TYPES.get(column) is float:
+            assert new[column].dtype == np.float32
+            np.testing.assert_allclose(new[column], old[column], rtol = 1e-6)
+        elif DATA_TYPES.get(column, int) is int:
+            np.testing.assert_array_equal(new[column], old[column])
+        else:
+            assert list(new[column].astype(str)) == list(old[column])
+
+    # The chunks put back together are the file read at once.
+    pd.testing.assert_frame_equal(new, pd.read_csv(EVALUATION, dtype = COMPACT_TYPES))
+
+
+def test_predict_matches_the_whole_frame(tmp_path):
+
+    frame = pd.read_csv(EVALUATION, dtype = DATA_TYPES)
+    y     = np.exp(np.random.RandomState(0).randn(len(frame)) * 0.9 + 7.3)
+
+    pipeline = Pipeline(STEPS)
+    X, y     = pipeline.fit_transform(frame, y)
+    model    = Ridge().fit(X, np.log(y))
+
+    n_rows = ChunkReader(EVALUATION, chunksize = 1000).predict(pipeline, model, str(tmp_path / 'out' / 'submission.csv'))
+    output = pd.read_csv(tmp_path / 'out' / 'submission.csv')
+
+    # One row per article, in the order of the file, as when the whole frame goes through the model at once.
+    assert n_rows == len(frame) and list(output.columns) == ['Id', 'Predicted']
+    np.testing.assert_array_equal(output['Id'], frame['id'])
+    np.testing.assert_allclose(output['Predicted'], np.exp(model.predict(pipeline.transform(frame))), rtol = 1e-4)
@@ -0,0 +1,58 @@
+import json
+import numpy as np
+import pandas as pd
+
+from datetime import date, datetime
+
+from Journal import ScrapeJournal
+
+
+def test_resume(tmp_path):
+
+    path    = str(tmp_path / 'journal.jsonl')
+    journal = ScrapeJournal(path)
+
+    assert journal.commit({'a' : date(2013, 1, 5), 'b' : np.datetime64('2014-02-03')}) == 2
+    assert journal.commit({'b' : date(2015, 1, 1), 'c' : datetime(2014, 3, 4, 12, 30)}) == 1
+
+    # A new session reads back what the previous one committed, and skips it.
+    resumed = ScrapeJournal(path)
+    assert resumed.get_results() == {'a' : date(2013, 1, 5), 'b' : date(2014, 2, 3), 'c' : date(2014, 3, 4)}
+    assert resumed.pending(['a', 'd', 'c', 'e']) == ['d', 'e']
+    assert resumed.get_commit_times() == journal.get_commit_times()
+
+
+def test_truncated_last_line(tmp_path):
+
+    path = str(tmp_path / 'journal.jsonl')
+    ScrapeJournal(path).commit({'a' : date(2013, 1, 5)})
+
+    # A crash in the middle of the second batch.
+    with open(path, 'ab') as file:
+        file.write(json.dumps({'committed_at' : 0.0, 'results' : {'b' : '2014-02-03'}}).encode()[:20])
+
+    resumed = ScrapeJournal(path)
+    assert resumed.get_results() == {'a' : date(2013, 1, 5)}
+
+    # The broken tail is dropped, so the next batch starts on a clean line.
+    assert resumed.commit({'b' : date(2014, 2, 3)}) == 1
+    assert ScrapeJournal(path).get_results() == {'a' : date(2013, 1, 5), 'b' : date(2014, 2, 3)}
+
+
+def test_missing_date(tmp_path):
+
+    path    = str(tmp_path / 'journal.jsonl')
+    journal = ScrapeJournal(path)
+
+    # As given by Scraper._commit_backup for an URL without a date.
+    closest = np.array(['2013-01-05', 'NaT'], dtype = 'datetime64[D]').astype(object)
+    assert journal.commit({'a' : closest[0], 'b' : closest[1], 'c' : None, 'd' : pd.NaT}) == 1
+    assert journal.pending(['a', 'b', 'c', 'd']) == ['b', 'c', 'd']
+
+    # A log written by an older version, with the missing dates as text, still loads.
+    with open(path, 'a') as file:
+        file.write(json.dumps({'committed_at' : 0.0, 'results' : {'b' : 'NaT', 'c' : 'None', 'e' : '2014-02-03'}}) + '\n')
+
+    resumed = ScrapeJournal(path)
+    assert resumed.get_results() == {'a' : date(2013, 1, 5), 'e' : date(2014, 2, 3)}
+    assert resumed.commit({'b' : date(2015, 1, 1)}) == 1
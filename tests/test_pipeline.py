@@ -0,0 +1,83 @@
+import io
+import numpy as np
+import pandas as pd
+import pytest
+
+from preprocessing.pipeline import Pipeline
+
+STEPS = [('filter',          {'column' : 'shares', 'op' : 'lt', 'value' : 12000, 'target' : True}),
+         ('filter',          {'column' : 'num_hrefs', 'op' : 'lt', 'value' : 4, 'log1p' : True}),
+         ('fill_nan',        {'columns' : ['num_imgs']}),
+         ('encode_weekdays', {}),
+         ('cut',             {'column' : 'title_subjectivity', 'bins' : [-0.000001, 0.000001, 0.334, 0.667, 1],
+                              'labels' : ['no_subjectivity', 'low_subjectivity', 'medium_subjectvity',
+                                          'high_subjectivity']}),
+         ('drop',            {'columns' : ['url']}),
+         ('apply_log1p',     {'columns' : ['num_hrefs', 'num_imgs']}),
+         ('apply_one_hot',   {'column' : 'data_channel'}),
+         ('apply_one_hot',   {'column' : 'weekday'}),
+         ('apply_one_hot',   {'column' : 'title_subjectivity'}),
+         ('robust_scale',    {'columns' : ['kw_avg_avg']}),
+         ('pca',             {'n_components' : 0.90})]
+
+
+@pytest.fixture
+def data():
+
+    rng = np.random.RandomState(0)
+    n   = 500
+    X   = pd.DataFrame({'url'                : [f"http://mashable.com/2014/01/0{i % 9 + 1}/a-{i}/" for i in range(n)],
+                        'num_hrefs'          : rng.poisson(10, n),
+                        'num_imgs'           : np.where(rng.rand(n) < 0.1, np.nan, rng.poisson(3, n)),
+                        'kw_avg_avg'         : rng.lognormal(8, 0.5, n),
+                        'title_subjectivity' : rng.rand(n),
+                        'data_channel'       : rng.choice(['bus', 'tech', 'world', 'lifestyle'], n),
+                        'weekday'            : rng.choice(['monday', 'friday', 'sunday'], n)})
+    y   = pd.Series(np.round(np.exp(rng.randn(n) * 0.9 + 7.3)).astype(int), name = 'shares')
+
+    return X, y
+
+
+def test_save_load_round_trip(data, tmp_path):
+
+    X, y = data
+    pipeline = Pipeline(STEPS)
+    X_train, y_train = pipeline.fit_transform(X, y)
+
+    pipeline.save(tmp_path / 'pipeline.npz')
+    loaded = Pipeline.load(tmp_path / 'pipeline.npz')
+
+    assert loaded.get_steps() == pipeline.get_steps()
+    assert loaded.get_feature_names() == pipeline.get_feature_names()
+    np.testing.assert_array_equal(loaded.transform(X), pipeline.transform(X))
+
+    # The filters are only applied by fit: the rows kept are transformed as by fit_transform.
+    keep = (y < 12000) & (np.log1p(X['num_hrefs']) < 4)
+    np.testing.assert_array_equal(loaded.transform(X[keep]), X_train)
+    np.testing.assert_array_equal(y_train, y[keep])
+
+
+def test_save_to_a_file_object(data):
+
+    X, y = data
+    pipeline = Pipeline(STEPS).fit(X, y)
+
+    buffer = io.BytesIO()
+    pipeline.save(buffer)
+    buffer.seek(0)
+
+    np.testing.assert_array_equal(Pipeline.load(buffer).transform(X), pipeline.transform(X))
+
+
+def test_target_filter_with_an_array(data):
+
+    X, y = data
+
+    X_named, y_named = Pipeline(STEPS).fit_transform(X, y)
+    X_array, y_array = Pipeline(STEPS).fit_transform(X, y.to_numpy())
+
+    np.testing.assert_array_equal(X_named, X_array)
+    np.testing.assert_array_equal(y_named, y_array)
+
+    with pytest.raises(ValueError, match = 'target'):
+        Pipeline([('filter', {'column' : 'shares', 'op' : 'lt', 'value' : 12000})]).fit(X, y.to_numpy())
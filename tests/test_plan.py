@@ -0,0 +1,42 @@
+import numpy as np
+import pandas as pd
+
+from sklearn.model_selection import KFold
+
+from Plan import PreprocessPlan
+from Pruned import PrunedCV
+
+
+def test_plan_matches_preprocess(evaluation):
+
+    X, y = evaluation
+    cv   = PrunedCV(X, y, KFold(3))
+    plan = PreprocessPlan(n_components = 0.90)
+
+    for train, valid in KFold(3, shuffle = True, random_state = 0).split(X):
+
+        expected = cv.preprocess(X.iloc[train].copy(), y.iloc[train].copy())
+        output   = plan.execute(X.iloc[train], y.iloc[train])
+
+        # Bit for bit, not only close.
+        assert np.array_equal(expected[0], output[0])
+        assert expected[1].equals(output[1])
+        assert expected[2] == output[2]
+        assert list(expected[3].feature_names_in_) == list(output[3].feature_names_in_)
+
+        expected = cv.preprocess(X.iloc[valid].copy(), y.iloc[valid].copy(), p = expected[3], train = False,
+                                 means = expected[2])
+        output   = plan.execute(X.iloc[valid], y.iloc[valid], p = output[3], train = False, means = output[2])
+
+        assert np.array_equal(expected[0], output[0])
+        assert expected[1].equals(output[1])
+
+
+def test_plan_does_not_modify_its_input(evaluation):
+
+    X, y = evaluation
+    before = X.copy()
+
+    PreprocessPlan().execute(X, y)
+
+    pd.testing.assert_frame_equal(X, before)
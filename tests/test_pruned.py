@@ -0,0 +1,403 @@
+import io
+import json
+import os
+import time
+import contextlib
+import numpy as np
+import pandas as pd
+import pytest
+
+from scipy import stats
+from sklearn.base import BaseEstimator, RegressorMixin
+from sklearn.model_selection import KFold
+from sklearn.metrics import mean_squared_error, mean_absolute_error
+
+from Pruned import PrunedCV
+from Results import ResultStore
+
+
+@pytest.fixture(scope = 'module')
+def synthetic():
+    '''
+    A small regression problem, for the tests that do not need the columns of the dataset.
+    '''
+
+    rng = np.random.RandomState(0)
+    X   = pd.DataFrame(rng.randn(600, 6), columns = list('abcdef'))
+    y   = pd.Series(2 * X['a'] - X['b'] + rng.randn(600), name = 'target')
+
+    return X, y
+
+
+class SlowRegressor(RegressorMixin, BaseEstimator):
+    '''
+    Predicts the mean of the labels plus `shift`, after `delay` seconds per 400 training samples.
+    '''
+
+    def __init__(self, delay: float = 0.0, shift: float = 0.0):
+
+        self.delay = delay
+        self.shift = shift
+
+    def fit(self, X, y):
+
+        time.sleep(self.delay * len(X) / 400)
+        self.mean_ = float(np.mean(y))
+        return self
+
+    def predict(self, X):
+
+        return np.full(len(X), self.mean_ + self.shift)
+
+
+def run(cv, **kwargs) -> dict:
+    '''
+    Runs the sweep of `cv` without its prints and returns its performances.
+    '''
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        cv.do_cross_validation(**kwargs)
+
+    return cv.get_performance()
+
+
+def scores(performance: dict) -> dict:
+    '''
+    Returns the performances without their timings, which change from a run to the other.
+    '''
+
+    return {name: {config: {key: value for key, value in results.items() if key != 'timing'}
+                   for config, results in configs.items()} for name, configs in performance.items()}
+
+
+def test_halving_on_preprocessed_folds_of_unequal_width(evaluation):
+
+    X, y = evaluation
+    cv   = PrunedCV(X, y, KFold(3, shuffle = True, random_state = 0), fold_views = True)
+    cv.set_preprocessing(n_components = 0.90)
+    cv.set_params({'sklearn.linear_model.Ridge' : {'alpha' : [1, 10, 100]}}, [mean_squared_error])
+    cv.set_evaluation(mean_squared_error, 2, 1.2)
+    cv.set_scheduler('halving', min_folds = 3, min_fraction = 0.01, random_state = 0)
+
+    performance = run(cv)
+
+    # The PCA keeps a different number of components on each fold, while the subsamples have the same length.
+    widths = {cv.__fold_data__[key][0].shape[1] for key in cv.__fold_keys__}
+    assert len(widths) > 1
+    assert all(len(config['mean_squared_error']) == 3 for config in performance['Ridge'].values())
+
+
+@pytest.mark.parametrize('grid', [{'sklearn.linear_model.Lasso'                  : {'alpha' : [0.001, 0.01, 0.1, 1.0]}},
+                                  {'sklearn.ensemble.RandomForestRegressor'      : {'n_estimators' : [5, 10, 20],
+                                                                                    'random_state' : [0]}},
+                                  {'sklearn.linear_model.SGDRegressor'           : {'alpha' : [0.0001, 0.001, 0.01],
+                                                                                    'random_state' : [0]}},
+                                  {'sklearn.neural_network.MLPRegressor'         : {'alpha' : [0.0001, 0.01],
+                                                                                    'hidden_layer_sizes' : [(8,)],
+                                                                                    'max_iter' : [50],
+                                                                                    'random_state' : [0]}}])
+def test_warm_paths_match_the_fits_from_scratch(synthetic, grid):
+
+    X, y = synthetic
+
+    performances = []
+    for warm_start in [False, True]:
+
+        cv = PrunedCV(X, y, KFold(3, shuffle = True, random_state = 0))
+        cv.set_params(grid, [mean_squared_error])
+        cv.set_evaluation(mean_squared_error, 0, 1.0)
+        cv.set_warm_start(warm_start)
+        performances.append(run(cv))
+
+    for name, configs in performances[0].items():
+        for config, performance in configs.items():
+            np.testing.assert_allclose(performances[1][name][config]['mean_squared_error'],
+                                       performance['mean_squared_error'], rtol = 1e-4)
+
+
+def test_parallel_runs_match_the_serial_one(synthetic):
+
+    X, y = synthetic
+    grid = {'sklearn.linear_model.Ridge'         : {'alpha' : [0.1, 1, 10, 100, 1000, 10000]},
+            'sklearn.tree.DecisionTreeRegressor' : {'max_depth' : [1, 2, 4, 8], 'random_state' : [0]}}
+
+    def sweep(n_jobs: int, thresh_percentage: float) -> dict:
+
+        cv = PrunedCV(X, y, KFold(5, shuffle = True, random_state = 0))
+        cv.set_params(grid, [mean_squared_error, mean_absolute_error])
+        cv.set_evaluation(mean_squared_error, 2, thresh_percentage)
+        return scores(run(cv, n_jobs = n_jobs))
+
+    # Without pruning, nothing depends on the processes.
+    assert sweep(1, 0.0) == sweep(2, 0.0)
+
+    # With pruning, a batch of n_jobs configurations is pruned against the best score known when it starts: the
+    # results depend on n_jobs, but not on which process ends first.
+    pruned = sweep(2, 1.05)
+    assert pruned == sweep(2, 1.05)
+    assert any(config['skipped'] for configs in pruned.values() for config in configs.values())
+
+
+def test_successive_halving(synthetic):
+
+    X, y = synthetic
+    grid = {'sklearn.tree.DecisionTreeRegressor' : {'max_depth' : [1, 2, 3, 4, 6, 8, 12, 16, 20], 'random_state' : [0]}}
+
+    def sweep(scheduler: str, n_jobs: int = 1) -> dict:
+
+        cv = PrunedCV(X, y, KFold(5, shuffle = True, random_state = 0))
+        cv.set_params(grid, [mean_squared_error])
+        cv.set_evaluation(mean_squared_error, 0, 0.0)
+        cv.set_scheduler(scheduler, eta = 3, min_folds = 1, min_fraction = 0.3, random_state = 0)
+        return scores(run(cv, n_jobs = n_jobs))['DecisionTreeRegressor']
+
+    halving = sweep('halving')
+    full    = sweep('pruning')
+
+    # 9 configurations, eta = 3, rounds (1 fold, 30%), (1, 90%), (1, 100%), (3, 100%), (5, 100%): 6 stop after the
+    # first round, 2 after the second, 1 goes through all the folds with all the samples.
+    survivors = [name for name, config in halving.items() if not config['skipped']]
+    assert len(survivors) == 1
+    assert halving[survivors[0]]['budget'] == {'folds' : 5, 'fraction' : 1.0}
+    assert all(config['skip_reason'] == 'halving' for name, config in halving.items() if name not in survivors)
+    assert sorted(round(config['budget']['fraction'], 6) for config in halving.values()) == [0.3] * 6 + [0.9] * 2 + [1.0]
+
+    # The survivor has the scores of the exhaustive cross-validation, and the folds of a round can run anywhere.
+    assert halving[survivors[0]]['mean_squared_error'] == full[survivors[0]]['mean_squared_error']
+    assert halving == sweep('halving', n_jobs = 2)
+
+
+def test_fold_views_give_the_same_scores(synthetic):
+
+    X, y = synthetic
+    grid = {'sklearn.linear_model.Ridge'         : {'alpha' : [0.1, 10]},
+            'sklearn.tree.DecisionTreeRegressor' : {'max_depth' : [2, 5], 'random_state' : [0]}}
+
+    class CountingKFold(KFold):
+
+        calls = 0
+
+        def split(self, *args, **kwargs):
+            CountingKFold.calls += 1
+            return super().split(*args, **kwargs)
+
+    performances = []
+    for fold_views in [False, True]:
+
+        cv = PrunedCV(X, y, CountingKFold(5, shuffle = True, random_state = 0), fold_views = fold_views)
+        cv.set_params(grid, [mean_squared_error])
+        cv.set_evaluation(mean_squared_error, 0, 0.0)
+        performances.append(scores(run(cv)))
+
+    # A contiguous array instead of a frame: same scores, up to the order of the floating point sums.
+    for name, configs in performances[0].items():
+        for config, performance in configs.items():
+            np.testing.assert_allclose(performances[1][name][config]['mean_squared_error'],
+                                       performance['mean_squared_error'], rtol = 1e-12)
+
+    # The folds are split once per sweep, not once per configuration.
+    assert CountingKFold.calls == 2
+
+
+def test_preprocessed_folds_cache(evaluation, tmp_path):
+
+    X, y = evaluation
+    grid = {'sklearn.linear_model.Ridge' : {'alpha' : [1, 100]}}
+
+    def sweep(fused: bool = True, n_jobs: int = 1) -> tuple:
+
+        cv = PrunedCV(X, y, KFold(3, shuffle = True, random_state = 0))
+        cv.set_preprocessing(n_components = 0.90, cache_dir = str(tmp_path), fused = fused)
+        cv.set_params(grid, [mean_squared_error])
+        cv.set_evaluation(mean_squared_error, 0, 0.0)
+        return scores(run(cv, n_jobs = n_jobs)), cv
+
+    cold, cv = sweep()
+    files    = sorted(os.listdir(tmp_path))
+
+    # One file per array of each fold, mapped read-only.
+    assert len(files) == 3 * 4
+    assert all(isinstance(array, np.memmap) and not array.flags.writeable
+               for key in cv.__fold_keys__ for array in cv.__fold_data__[key])
+
+    # Later runs read the same files, whatever the way the folds would be preprocessed, and the workers too.
+    warm, _ = sweep(fused = False)
+    assert warm == cold
+    assert sweep(n_jobs = 2)[0] == cold
+    assert sorted(os.listdir(tmp_path)) == files
+
+    # The folds preprocessed without the cache give the same scores.
+    cv = PrunedCV(X, y, KFold(3, shuffle = True, random_state = 0))
+    cv.set_preprocessing(n_components = 0.90, fused = False)
+    cv.set_params(grid, [mean_squared_error])
+    cv.set_evaluation(mean_squared_error, 0, 0.0)
+    assert scores(run(cv)) == cold
+
+
+def test_store_resumes_the_sweep(synthetic, tmp_path):
+
+    X, y  = synthetic
+    store = ResultStore(str(tmp_path / 'results.sqlite'))
+
+    def sweep(alphas: list, folds = None, dtype = np.float64, n_jobs: int = 1) -> tuple:
+
+        cv = PrunedCV(X, y, folds or KFold(3, shuffle = True, random_state = 0), dtype = dtype)
+        cv.set_params({'sklearn.linear_model.Ridge' : {'alpha' : alphas}}, [mean_squared_error])
+        cv.set_evaluation(mean_squared_error, 0, 0.0)
+        cv.set_store(store)
+        performance = run(cv, n_jobs = n_jobs)['Ridge']
+        cached      = {performance[config]['parameters']['alpha'] : cached.all()
+                       for config, cached in cv.get_timings().groupby('config')['cached']}
+
+        return {config['parameters']['alpha'] : config['mean_squared_error'] for config in performance.values()}, cached
+
+    first, cached = sweep([1, 10])
+    assert not any(cached.values())
+    assert store.count() == 2 * 3
+
+    # Rerun: every cell is read, with the same scores.
+    again, cached = sweep([1, 10])
+    assert again == first
+    assert all(cached.values())
+
+    # Widened grid: only the new configurations are fitted, on any process.
+    wider, cached = sweep([1, 10, 100, 1000], n_jobs = 2)
+    assert cached == {1 : True, 10 : True, 100 : False, 1000 : False}
+    assert {alpha: wider[alpha] for alpha in first} == first
+    assert store.count() == 4 * 3
+
+    # Other folds or another type of the data: new fingerprint, nothing is reused.
+    for kwargs in [{'folds' : KFold(3, shuffle = True, random_state = 1)}, {'dtype' : np.float32}]:
+        _, cached = sweep([1, 10], **kwargs)
+        assert not any(cached.values())
+
+    assert store.count() == 4 * 3 + 2 * 2 * 3
+
+
+def test_built_in_metrics_match_the_sklearn_ones(synthetic):
+
+    X, y = synthetic
+
+    performances = []
+    for metrics in [[mean_squared_error], ['rmse']]:
+
+        cv = PrunedCV(X, y, KFold(3, shuffle = True, random_state = 0))
+        cv.set_params({'sklearn.linear_model.Ridge' : {'alpha' : [1, 100]}}, metrics)
+        cv.set_evaluation(metrics[0], 0, 0.0)
+        performances.append(run(cv)['Ridge'])
+
+    for config, performance in performances[0].items():
+        np.testing.assert_allclose(performances[1][config]['rmse'], performance['mean_squared_error'], rtol = 1e-12)
+
+
+def test_tpe_scheduler(synthetic):
+
+    X, y = synthetic
+    grid = {'sklearn.tree.DecisionTreeRegressor' : {'max_depth' : stats.randint(1, 12), 'min_samples_leaf' : [1, 5, 20],
+                                                    'random_state' : [0]}}
+
+    def sweep(n_jobs: int = 1, **kwargs) -> dict:
+
+        cv = PrunedCV(X, y, KFold(3, shuffle = True, random_state = 0))
+        cv.set_params(grid, [mean_squared_error])
+        cv.set_evaluation(mean_squared_error, 0, 0.0)
+        cv.set_scheduler('tpe', random_state = 0, n_startup = 4, **kwargs)
+        return scores(run(cv, n_jobs = n_jobs))['DecisionTreeRegressor']
+
+    tpe = sweep(n_trials = 10)
+    assert len(tpe) == 10
+    assert tpe == sweep(n_trials = 10)
+    assert all(1 <= config['parameters']['max_depth'] < 12 and config['parameters']['min_samples_leaf'] in [1, 5, 20]
+               for config in tpe.values())
+
+    # Batches of n_jobs configurations: a different search, with the same number of trials.
+    assert len(sweep(n_jobs = 2, n_trials = 10)) == 10
+
+    # 3 folds per configuration: the budget of fits is reached after 3 configurations.
+    assert len(sweep(n_trials = 10, max_fits = 7)) == 3
+
+
+def test_timings_and_trace(synthetic, tmp_path):
+
+    X, y  = synthetic
+    grid  = {'sklearn.linear_model.Ridge'         : {'alpha' : [1, 100]},
+             'sklearn.tree.DecisionTreeRegressor' : {'max_depth' : [2, 4, 8], 'random_state' : [0]}}
+    store = ResultStore(str(tmp_path / 'results.sqlite'))
+
+    def sweep(alphas: list) -> PrunedCV:
+
+        cv = PrunedCV(X, y, KFold(3, shuffle = True, random_state = 0))
+        cv.set_params({**grid, 'sklearn.linear_model.Ridge' : {'alpha' : alphas}}, [mean_squared_error])
+        cv.set_evaluation(mean_squared_error, 0, 0.0)
+        cv.set_instrumentation(memory = True)
+        cv.set_store(store)
+        run(cv)
+        return cv
+
+    cv    = sweep([1, 100])
+    folds = cv.get_timings('fold')
+
+    # One row per fit, the slowest first, with the size of the training part and the score of the fold.
+    assert len(folds) == 5 * 3
+    assert folds['total_time'].is_monotonic_decreasing
+    assert (folds['rows'] == 400).all() and (folds['columns'] == 6).all() and (folds['peak_memory'] > 0).all()
+    for row in folds.itertuples():
+        assert row.mean_squared_error == cv.get_performance()[row.model][row.config]['mean_squared_error'][row.fold]
+
+    configs = cv.get_timings('config').set_index('config')
+    assert len(configs) == 5 and (configs['folds'] == 3).all()
+    np.testing.assert_allclose(configs['total_time'], folds.groupby('config')['total_time'].sum()[configs.index])
+
+    models = cv.get_timings('model').set_index('model')
+    assert models.loc['Ridge', 'configs'] == 2 and models.loc['DecisionTreeRegressor', 'fits'] == 9
+
+    with pytest.raises(ValueError):
+        cv.get_timings('fit')
+
+    # Two boxes per fit, fit then predict, in microseconds from the first fit.
+    cv.export_trace(str(tmp_path / 'trace' / 'sweep.json'))
+    with open(tmp_path / 'trace' / 'sweep.json') as file:
+        events = json.load(file)['traceEvents']
+
+    assert len(events) == 2 * 5 * 3
+    assert min(event['ts'] for event in events) == 0.0
+    assert all(event['ph'] == 'X' and event['dur'] >= 0 and event['pid'] == os.getpid() for event in events)
+
+    # The fits read from the store did not run: they are in the timings, not in the trace.
+    cv = sweep([1, 100, 1000])
+    assert cv.get_timings('fold')['cached'].sum() == 5 * 3
+    cv.export_trace(str(tmp_path / 'resumed.json'))
+    with open(tmp_path / 'resumed.json') as file:
+        assert len(json.load(file)['traceEvents']) == 2 * 3
+
+
+def test_time_budgets(synthetic):
+
+    X, y = synthetic
+
+    def sweep(grid: dict, scheduler: str = 'pruning', **kwargs) -> dict:
+
+        cv = PrunedCV(X, y, KFold(3, shuffle = True, random_state = 0))
+        cv.set_params({'test_pruned.SlowRegressor' : grid}, [mean_squared_error])
+        cv.set_evaluation(mean_squared_error, 0, 0.0)
+        cv.set_scheduler(scheduler, eta = 3, min_folds = 1, min_fraction = 1 / 3, random_state = 0)
+        cv.set_time_budget(**kwargs)
+        return run(cv)['SlowRegressor']
+
+    # About 0.2 s per fold, 0.6 s for the 3 folds: stopped after the first one.
+    pruning = sweep({'delay' : [0.0, 0.2]}, config_budget = 0.4)
+    assert [config['skip_reason'] for config in pruning.values()] == [None, 'time']
+    assert len(list(pruning.values())[1]['mean_squared_error']) == 1
+
+    # With halving the slowest configuration is the best one, but it is not promoted: its first round, on a third
+    # of the samples, is scaled up to all of them.
+    halving = sweep([{'delay' : [0.2], 'shift' : [0.0]}, {'delay' : [0.0], 'shift' : [1.0, 2.0]}], 'halving', config_budget = 0.4)
+    reasons = {config['parameters']['shift'] : config['skip_reason'] for config in halving.values()}
+    assert reasons == {0.0 : 'time', 1.0 : None, 2.0 : 'halving'}
+    assert list(halving.values())[0]['budget'] == {'folds' : 1, 'fraction' : 1 / 3}
+
+    # Once the sweep is over its time, the configurations left are not fitted.
+    total   = list(sweep({'delay' : [0.1], 'shift' : [0.0, 1.0, 2.0, 3.0, 4.0]}, total_budget = 0.5).values())
+    reasons = [config['skip_reason'] for config in total]
+    assert reasons[0] is None and reasons[-1] == 'total_time'
+    assert len(total[-1]['mean_squared_error']) == 0
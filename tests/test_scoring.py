@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+
+from sklearn.metrics import mean_squared_error, mean_absolute_error, mean_squared_log_error, r2_score
+
+from Scoring import Metric, METRICS, as_metric, score_predictions
+
+
+@pytest.fixture
+def predictions():
+    '''
+    Labels and the predictions of 4 models, in log(shares) as the models are trained.
+    '''
+
+    rng    = np.random.RandomState(0)
+    y_true = rng.randn(200) * 0.9 + 7.3
+    Y_pred = y_true + rng.randn(4, 200) * np.array([[0.1], [0.5], [1.0], [2.0]])
+
+    return y_true, Y_pred
+
+
+def test_built_in_metrics_match_sklearn(predictions):
+
+    y_true, Y_pred = predictions
+    results        = score_predictions(list(METRICS.values()), y_true, Y_pred)
+
+    for k, y_pred in enumerate(Y_pred):
+        assert results['rmse'][k]  == pytest.approx(np.sqrt(mean_squared_error(y_true, y_pred)), rel = 1e-12)
+        assert results['mae'][k]   == pytest.approx(mean_absolute_error(y_true, y_pred), rel = 1e-12)
+        assert results['rmsle'][k] == pytest.approx(np.sqrt(mean_squared_log_error(np.exp(y_true), np.exp(y_pred))), rel = 1e-12)
+        assert results['r2'][k]    == pytest.approx(r2_score(y_true, y_pred), rel = 1e-12)
+
+
+def test_batched_predictions_match_the_single_ones(predictions):
+
+    y_true, Y_pred = predictions
+    metrics        = list(METRICS.values()) + [as_metric(mean_absolute_error)]
+    batched        = score_predictions(metrics, y_true, Y_pred)
+
+    for k, y_pred in enumerate(Y_pred):
+
+        single = score_predictions(metrics, y_true, y_pred)
+        assert all(isinstance(value, float) for value in single.values())
+        assert single == pytest.approx({name: values[k] for name, values in batched.items()}, rel = 1e-12)
+
+
+def test_as_metric():
+
+    # A sklearn method is followed by a square root, as PrunedCV has always done.
+    metric = as_metric(mean_squared_error)
+    assert metric.name == 'mean_squared_error' and not metric.vectorized
+    assert score_predictions([metric], [1.0, 2.0, 3.0], [1.0, 2.0, 5.0])['mean_squared_error'] == pytest.approx(np.sqrt(4 / 3))
+
+    assert as_metric('rmse') is METRICS['rmse']
+    assert as_metric(METRICS['r2']) is METRICS['r2']
+
+    with pytest.raises(ValueError):
+        as_metric('rmspe')
+
+
+def test_metrics_sharing_a_target_share_the_transformed_arrays(predictions):
+
+    y_true, Y_pred = predictions
+    calls          = []
+
+    def exp(values):
+        calls.append(values.shape)
+        return np.exp(values)
+
+    metrics = [Metric('msle', lambda y, Y, residuals: (residuals ** 2).mean(axis = 1), target = exp),
+               Metric('male', lambda y, Y, residuals: np.abs(residuals).mean(axis = 1), target = exp)]
+    score_predictions(metrics, y_true, Y_pred)
+
+    # Once for the labels and once for the predictions.
+    assert calls == [y_true.shape, Y_pred.shape]
@@ -0,0 +1,325 @@
+import io
+import json
+import threading
+import contextlib
+import numpy as np
+import pandas as pd
+import pytest
+import requests
+
+from bs4 import BeautifulSoup
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+from Cache import ResponseCache
+from Journal import ScrapeJournal
+from Scraper import Scraper, ScrapePast
+
+URL = [f"http://mashable.com/2013/01/{day:02d}/article-{day}/" for day in range(1, 9)]
+
+
+@pytest.fixture(scope = 'module')
+def snapshots() -> dict:
+    '''
+    The snapshot dates of each `URL` of `URL`, a few for some, many for others, none for the rest.
+    '''
+
+    rng   = np.random.RandomState(0)
+    start = np.datetime64('2013-01-01')
+
+    return {url: np.unique(start + rng.randint(0, 3 * 365, rng.choice([0, 3, 40])).astype('timedelta64[D]'))
+            for url in URL}
+
+
+@pytest.fixture
+def archive(snapshots):
+    '''
+    A local Wayback Machine: the calendar and the `CDX` index of `snapshots`, and the pages in `pages`. A path fails
+    with a 503 as many times as `failures[path]` says. Every path requested is logged.
+    '''
+
+    pages    = {}
+    failures = {}
+    log      = []
+    lock     = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+
+        def do_GET(self):
+
+            path  = urlparse(self.path).path
+            query = {key: values[0] for key, values in parse_qs(urlparse(self.path).query).items()}
+            with lock:
+                log.append(path)
+                failing = failures.get(path, 0) > 0
+                failures[path] = failures.get(path, 0) - 1
+
+            dates = snapshots.get(query.get('url'), np.array([], dtype = 'datetime64[D]'))
+            if failing:
+                status, body = 503, b''
+            elif path == '/__wb/calendarcaptures/2':
+                year  = dates[dates.astype('datetime64[Y]').astype(int) + 1970 == int(query['date'])]
+                items = [[int(str(day)[5:7] + str(day)[8:10]), 200, 1] for day in year]
+                status, body = 200, json.dumps({'items' : items}).encode()
+            elif path == '/cdx/search/cdx':
+                status, body = 200, ''.join(f"{str(day).replace('-', '')}120000\n" for day in dates).encode()
+            elif path in pages:
+                status, body = 200, pages[path]
+            else:
+                status, body = 404, b''
+
+            self.send_response(status)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target = server.serve_forever, daemon = True)
+    thread.start()
+
+    yield f"http://127.0.0.1:{server.server_address[1]}", pages, failures, log
+
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def scraper():
+
+    return Scraper()
+
+
+def test_closest_batch_matches_the_scalar_version(scraper):
+
+    rng   = np.random.RandomState(0)
+    start = np.datetime64('2013-01-01')
+
+    # Some URL's without any snapshot, duplicated dates and unsorted lists, as parsed from the calendars.
+    url_dates = {f"url_{i}": start + rng.randint(0, 1000, rng.choice([0, 1, 5, 30])).astype('timedelta64[D]')
+                 for i in range(300)}
+    candidates = start + rng.randint(-50, 1100, len(url_dates)).astype('timedelta64[D]')
+
+    offsets, values = scraper.to_ragged(url_dates)
+    closest         = scraper.get_closest_batch(offsets, values, candidates)
+
+    expected = [scraper.get_closest(candidate, dates) for candidate, dates in zip(candidates, url_dates.values())]
+    np.testing.assert_array_equal(closest, np.array(expected, dtype = 'datetime64[D]'))
+
+
+def test_closest_batch_with_missing_dates(scraper):
+
+    offsets, values = scraper.to_ragged({'a' : np.array(['2013-01-10', '2013-01-01'], dtype = 'datetime64[D]'),
+                                         'b' : np.array([], dtype = 'datetime64[D]'),
+                                         'c' : np.array(['2015-01-01', 'NaT'], dtype = 'datetime64[D]')})
+
+    closest = scraper.get_closest_batch(offsets, values, np.array(['NaT', '2014-05-01', '2015-02-01'],
+                                                                  dtype = 'datetime64[D]'))
+
+    # A NaT candidate stays NaT, an URL without snapshots keeps its candidate, a NaT snapshot is ignored.
+    np.testing.assert_array_equal(closest, np.array(['NaT', '2014-05-01', '2015-01-01'], dtype = 'datetime64[D]'))
+
+
+def test_shift_dates_frame_matches_the_scalar_version(scraper):
+
+    url_timedelta = pd.DataFrame({'url'       : ['http://mashable.com/2013/01/07/amazon-instant-video-browser/',
+                                                 'http://mashable.com/2014/12/27/samsung-app-autism/',
+                                                 'http://example.com/no-date/',
+                                                 'http://mashable.com/2014/02/01/a/'],
+                                  'timedelta' : [731, 8, 100, None]})
+
+    shifted = scraper.shift_dates_frame(url_timedelta)
+    rows    = url_timedelta.iloc[:2]
+
+    np.testing.assert_array_equal(shifted[:2], np.array(scraper.shift_dates(rows['url'], rows['timedelta'].astype(int)),
+                                                        dtype = 'datetime64[D]'))
+    assert np.isnat(shifted[2:]).all()
+
+
+def test_index_backend_matches_the_calendars(archive, snapshots):
+
+    base_url = archive[0]
+
+    calendar = Scraper()
+    calendar.set_url(pd.DataFrame({'url' : URL, 'timedelta' : 0}))
+    with contextlib.redirect_stdout(io.StringIO()):
+        calendar.get_snap_dates(calendar.scrape_async(URL, base_url = base_url, rate = 0))
+
+    index = Scraper()
+    index.set_url(pd.DataFrame({'url' : URL, 'timedelta' : 0}))
+    index.set_backend('index', base_url = base_url, rate = 0)
+
+    # One request per URL instead of one per year, and the same dates.
+    dates = index.get_snap_dates()
+    for url in URL:
+        np.testing.assert_array_equal(dates[url], np.array(calendar.__dates__[url], dtype = 'datetime64[D]'))
+        np.testing.assert_array_equal(dates[url], snapshots[url])
+
+
+def article(keywords: list, imgs: int, videos: int) -> bytes:
+    '''
+    An archived article, as far as `recall_past` looks at it.
+    '''
+
+    content = '<img src="a.png">' * imgs + '<iframe src="v"></iframe>' * videos
+    return (f'<html><head><meta name="keywords" data-page-subject="true" content="{", ".join(keywords)}"></head>'
+            f'<body><img src="logo.png"><div class="article-content">{content}</div></body></html>').encode()
+
+
+def recall_one(content: bytes) -> dict:
+    '''
+    What the sequential `recall_past` extracted from a page, before the pool of parsers.
+    '''
+
+    soup     = BeautifulSoup(content, 'html.parser')
+    meta_tag = soup.find('meta', attrs={'name': 'keywords', 'data-page-subject': 'true'})
+
+    return {'keywords' : meta_tag['content'].split(', '), 'imgs' : len(soup.select('.article-content img')),
+            'videos'   : len(soup.select('.article-content iframe'))}
+
+
+def test_recall_past_matches_the_sequential_version(archive, tmp_path):
+
+    base_url, pages, failures, log = archive
+    paths = [f"/web/20140101000000/{url}" for url in URL]
+    for position, path in enumerate(paths):
+        pages[path] = article([f"topic-{position}", 'news'], position % 3, position % 2)
+
+    # The third page fails once: it is tried again, and only the page is cached, not the error.
+    failures[paths[2]] = 1
+
+    old_url = [base_url + path for path in paths]
+    past    = ScrapePast()
+    past.set_cache(ResponseCache(str(tmp_path / 'responses.sqlite')))
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        old_url_html, url_info = past.recall_past(old_url, n_fetchers = 3, n_parsers = 2, rate = 0)
+
+    assert old_url_html == {}
+    assert list(url_info) == old_url
+    assert url_info == {url: recall_one(pages[path]) for url, path in zip(old_url, paths)}
+    assert log.count(paths[2]) == 2
+
+    # Again, from the cache only.
+    with contextlib.redirect_stdout(io.StringIO()):
+        old_url_html, cached_info = past.recall_past(old_url, n_fetchers = 3, n_parsers = 2, rate = 0, keep_html = True)
+
+    assert cached_info == url_info
+    assert old_url_html == {url: pages[path] for url, path in zip(old_url, paths)}
+    assert len(log) == len(paths) + 1
+
+
+def test_fetch_past_gives_up(archive, tmp_path):
+
+    base_url, pages, failures, log = archive
+    pages['/web/1/a'] = article(['a'], 1, 1)
+    failures['/web/1/a'] = 10
+
+    past = ScrapePast()
+    past.set_cache(ResponseCache(str(tmp_path / 'responses.sqlite')))
+
+    # One retry after a second, then the error reaches the caller, and nothing is cached.
+    with contextlib.redirect_stdout(io.StringIO()), pytest.raises(requests.HTTPError):
+        past.recall_past([base_url + '/web/1/a'], n_fetchers = 1, n_parsers = 1, rate = 0, retries = 1)
+
+    assert log == ['/web/1/a'] * 2
+    assert past.__cache__.get(base_url + '/web/1/a') is None
+
+    # A missing page is an error as well, not an article without keywords.
+    with contextlib.redirect_stdout(io.StringIO()), pytest.raises(requests.HTTPError):
+        past.recall_past([base_url + '/web/1/missing'], n_fetchers = 1, n_parsers = 1, rate = 0, retries = 0)
+
+
+class CalendarDriver():
+    '''
+    Stands for the browser: the rendered calendar of the year and `URL` last requested, with the `snapshots`.
+    '''
+
+    def __init__(self, snapshots: dict):
+
+        self.snapshots = snapshots
+
+    def get(self, archive_url: str):
+
+        self.year = int(archive_url.split('/web/')[1][:4])
+        self.url  = archive_url.split('0101000000*/')[1]
+
+    @property
+    def page_source(self) -> str:
+
+        days   = {str(day) for day in self.snapshots[self.url]}
+        months = []
+        for month in range(1, 13):
+            months.append('<div class="month">' + ''.join(
+                '<div class="month-day-container"><div style="touch-action: pan-y; user-select: none;">'
+                f'{day}</div></div>' if f"{self.year}-{month:02d}-{day:02d}" in days else
+                f'<div class="month-day-container"><div>{day}</div></div>' for day in range(1, 32)) + '</div>')
+
+        return '<html><body>' + ''.join(months) + '</body></html>'
+
+
+def test_lean_scrape_matches_the_eager_one(snapshots, tmp_path):
+
+    url_timedelta = pd.DataFrame({'url' : URL, 'timedelta' : 400})
+
+    def scrape(lean: bool, backup: bool) -> tuple:
+
+        scrap = Scraper()
+        scrap.set_url(url_timedelta)
+        scrap.set_journal(ScrapeJournal(str(tmp_path / f"journal_{lean}_{backup}.jsonl")))
+        scrap.__driver__ = CalendarDriver(snapshots)
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            url_html = scrap.scrape(URL, backup = backup, batch_size = 3, lean = lean, pause = 0, restart_every = 0)
+            dates    = scrap.get_snap_dates(url_html) if not backup else None
+
+        return url_html, dates, scrap.get_journal().get_results()
+
+    eager, eager_dates, _ = scrape(lean = False, backup = False)
+    lean,  lean_dates,  _ = scrape(lean = True,  backup = False)
+
+    # Only the dates are kept, and they are the ones of the pages.
+    assert all(isinstance(payload, np.ndarray) for years in lean.values() for payload in years.values())
+    assert all(isinstance(payload, BeautifulSoup) for years in eager.values() for payload in years.values())
+    for url in URL:
+        np.testing.assert_array_equal(np.array(lean_dates[url], dtype = 'datetime64[D]'),
+                                      np.array(eager_dates[url], dtype = 'datetime64[D]'))
+        np.testing.assert_array_equal(np.array(lean_dates[url], dtype = 'datetime64[D]'), snapshots[url])
+
+    # Same closest dates committed to the journal, batch after batch.
+    journal = scrape(lean = True, backup = True)[2]
+    assert len(journal) == len(URL)
+    assert journal == scrape(lean = False, backup = True)[2]
+
+
+def test_parallel_scrape_matches_a_single_scraper(archive):
+
+    base_url, _, _, log = archive
+
+    scrap = Scraper()
+    scrap.set_url(pd.DataFrame({'url' : URL, 'timedelta' : 0}))
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        single  = scrap.scrape_async(URL, years = ['2013', '2014'], base_url = base_url, rate = 0)
+        sharded = scrap.parallelize_scrape(n_workers = 3, mode = 'fetch', rate = 0, years = ['2013', '2014'],
+                                           base_url = base_url)
+
+    # Every URL once per year for each run, the shards merged in the order of the URL's.
+    assert len(log) == 2 * 2 * len(URL)
+    assert list(sharded) == URL
+    assert {url: {year: list(dates) for year, dates in years.items()} for url, years in sharded.items()} == \
+           {url: {year: list(dates) for year, dates in years.items()} for url, years in single.items()}
+
+    # Shards given by hand, some of them empty.
+    with contextlib.redirect_stdout(io.StringIO()):
+        partition = scrap.parallelize_scrape([URL[4:], [], URL[:4]], mode = 'fetch', rate = 0, base_url = base_url)
+    assert list(partition) == URL[4:] + URL[:4]
+    assert scrap.parallelize_scrape([], mode = 'fetch') == {}
+
+    with pytest.raises(ValueError):
+        scrap.parallelize_scrape([URL[:4], URL[3:]], mode = 'fetch')
+
+    # Checked before any worker starts.
+    with pytest.raises(TypeError):
+        scrap.parallelize_scrape(mode = 'fetch', backup = False)
@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+
+from scipy import stats
+
+from Search import TPESampler
+
+
+SPACE = {'alpha'     : stats.loguniform(1e-3, 1e2),
+         'max_depth' : stats.randint(1, 10),
+         'kernel'    : ['linear', 'rbf', 'poly']}
+
+
+def search(random_state: int, n_trials: int = 30) -> list:
+    '''
+    Runs a search on a known loss, lowest at alpha = 1, max_depth = 5 and 'rbf'.
+    '''
+
+    sampler = TPESampler(SPACE, n_startup = 10, random_state = random_state)
+
+    configs = []
+    while len(sampler) < n_trials:
+        for config in sampler.propose(2):
+            loss = np.log10(config['alpha']) ** 2 + (config['max_depth'] - 5) ** 2 / 10 + (config['kernel'] != 'rbf')
+            sampler.observe(config, loss)
+            configs.append((config, loss))
+
+    return configs
+
+
+def test_same_seed_same_proposals():
+
+    assert search(0) == search(0)
+    assert search(0) != search(1)
+
+
+def test_proposals_stay_within_the_space():
+
+    for config, _ in search(0):
+        assert 1e-3 <= config['alpha'] <= 1e2
+        assert isinstance(config['max_depth'], int) and 1 <= config['max_depth'] < 10
+        assert config['kernel'] in SPACE['kernel']
+
+
+def test_adaptive_proposals_improve_on_the_random_ones():
+
+    losses = np.array([[loss for _, loss in search(seed, 60)] for seed in range(5)])
+
+    # The first 10 configurations are drawn at random, the next ones from the densities.
+    assert np.median(losses[:, 40:]) < np.median(losses[:, :10])
+
+
+def test_proposals_are_not_repeated():
+
+    sampler  = TPESampler({'kernel' : ['linear', 'rbf'], 'degree' : [2, 3]}, n_startup = 2, random_state = 0)
+    proposed = sampler.propose(4)
+
+    assert sorted((config['kernel'], config['degree']) for config in proposed) == [('linear', 2), ('linear', 3),
+                                                                                  ('rbf', 2), ('rbf', 3)]
+    assert len(sampler) == 4
+
+
+def test_invalid_space():
+
+    with pytest.raises(TypeError):
+        TPESampler({'alpha' : 0.1})
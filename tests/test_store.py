@@ -0,0 +1,61 @@
+import os
+import pickle
+import datetime
+import pandas as pd
+
+from Journal import ScrapeJournal
+from Store import SnapshotStore
+
+
+def write_shards(folder, shards: list) -> None:
+    '''
+    Writes the pickle files of the older `Scraper.scrape`, one per batch, each modified after the previous one.
+    '''
+
+    for position, batch in enumerate(shards):
+
+        path = os.path.join(folder, f"url_html{(position + 1) * 10}.pkl")
+        with open(path, 'wb') as file:
+            pickle.dump(batch, file)
+        os.utime(path, (1.4e9 + position, 1.4e9 + position))
+
+
+def test_compact_matches_the_merged_shards(tmp_path):
+
+    shards = [{'a' : datetime.date(2013, 1, 5), 'b' : pd.Timestamp('2013-02-01'), 'c' : None},
+              {'b' : datetime.date(2013, 2, 3), 'd' : pd.Timestamp('2014-07-01 12:30')}]
+    write_shards(tmp_path, shards)
+
+    journal = ScrapeJournal(str(tmp_path / 'journal.jsonl'))
+    journal.commit({'d' : datetime.date(2014, 7, 2), 'e' : datetime.date(2015, 3, 1)}, committed_at = 1.5e9)
+
+    store = SnapshotStore(str(tmp_path / 'snapshots.parquet'))
+    table = store.compact(str(tmp_path / 'url_html*.pkl'), str(tmp_path / 'journal.jsonl'))
+
+    # The old way: every shard loaded in order, the later ones overwriting the earlier ones, then the journal.
+    merged = {}
+    for batch in shards + [journal.get_results()]:
+        merged.update({url: pd.Timestamp(closest).date() for url, closest in batch.items() if closest is not None})
+
+    assert list(table.index) == sorted(merged)
+    assert {url: store.lookup(url) for url in merged} == merged
+    assert store.lookup('never_scraped') is None
+
+    # A new store reads the same table from the disk, up to the resolution of the times in Parquet.
+    pd.testing.assert_frame_equal(SnapshotStore(str(tmp_path / 'snapshots.parquet')).load(), table, check_dtype = False)
+
+
+def test_join(tmp_path):
+
+    write_shards(tmp_path, [{'a' : datetime.date(2013, 1, 5), 'b' : datetime.date(2013, 2, 1)}])
+
+    store = SnapshotStore(str(tmp_path / 'snapshots.parquet'))
+    store.compact(str(tmp_path / 'url_html*.pkl'), str(tmp_path / 'journal.jsonl'))
+
+    data   = pd.DataFrame({'url' : ['b', 'x', 'a', 'b'], 'shares' : [1, 2, 3, 4]}, index = [10, 11, 12, 13])
+    joined = store.join(data)
+
+    # Same rows, same order, a missing date for the URL never scraped.
+    assert joined.index.equals(data.index) and joined['shares'].equals(data['shares'])
+    assert [store.lookup(url) for url in data['url']] == [None if pd.isna(closest) else closest.date()
+                                                          for closest in joined['closest_date']]